@@ -13,10 +13,12 @@ from copy import copy
 from functools import partial
 from numpy import floor, log, ones
 # Internal classes
-from .Individual import FloatIndividual
+from .Individual import FloatIndividual, MixedIntPopulation
 from .Parameters import Parameters
-from .Utils import options, num_options_per_module
+from .distributed import Coordinator, parseAddress
+from .Utils import options, num_options_per_module, createRNG, getRNG, roundUpToMultiple
 # Internal modules
+import modea.Boundary as Bnd
 import modea.Mutation as Mut
 import modea.Recombination as Rec
 import modea.Selection as Sel
@@ -37,30 +39,69 @@ class EvolutionaryOptimizer(object):
 
         * ``mutateParameters`` Mutates and/or updates all parameters where required
 
+        * ``mutatePopulation`` Optional. The whole new population is passed to this function to be mutated 'in-line' at
+          once, instead of passing each individual to ``mutate``
+
         :param population:      Initial set of individuals that form the starting population of the algorithm
         :param fitnessFunction: Function to determine the fitness of an individual
         :param budget:          Number of function evaluations allowed for this algorithm
         :param functions:       Dictionary with functions 'recombine', 'mutate', 'select' and 'mutateParameters'
         :param parameters:      Parameters object for storing relevant settings
-        :param parallel:        Set to True to enable parallel evaluation. Note: this disables sequential evaluation
+        :param parallel:        Set to True to enable parallel evaluation. Note: this disables sequential evaluation.
+                                With TPA, the two probe points are evaluated in the same batch as the next generation
+        :param rng:             ``np.random.Generator`` used for initialization and restarts.
+                                Default: the global ``np.random`` state
+        :param boundary_handling: Name of a strategy in :data:`modea.Boundary.strategies`, or a function with the same
+                                signature, to repair all mutated individuals at once before evaluation. The ``mutate``
+                                function should then not keep individuals in bounds itself. Default: None
+        :param speculative:     Batch size W for speculative evaluation, see :func:`~evalPopulationSpeculatively`.
+                                The ``fitnessFunction`` should then evaluate a list of genotypes, as in parallel mode.
+                                Default: None, evaluate one individual at a time if not parallel
+        :param charge_speculative: If True, surplus speculative evaluations also count against the budget.
+                                Default: False, only charge the evaluations sequential evaluation would have done
+        :param resample_timeouts: If True, individuals whose evaluation timed out in a parallel evaluator such as
+                                :class:`~modea.Parallel.SharedMemoryEvaluator` are replaced by freshly sampled ones,
+                                which are evaluated in an extra batch. Default: False, keep the penalty fitness
+        :param distributed:     Address ``host:port`` on which a :class:`~modea.distributed.Coordinator` serves the
+                                candidates of each generation to workers started with :mod:`modea.worker`, e.g.
+                                ``'localhost:0'`` for any free port, see :attr:`~coordinator`. This enables parallel
+                                evaluation, and the ``fitnessFunction`` is then only evaluated by the workers, so it
+                                may be None. The coordinator is stopped by :func:`~close`. Default: None
         :returns:               The statistics generated by running the algorithm
     """
 
-    def __init__(self, population, fitnessFunction, budget, functions, parameters, parallel=False):
+    def __init__(self, population, fitnessFunction, budget, functions, parameters, parallel=False, rng=None,
+                 boundary_handling=None, speculative=None, charge_speculative=False, resample_timeouts=False,
+                 distributed=None):
         # Initialization
+        self.rng = getRNG(rng)
+        if boundary_handling in Bnd.strategies:
+            boundary_handling = Bnd.strategies[boundary_handling]
+        self.boundary_handling = None if boundary_handling is Bnd.unbounded else boundary_handling
         self.parameters = self.instantiateParameters(parameters)
         self.seq_cutoff = self.parameters.mu_int * self.parameters.seq_cutoff
+        self.seq_granularity = self.parameters.seq_granularity
         self.recombine = functions['recombine']
         self.mutate = functions['mutate']
         self.select = functions['select']
         self.mutateParameters = functions['mutateParameters']
+        self.mutatePopulation = functions.get('mutatePopulation')
         if population:
             self.population = population
         else:
             self.initializePopulation()
         self.new_population = self.recombine(self.population, self.parameters)
+        self.coordinator = None
+        if distributed is not None:
+            self.coordinator = Coordinator(*parseAddress(distributed))
+            fitnessFunction = self.coordinator
+            parallel = True
         self.fitnessFunction = fitnessFunction
         self.parallel = parallel
+        self.speculative = speculative
+        self.charge_speculative = charge_speculative
+        self.resample_timeouts = resample_timeouts
+        self.tpa_probes = None  # TPA probe points to be evaluated with the next parallel batch
 
         self.budget = budget
         self.used_budget = 0
@@ -72,6 +113,8 @@ class EvolutionaryOptimizer(object):
         self.sigma_over_time = []
         self.fitness_over_time = []
         self.generation_size = []
+        self.gen_timeouts = 0
+        self.timeouts_over_time = []  # Number of evaluations per generation that timed out in a parallel evaluator
         self.best_individual = self.population[0]
 
 
@@ -83,23 +126,122 @@ class EvolutionaryOptimizer(object):
 
 
     def evalPopulation(self):
-        for ind in self.new_population:
+        penalties = self.mutateNewPopulation()
+
+        # Any pending TPA probes are submitted in the same batch as the offspring
+        genotypes = [ind.genotype.flatten() for ind in self.new_population]
+        probes = self.popTpaProbes()
+        fitnesses = self.fitnessFunction(genotypes + probes)
+        self.assignFitnesses(fitnesses, penalties, num_probes=len(probes))
+
+        timed_out = self.countTimeouts()
+        if self.resample_timeouts:
+            self.resampleTimeouts([i for i in timed_out if i < len(self.new_population)])
+
+
+    def countTimeouts(self):
+        """
+            Add the evaluations of the most recent batch that timed out in the parallel evaluator, if it reports
+            them like :class:`~modea.Parallel.SharedMemoryEvaluator` does, to the statistics
+
+            :returns:   List of the indices in the batch that timed out
+        """
+        timed_out = list(getattr(self.fitnessFunction, 'timed_out', []))
+        self.gen_timeouts += len(timed_out)
+        return timed_out
+
+
+    def resampleTimeouts(self, indices):
+        """
+            Replace the individuals of the new population whose evaluation timed out by freshly sampled ones, and
+            evaluate those in a single extra batch. Replacements that time out again keep the penalty fitness.
+
+            :param indices: Indices in the new population of the individuals to replace
+        """
+        indices = indices[:max(self.budget - self.used_budget, 0)]
+        if not indices:
+            return
+
+        replacements = self.recombine(self.population, self.parameters)[:len(indices)]
+        origins = [ind.genotype for ind in replacements]
+        for ind in replacements:
             self.mutate(ind, self.parameters)
-        fitnesses = self.fitnessFunction([ind.genotype.flatten() for ind in self.new_population])
+        penalties = self.handleBoundaries(replacements, origins)
+
+        fitnesses = self.fitnessFunction([ind.genotype.flatten() for ind in replacements])
+        if penalties is not None:
+            fitnesses = [fit + penalty for fit, penalty in zip(fitnesses, penalties)]
+        for i, ind, fit in zip(indices, replacements, fitnesses):
+            ind.fitness = fit
+            self.new_population[i] = ind
+
+        self.used_budget += len(replacements)
+        self.gen_size += len(replacements)
+        self.countTimeouts()
+
+
+    def mutateNewPopulation(self):
+        """
+            Mutate all individuals in the new population, and apply the boundary handling to all of them at once
+
+            :returns:   None, or a list of penalties to add to the fitness of each individual
+        """
+        origins = [ind.genotype for ind in self.new_population]
+        if self.mutatePopulation is not None:
+            self.mutatePopulation(self.new_population, self.parameters)
+        else:
+            for ind in self.new_population:
+                self.mutate(ind, self.parameters)
+        return self.handleBoundaries(self.new_population, origins)
+
+
+    def popTpaProbes(self):
+        """
+            :returns:   List of the flattened TPA probe points waiting to be evaluated, which is empty if there are
+                        none. The probes are no longer pending afterwards
+        """
+        probes = [probe.flatten() for probe in self.tpa_probes] if self.tpa_probes is not None else []
+        self.tpa_probes = None
+        return probes
+
+
+    def assignFitnesses(self, fitnesses, penalties, num_probes=0):
+        """
+            Store the results of evaluating the whole new population, and apply any TPA result
+
+            :param fitnesses:   Fitness values of all individuals in the new population, followed by those of the
+                                ``num_probes`` TPA probe points
+            :param penalties:   None, or a list of penalties to add to the fitness of each individual
+            :param num_probes:  Either 0 or 2, the number of TPA probes evaluated in the same batch
+        """
+        if num_probes:
+            self.applyTpaResult(fitnesses[-2], fitnesses[-1])
+            fitnesses = fitnesses[:-2]
+
+        if penalties is not None:
+            fitnesses = [fit + penalty for fit, penalty in zip(fitnesses, penalties)]
         for ind, fit in zip(self.new_population, fitnesses):
             ind.fitness = fit
 
-        self.used_budget += self.parameters.lambda_
-        self.gen_size = self.parameters.lambda_
+        self.used_budget += len(self.new_population) + num_probes
+        self.gen_size = len(self.new_population) + num_probes
 
 
     def evalPopulationSequentially(self):
         improvement_found = False
         self.gen_size = 0
+        origins = [ind.genotype for ind in self.new_population]
+        if self.mutatePopulation is not None:
+            self.mutatePopulation(self.new_population, self.parameters)
         for i, individual in enumerate(self.new_population):
-            self.mutate(individual, self.parameters)  # Mutation
+            origin = origins[i]
+            if self.mutatePopulation is None:
+                self.mutate(individual, self.parameters)  # Mutation
+            penalties = self.handleBoundaries([individual], [origin])
             # Evaluation
             individual.fitness = self.fitnessFunction(individual.genotype.flatten())
+            if penalties is not None:
+                individual.fitness += penalties[0]
             self.used_budget += 1
             self.gen_size += 1
 
@@ -107,24 +249,120 @@ class EvolutionaryOptimizer(object):
             if self.parameters.sequential:  # We interrupt once a better individual has been found
                 if individual.fitness < self.best_individual.fitness:
                     improvement_found = True
-                if i >= self.seq_cutoff and improvement_found:
+                if i >= self.seq_cutoff and improvement_found and (i+1) % self.seq_granularity == 0:
                     break
                 if self.used_budget == self.budget:
                     break
         self.new_population = self.new_population[:i+1]  # Discard unused individuals
 
 
-    def tpaUpdate(self):
+    def evalPopulationSpeculatively(self):
+        """
+            Speculative variant of :func:`~evalPopulationSequentially`, for a ``fitnessFunction`` that evaluates a list
+            of genotypes in parallel. The candidates are evaluated in batches of ``self.speculative``, but the
+            sequential stopping rule is applied in candidate order. Only the candidates that sequential evaluation
+            would have evaluated are kept and charged to the budget. The surplus evaluations of the last batch are
+            discarded, and only charged if ``self.charge_speculative`` is set. Any pending TPA probes are evaluated
+            in the first batch.
+        """
+        penalties = self.mutateNewPopulation()
+        population = self.new_population
+        probes = self.popTpaProbes()
+        improvement_found = False
+        stopped = False
+        self.gen_size = 0
+        start = i = 0
+
+        while not stopped and start < len(population):
+            # Candidates beyond the remaining budget would never be charged, so they are not evaluated at all
+            remaining = max(self.budget - self.used_budget - len(probes), 1)
+            stop = min(start + self.speculative, start + remaining, len(population))
+            genotypes = [ind.genotype.flatten() for ind in population[start:stop]]
+            fitnesses = self.fitnessFunction(genotypes + probes)
+            self.countTimeouts()
+            if probes:
+                self.applyTpaResult(fitnesses[-2], fitnesses[-1])
+                self.used_budget += 2
+                self.gen_size += 2
+                probes = []
+
+            for i in range(start, stop):
+                individual = population[i]
+                individual.fitness = fitnesses[i - start]
+                if penalties is not None:
+                    individual.fitness += penalties[i]
+                self.used_budget += 1
+                self.gen_size += 1
+
+                # Sequential Evaluation
+                if self.parameters.sequential:  # We interrupt once a better individual has been found
+                    if individual.fitness < self.best_individual.fitness:
+                        improvement_found = True
+                    if (i >= self.seq_cutoff and improvement_found and (i+1) % self.seq_granularity == 0) \
+                            or self.used_budget >= self.budget:
+                        stopped = True
+                        break
+
+            if stopped and self.charge_speculative:
+                surplus = stop - (i+1)
+                self.used_budget += surplus
+                self.gen_size += surplus
+            start = stop
+
+        self.new_population = population[:i+1]  # Discard unused individuals
+
+
+    def handleBoundaries(self, individuals, origins):
+        """
+            Apply the boundary handling strategy to the genotypes of all given (mutated) individuals at once
+
+            :param individuals: List of mutated individuals
+            :param origins:     List of the genotypes of the individuals before mutation, used for resampling
+            :returns:           None, or a list of penalties to add to the fitness of each individual
+        """
+        if self.boundary_handling is None:
+            return None
+
+        genotypes = np.column_stack([ind.genotype for ind in individuals]).astype(np.float64)
+        if self.boundary_handling is Bnd.resample:
+            def sample(indices):
+                for index in indices:
+                    individuals[index].genotype = origins[index]
+                    self.mutate(individuals[index], self.parameters)
+                return np.column_stack([individuals[index].genotype for index in indices])
+
+            penalties = Bnd.resample(genotypes, self.parameters.l_bound, self.parameters.u_bound, sample=sample)
+        else:
+            penalties = self.boundary_handling(genotypes, self.parameters.l_bound, self.parameters.u_bound)
+
+        for i, ind in enumerate(individuals):
+            ind.genotype = genotypes[:, i:i+1]
+        return penalties
+
+
+    def tpaProbes(self):
+        """
+            :returns:   The two probe points ``wcm + tpa_vector`` and ``wcm - tpa_vector`` for the Two-Point step-size
+                        Adaptation, based on the most recent step of the weighted center of mass
+        """
         wcm = self.parameters.wcm
         tpa_vector = (wcm - self.parameters.wcm_old) * self.parameters.tpa_factor
+        return [wcm + tpa_vector, wcm - tpa_vector]
 
-        tpa_fitness_plus = self.fitnessFunction((wcm + tpa_vector).flatten())
-        tpa_fitness_min = self.fitnessFunction((wcm - tpa_vector).flatten())
+
+    def tpaUpdate(self):
+        probe_plus, probe_min = self.tpaProbes()
+        tpa_fitness_plus = self.fitnessFunction(probe_plus.flatten())
+        tpa_fitness_min = self.fitnessFunction(probe_min.flatten())
 
         self.used_budget += 2
         if self.used_budget > self.budget and self.parameters.sequential:
             self.used_budget = self.budget
 
+        self.applyTpaResult(tpa_fitness_plus, tpa_fitness_min)
+
+
+    def applyTpaResult(self, tpa_fitness_plus, tpa_fitness_min):
         # Is the ideal step size larger (True) or smaller (False)? None if TPA is not used
         if tpa_fitness_plus < tpa_fitness_min:
             self.parameters.tpa_result = 1
@@ -135,6 +373,8 @@ class EvolutionaryOptimizer(object):
     def recordStatistics(self):
         gen_size = self.gen_size
         self.generation_size.append(gen_size)
+        self.timeouts_over_time.append(self.gen_timeouts)
+        self.gen_timeouts = 0
         self.sigma_over_time.extend([self.parameters.sigma] * gen_size)
         self.fitness_over_time.extend([self.population[0].fitness] * gen_size)
         if self.population[0].fitness < self.best_individual.fitness:
@@ -142,14 +382,32 @@ class EvolutionaryOptimizer(object):
 
 
     def runOneGeneration(self):
-        if self.parameters.tpa:
-            self.new_population = self.new_population[:-2]
+        self.startGeneration()
 
         if self.parallel:
             self.evalPopulation()
+        elif self.speculative:
+            self.evalPopulationSpeculatively()
         else:  # Sequential
             self.evalPopulationSequentially()
 
+        self.finishGeneration(batch_tpa=self.parallel or bool(self.speculative))
+
+
+    def startGeneration(self):
+        """ First part of a generation, before evaluation: two offspring are replaced by the TPA probes """
+        if self.parameters.tpa:
+            self.new_population = self.new_population[:-2]
+
+
+    def finishGeneration(self, batch_tpa=False):
+        """
+            Second part of a generation, after the new population has been evaluated: selection, recombination and
+            the update of all parameters
+
+            :param batch_tpa:   If True, the TPA probes are left to be evaluated with the next batch of offspring
+                                instead of right away. Default: False
+        """
         self.parameters.recordRecentFitnessValues(self.used_budget, [ind.fitness for ind in self.new_population])
 
         if self.used_budget >= self.budget:  # Prevents errors from having to deal with too small populations
@@ -160,29 +418,36 @@ class EvolutionaryOptimizer(object):
 
         self.parameters.updateThreshold(self.used_budget)
         if self.parameters.tpa:  # Two-Point step-size Adaptation
-            self.tpaUpdate()
+            if batch_tpa:
+                # Evaluate the probes with the next batch: their result is applied one generation later
+                self.tpa_probes = self.tpaProbes()
+            else:
+                self.tpaUpdate()
 
         self.mutateParameters(self.used_budget)
 
 
     def runOptimizer(self, target=None, threshold=1e-8):
         # The main evaluation loop
-        if target is not None:
-            while self.used_budget < self.budget \
-                    and self.best_individual.fitness - target > threshold \
-                    and not self.parameters.checkLocalRestartConditions(self.used_budget):
-                self.runOneGeneration()
-                self.recordStatistics()
-        else:
-            while self.used_budget < self.budget and not self.parameters.checkLocalRestartConditions(self.used_budget):
-                self.runOneGeneration()
-                self.recordStatistics()
+        while self.optimizationOngoing(target, threshold):
+            self.runOneGeneration()
+            self.recordStatistics()
+
+
+    def optimizationOngoing(self, target=None, threshold=1e-8):
+        """
+            :returns:   True if the budget allows another generation, the target has not been reached and no local
+                        restart condition holds
+        """
+        if target is not None and not self.best_individual.fitness - target > threshold:
+            return False
+        return self.used_budget < self.budget and not self.parameters.checkLocalRestartConditions(self.used_budget)
 
 
     def initializePopulation(self):
         self.population = [FloatIndividual(self.parameters.n) for _ in range(self.parameters.mu_int)]
         # Init all individuals of the first population at the same random point in the search space
-        wcm = (np.random.randn(self.parameters.n, 1) * (self.parameters.u_bound - self.parameters.l_bound)) + self.parameters.l_bound
+        wcm = (self.rng.standard_normal((self.parameters.n, 1)) * (self.parameters.u_bound - self.parameters.l_bound)) + self.parameters.l_bound
         for individual in self.population:
             individual.genotype = copy(wcm)
 
@@ -197,7 +462,8 @@ class EvolutionaryOptimizer(object):
         if parameter_opts['lambda_']:
             lambda_init = parameter_opts['lambda_']
         elif parameter_opts['local_restart'] in ['IPOP', 'BIPOP']:
-            lambda_init = int(4 + floor(3 * log(parameter_opts['n'])))
+            lambda_init = roundUpToMultiple(int(4 + floor(3 * log(parameter_opts['n']))),
+                                            parameter_opts['worker_count'])
         else:
             lambda_init = None
         parameter_opts['lambda_'] = lambda_init
@@ -212,9 +478,12 @@ class EvolutionaryOptimizer(object):
             # Every local restart needs its own parameters, so parameter update/mutation must also be linked every time
             self.parameters = Parameters(**parameter_opts)
             self.seq_cutoff = self.parameters.mu_int * self.parameters.seq_cutoff
+            self.seq_granularity = self.parameters.seq_granularity
             self.mutateParameters = self.parameters.adaptCovarianceMatrix
+            self.reserveEvaluator()
 
             self.initializePopulation()
+            self.tpa_probes = None
             parameter_opts['wcm'] = self.population[0].genotype
             self.new_population = self.recombine(self.population, self.parameters)
 
@@ -242,15 +511,44 @@ class EvolutionaryOptimizer(object):
                     self.lambda_['large'] *= 2
                     parameter_opts['sigma'] = 2
                 elif self.regime == 'small':
-                    rand_val = np.random.random() ** 2
+                    rand_val = self.rng.random() ** 2
                     self.lambda_['small'] = int(floor(lambda_init * (.5*self.lambda_['large'] / lambda_init)**rand_val))
-                    parameter_opts['sigma'] = 2e-2 * np.random.random()
+                    self.lambda_['small'] = roundUpToMultiple(self.lambda_['small'], parameter_opts['worker_count'])
+                    parameter_opts['sigma'] = 2e-2 * self.rng.random()
 
                 self.budget = self.budgets[self.regime]
                 self.used_budget = 0
                 parameter_opts['budget'] = self.budget
                 parameter_opts['lambda_'] = self.lambda_[self.regime]
 
+    def reserveEvaluator(self):
+        """
+            Let a parallel evaluator that keeps resources per population size, such as a
+            :class:`~modea.Parallel.SharedMemoryEvaluator`, prepare for the current population size
+        """
+        reserve = getattr(self.fitnessFunction, 'reserve', None)
+        if reserve is not None and (self.parallel or self.speculative):
+            reserve(self.parameters.lambda_, self.parameters.n)
+
+
+    def close(self):
+        """
+            Release the resources held by the fitness function, if any, e.g. the worker processes of an evaluator, or
+            stop the :attr:`~coordinator` of a distributed optimizer
+        """
+        close = getattr(self.fitnessFunction, 'close', None)
+        if close is not None:
+            close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
     def determineRegime(self):
         large = self.budgets['large']
         small = self.budgets['small']
@@ -272,16 +570,17 @@ class OnePlusOneOptimizer(EvolutionaryOptimizer):
         :param n:               Dimensionality of the problem to be solved
         :param fitnessFunction: Function to determine the fitness of an individual
         :param budget:          Number of function evaluations allowed for this algorithm
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
     """
 
-    def __init__(self, n, fitnessFunction, budget):
+    def __init__(self, n, fitnessFunction, budget, rng=None):
 
-        parameters = Parameters(n, budget, 1, 1)
+        parameters = Parameters(n, budget, 1, 1, rng=rng)
         population = [FloatIndividual(n)]
 
         # We use functions here to 'hide' the additional passing of parameters that are algorithm specific
         recombine = Rec.onePlusOne
-        mutate = partial(Mut.addRandomOffset, sampler=Sam.GaussianSampling(n))
+        mutate = partial(Mut.addRandomOffset, sampler=Sam.GaussianSampling(n, rng=rng))
         select = Sel.onePlusOneSelection
         mutateParameters = parameters.oneFifthRule
 
@@ -292,7 +591,7 @@ class OnePlusOneOptimizer(EvolutionaryOptimizer):
             'mutateParameters': mutateParameters,
         }
 
-        super(OnePlusOneOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters)
+        super(OnePlusOneOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters, rng=rng)
 
 
 class CMAESOptimizer(EvolutionaryOptimizer):
@@ -306,10 +605,11 @@ class CMAESOptimizer(EvolutionaryOptimizer):
         :param mu:              Number of individuals that form the parents of each generation
         :param lambda_:         Number of individuals in the offspring of each generation
         :param elitist:         Boolean switch on using a (mu, l) strategy rather than (mu + l). Default: False
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
     """
 
-    def __init__(self, n, fitnessFunction, budget, mu=None, lambda_=None, elitist=False):
-        parameters = Parameters(n, budget, mu, lambda_, elitist=elitist)
+    def __init__(self, n, fitnessFunction, budget, mu=None, lambda_=None, elitist=False, rng=None):
+        parameters = Parameters(n, budget, mu, lambda_, elitist=elitist, rng=rng)
         population = [FloatIndividual(n) for _ in range(parameters.mu_int)]
 
         # Artificial init
@@ -319,7 +619,7 @@ class CMAESOptimizer(EvolutionaryOptimizer):
 
         # We use functions here to 'hide' the additional passing of parameters that are algorithm specific
         recombine = Rec.weighted
-        mutate = partial(Mut.CMAMutation, sampler=Sam.GaussianSampling(n))
+        mutate = partial(Mut.CMAMutation, sampler=Sam.GaussianSampling(n, rng=rng))
 
         def select(pop, new_pop, _, params):
             return Sel.best(pop, new_pop, params)
@@ -333,7 +633,7 @@ class CMAESOptimizer(EvolutionaryOptimizer):
             'mutateParameters': mutateParameters,
         }
 
-        super(CMAESOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters)
+        super(CMAESOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters, rng=rng)
 
 
 class GAOptimizer(EvolutionaryOptimizer):
@@ -347,16 +647,18 @@ class GAOptimizer(EvolutionaryOptimizer):
         :param lambda_:         Offpsring size of the GA
         :param population:      Initial population of candidates to be used by the MIES
         :param parameters:      Parameters object to be used by the GA
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
     """
 
-    def __init__(self, n, fitnessFunction, budget, mu, lambda_, population, parameters=None):
+    def __init__(self, n, fitnessFunction, budget, mu, lambda_, population, parameters=None, rng=None):
 
         if parameters is None:
-            parameters = Parameters(n=n, budget=budget, mu=mu, lambda_=lambda_)
+            parameters = Parameters(n=n, budget=budget, mu=mu, lambda_=lambda_, rng=rng)
 
         # We use functions here to 'hide' the additional passing of parameters that are algorithm specific
-        recombine = Rec.random
-        mutate = partial(Mut.mutateMixedInteger, options=options, num_options_per_module=num_options_per_module)
+        recombine = partial(Rec.random, rng=rng)
+        mutate = partial(Mut.mutateMixedInteger, options=options, num_options_per_module=num_options_per_module,
+                         rng=rng)
         best = Sel.bestGA
         def select(pop, new_pop, _, params):
             return best(pop, new_pop, params)
@@ -370,7 +672,7 @@ class GAOptimizer(EvolutionaryOptimizer):
             'mutateParameters': mutateParameters,
         }
 
-        super(GAOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters)
+        super(GAOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters, rng=rng)
 
 
 class MIESOptimizer(EvolutionaryOptimizer):
@@ -383,17 +685,24 @@ class MIESOptimizer(EvolutionaryOptimizer):
         :param budget:          The budget for the MIES
         :param mu:              Population size of the MIES
         :param lambda_:         Offpsring size of the MIES
-        :param population:      Initial population of candidates to be used by the MIES
+        :param population:      Initial population of candidates to be used by the MIES, either a list of
+                                :class:`~modea.Individual.MixedIntIndividual` objects or a
+                                :class:`~modea.Individual.MixedIntPopulation`. Lists are converted to the latter
         :param parameters:      Parameters object to be used by the MIES
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
     """
 
-    def __init__(self, n, mu, lambda_, population, fitnessFunction, budget, parameters=None):
+    def __init__(self, n, mu, lambda_, population, fitnessFunction, budget, parameters=None, rng=None):
         if parameters is None:
-            parameters = Parameters(n=n, budget=budget, mu=mu, lambda_=lambda_)
+            parameters = Parameters(n=n, budget=budget, mu=mu, lambda_=lambda_, rng=rng)
+        if population and not isinstance(population, MixedIntPopulation):
+            population = MixedIntPopulation.fromIndividuals(population)
 
         # We use functions here to 'hide' the additional passing of parameters that are algorithm specific
-        recombine = Rec.MIES_recombine
-        mutate = partial(Mut.MIES_Mutate, options=options, num_options=num_options_per_module)
+        recombine = partial(Rec.MIES_recombine, rng=rng)
+        mutate = partial(Mut.MIES_Mutate, options=options, num_options=num_options_per_module, rng=rng)
+        mutatePopulation = partial(Mut.MIES_MutatePopulation, options=options, num_options=num_options_per_module,
+                                   rng=rng)
         best = Sel.bestGA
 
         def select(pop, new_pop, _, params):
@@ -407,9 +716,10 @@ class MIESOptimizer(EvolutionaryOptimizer):
             'mutate': mutate,
             'select': select,
             'mutateParameters': mutateParameters,
+            'mutatePopulation': mutatePopulation,
         }
 
-        super(MIESOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters)
+        super(MIESOptimizer, self).__init__(population, fitnessFunction, budget, functions, parameters, rng=rng)
 
 
 class CustomizedES(EvolutionaryOptimizer):
@@ -424,13 +734,38 @@ class CustomizedES(EvolutionaryOptimizer):
         :param lambda_:         Number of individuals in the offspring of each generation
         :param opts:            Dictionary containing the options (elitist, active, threshold, etc) to be used
         :param values:          Dictionary containing initial values for initializing (some of) the parameters
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
+        :param quasi_table:     :class:`~modea.Sampling.QuasiRandomTable` from which the quasi-random base samplers
+                                read precomputed points. Default: None, compute all points
+        :param boundary_handling: Name of a strategy in :data:`modea.Boundary.strategies` to repair the whole
+                                population at once. Default: None, reflect each individual during mutation
+        :param worker_count:    Number of parallel evaluation workers. If given, ``lambda_`` is rounded up to a
+                                multiple of it, so every worker is busy in every generation, and mu, the weights
+                                and the learning rates follow from the larger ``lambda_``. Local restarts keep their
+                                population sizes aligned to it. A larger ``lambda_`` takes fewer generations but more
+                                evaluations to reach a target: on a 10-dimensional sphere, rounding ``lambda_`` up from
+                                10 to 16 takes about 40% more evaluations to reach 1e-8, in 15% fewer generations,
+                                while 64 takes about 2.8 times the evaluations in 2.3 times fewer generations.
+                                Default: None, do not round
+        :param pipelined_eigh:  If True, decompose C on a background thread while the next generation is evaluated,
+                                see :class:`~modea.Parameters.Parameters`. Default: False
+        :param distributed:     Address ``host:port`` on which to serve the candidates to workers started with
+                                :mod:`modea.worker`, see :class:`~EvolutionaryOptimizer`. Default: None
+        :param speculative:     Batch size W for speculative evaluation of the ``sequential`` option, see
+                                :func:`~EvolutionaryOptimizer.evalPopulationSpeculatively`. Default: None
+        :param charge_speculative: If True, surplus speculative evaluations also count against the budget.
+                                Default: False
+        :param resample_timeouts: If True, resample the individuals whose evaluation timed out in a parallel evaluator,
+                                see :class:`~EvolutionaryOptimizer`. Default: False
     """
 
     # TODO: make dynamically dependent
     bool_default_opts = ['active', 'elitist', 'mirrored', 'orthogonal', 'sequential', 'threshold', 'tpa']
     string_default_opts = ['base-sampler', 'ipop', 'selection', 'weights_option']
 
-    def __init__(self, n, fitnessFunction, budget, mu=None, lambda_=None, opts=None, values=None):
+    def __init__(self, n, fitnessFunction, budget, mu=None, lambda_=None, opts=None, values=None, rng=None,
+                 quasi_table=None, boundary_handling=None, worker_count=None, pipelined_eigh=False, distributed=None,
+                 speculative=None, charge_speculative=False, resample_timeouts=False):
 
         if opts is None:
             opts = dict()
@@ -440,54 +775,57 @@ class CustomizedES(EvolutionaryOptimizer):
         l_bound = ones((n, 1)) * -5
         u_bound = ones((n, 1)) * 5
 
-        lambda_, eff_lambda, mu = self.calculateDependencies(opts, lambda_, mu)
+        lambda_, eff_lambda, mu = self.calculateDependencies(opts, lambda_, mu, worker_count)
 
         selector = Sel.pairwise if opts['selection'] == 'pairwise' else Sel.best
         def select(pop, new_pop, _, param):
             return selector(pop, new_pop, param)
 
-        # Pick the lowest-level sampler
+        # Pick the lowest-level sampler, None meaning Gaussian samples drawn directly by the fused sampler
         if opts['base-sampler'] == 'quasi-sobol':
-            sampler = Sam.QuasiGaussianSobolSampling(n)
-        elif opts['base-sampler'] == 'quasi-halton' and Sam.halton_available:
-            sampler = Sam.QuasiGaussianHaltonSampling(n)
+            base_sampler = Sam.QuasiGaussianSobolSampling(n, rng=rng, table=quasi_table)
+        elif opts['base-sampler'] == 'quasi-halton' and (Sam.halton_available or quasi_table is not None):
+            base_sampler = Sam.QuasiGaussianHaltonSampling(n, table=quasi_table)
+        elif opts['base-sampler'] == 'structured-orthogonal':
+            base_sampler = Sam.StructuredOrthogonalSampling(n, rng=rng)
         else:
-            sampler = Sam.GaussianSampling(n)
+            base_sampler = None
 
-        # Create an orthogonal sampler using the determined base_sampler
-        if opts['orthogonal']:
-            orth_lambda = eff_lambda
-            if opts['mirrored']:
-                orth_lambda = max(orth_lambda // 2, 1)
-            sampler = Sam.OrthogonalSampling(n, lambda_=orth_lambda, base_sampler=sampler)
-
-        # Create a mirrored sampler using the sampler (structure) chosen so far
+        # Orthogonalize and/or mirror the base samples, a whole generation at a time
+        orth_lambda = eff_lambda
         if opts['mirrored']:
-            sampler = Sam.MirroredSampling(n, base_sampler=sampler)
+            orth_lambda = max(orth_lambda // 2, 1)
+        sampler = Sam.FusedSampling(n, lambda_=orth_lambda, base_sampler=base_sampler,
+                                    orthogonal=opts['orthogonal'], mirrored=opts['mirrored'],
+                                    block_size=eff_lambda, rng=rng)
 
         parameter_opts = {'n': n, 'budget': budget, 'mu': mu, 'lambda_': lambda_, 'u_bound': u_bound,
                           'l_bound': l_bound,
                           'weights_option': opts['weights_option'], 'active': opts['active'],
                           'elitist': opts['elitist'],
                           'sequential': opts['sequential'], 'tpa': opts['tpa'], 'local_restart': opts['ipop'],
-                          'values': values,
+                          'values': values, 'rng': rng, 'worker_count': worker_count,
+                          'pipelined_eigh': pipelined_eigh,
                           }
 
-        # In case of pairwise selection, sequential evaluation may only stop after 2mu instead of mu individuals
+        # In case of pairwise selection, sequential evaluation may only stop after 2mu instead of mu individuals,
+        # and only after a complete pair
         mu_int = int(1 + floor(mu * (eff_lambda - 1)))
         if opts['sequential'] and opts['selection'] == 'pairwise':
             parameter_opts['seq_cutoff'] = 2
+            parameter_opts['seq_granularity'] = 2
         population = [FloatIndividual(n) for _ in range(mu_int)]
 
         # Init all individuals of the first population at the same random point in the search space
-        wcm = (np.random.randn(n, 1) * (u_bound - l_bound)) + l_bound
+        wcm = (getRNG(rng).standard_normal((n, 1)) * (u_bound - l_bound)) + l_bound
         parameter_opts['wcm'] = wcm
         for individual in population:
             individual.genotype = copy(wcm)
 
         # We use functions/partials here to 'hide' the additional passing of parameters that are algorithm specific
         recombine = Rec.weighted
-        mutate = partial(Mut.CMAMutation, sampler=sampler, threshold_convergence=opts['threshold'])
+        mutate = partial(Mut.CMAMutation, sampler=sampler, threshold_convergence=opts['threshold'],
+                         keep_in_bounds=boundary_handling is None)
 
         functions = {
             'recombine': recombine,
@@ -496,7 +834,10 @@ class CustomizedES(EvolutionaryOptimizer):
             'mutateParameters': None
         }
 
-        super(CustomizedES, self).__init__(population, fitnessFunction, budget, functions, parameter_opts)
+        super(CustomizedES, self).__init__(population, fitnessFunction, budget, functions, parameter_opts, rng=rng,
+                                           boundary_handling=boundary_handling, distributed=distributed,
+                                           speculative=speculative, charge_speculative=charge_speculative,
+                                           resample_timeouts=resample_timeouts)
 
 
     def addDefaults(self, opts):
@@ -511,24 +852,29 @@ class CustomizedES(EvolutionaryOptimizer):
                 opts[op] = None
 
 
-    def calculateDependencies(self, opts, lambda_, mu):
+    def calculateDependencies(self, opts, lambda_, mu, worker_count=None):
         if lambda_ is None:
             lambda_ = int(4 + floor(3 * log(self.n)))
+        # The TPA probes are evaluated in the same batch as the next generation, so they count towards the workers
+        lambda_ = roundUpToMultiple(lambda_, worker_count)
         eff_lambda = lambda_
         if mu is None:
             mu = 0.5
 
         if opts['tpa']:
             if lambda_ <= 4:
-                lambda_ = 4
-                eff_lambda = 2
+                lambda_ = roundUpToMultiple(4, worker_count)
+                eff_lambda = lambda_ - 2
             else:
                 eff_lambda = lambda_ - 2
 
         if opts['selection'] == 'pairwise':
             # Explicitly force lambda_ to be even
             if lambda_ % 2 == 1:
-                lambda_ -= 1
+                if worker_count:  # Stay a multiple of the number of workers
+                    lambda_ += worker_count
+                else:
+                    lambda_ -= 1
                 if lambda_ == 0:  # If lambda_ is too low, make it be at least one pair
                     lambda_ += 2
 
@@ -545,7 +891,7 @@ class CustomizedES(EvolutionaryOptimizer):
         return lambda_, eff_lambda, mu
 
 
-def _baseAlgorithm(population, fitnessFunction, budget, functions, parameters, parallel=False):
+def _baseAlgorithm(population, fitnessFunction, budget, functions, parameters, parallel=False, rng=None):
     """
         Skeleton function for all ES algorithms
         Requires a population, fitness function handle, evaluation budget and the algorithm-specific functions
@@ -567,16 +913,17 @@ def _baseAlgorithm(population, fitnessFunction, budget, functions, parameters, p
         :param functions:       Dict with (lambda) functions 'recombine', 'mutate', 'select' and 'mutateParameters'
         :param parameters:      Parameters object for storing relevant settings
         :param parallel:        Can be set to True to enable parallel evaluation. This disables sequential evaluation
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
         :returns:               The statistics generated by running the algorithm
     """
 
-    baseAlg = EvolutionaryOptimizer(population, fitnessFunction, budget, functions, parameters, parallel)
+    baseAlg = EvolutionaryOptimizer(population, fitnessFunction, budget, functions, parameters, parallel, rng=rng)
     baseAlg.runOptimizer()
     return baseAlg.used_budget, (baseAlg.generation_size, baseAlg.sigma_over_time,
                                  baseAlg.fitness_over_time, baseAlg.best_individual)
 
 
-def _localRestartAlgorithm(fitnessFunction, budget, functions, parameter_opts, parallel=False):
+def _localRestartAlgorithm(fitnessFunction, budget, functions, parameter_opts, parallel=False, rng=None):
     """
         Run the baseAlgorithm with the given specifications using a local-restart strategy.
 
@@ -586,16 +933,17 @@ def _localRestartAlgorithm(fitnessFunction, budget, functions, parameter_opts, p
         :param parameter_opts:  Dictionary containing the all keyword options that will be used to initialize the
                                 :class:`~modea.Parameters.Parameters` object
         :param parallel:        Can be set to True to enable parallel evaluation. This disables sequential evaluation
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
         :return:                The statistics generated by running the algorithm
     """
 
     functions['mutateParameters'] = None  # None to prevent KeyError, will be set later
-    baseAlg = EvolutionaryOptimizer(None, fitnessFunction, budget, functions, parameter_opts, parallel)
+    baseAlg = EvolutionaryOptimizer(None, fitnessFunction, budget, functions, parameter_opts, parallel, rng=rng)
     baseAlg.runLocalRestartOptimizer()
     return baseAlg.generation_size, baseAlg.sigma_over_time, baseAlg.fitness_over_time, baseAlg.best_individual
 
 
-def _onePlusOneES(n, fitnessFunction, budget):
+def _onePlusOneES(n, fitnessFunction, budget, rng=None):
     """
         Implementation of the default (1+1)-ES
         Requires the length of the vector to be optimized, the handle of a fitness function to use and the budget
@@ -603,16 +951,17 @@ def _onePlusOneES(n, fitnessFunction, budget):
         :param n:               Dimensionality of the problem to be solved
         :param fitnessFunction: Function to determine the fitness of an individual
         :param budget:          Number of function evaluations allowed for this algorithm
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
         :returns:               The statistics generated by running the algorithm
     """
 
-    one_plus_one = OnePlusOneOptimizer(n, fitnessFunction, budget)
+    one_plus_one = OnePlusOneOptimizer(n, fitnessFunction, budget, rng=rng)
     one_plus_one.runOptimizer()
     return one_plus_one.generation_size, one_plus_one.sigma_over_time, \
            one_plus_one.fitness_over_time, one_plus_one.best_individual
 
 
-def _CMA_ES(n, fitnessFunction, budget, mu=None, lambda_=None, elitist=False):
+def _CMA_ES(n, fitnessFunction, budget, mu=None, lambda_=None, elitist=False, rng=None):
     """
         Implementation of a default (mu +/, lambda)-CMA-ES
         Requires the length of the vector to be optimized, the handle of a fitness function to use and the budget
@@ -623,15 +972,16 @@ def _CMA_ES(n, fitnessFunction, budget, mu=None, lambda_=None, elitist=False):
         :param mu:              Number of individuals that form the parents of each generation
         :param lambda_:         Number of individuals in the offspring of each generation
         :param elitist:         Boolean switch on using a (mu, l) strategy rather than (mu + l). Default: False
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global ``np.random`` state
         :returns:               The statistics generated by running the algorithm
     """
 
-    cma_es = CMAESOptimizer(n, fitnessFunction, budget, mu, lambda_, elitist)
+    cma_es = CMAESOptimizer(n, fitnessFunction, budget, mu, lambda_, elitist, rng=rng)
     cma_es.runOptimizer()
     return cma_es.generation_size, cma_es.sigma_over_time, cma_es.fitness_over_time, cma_es.best_individual
 
 
-def _GA(n, fitnessFunction, budget, mu, lambda_, population, parameters=None):
+def _GA(n, fitnessFunction, budget, mu, lambda_, population, parameters=None, rng=None):
     """
         Defines a Genetic Algorithm (GA) that evolves an Evolution Strategy (ES) for a given fitness function
 
@@ -642,16 +992,17 @@ def _GA(n, fitnessFunction, budget, mu, lambda_, population, parameters=None):
         :param lambda_:         Offpsring size of the GA
         :param population:      Initial population of candidates to be used by the MIES
         :param parameters:      Parameters object to be used by the GA
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
         :returns:               A tuple containing a bunch of optimization results
     """
 
-    ga = GAOptimizer(n, fitnessFunction, budget, mu, lambda_, population, parameters)
+    ga = GAOptimizer(n, fitnessFunction, budget, mu, lambda_, population, parameters, rng=rng)
     ga.runOptimizer()
     return ga.used_budget, (ga.generation_size, ga.sigma_over_time,
                             ga.fitness_over_time, ga.best_individual)
 
 
-def _MIES(n, fitnessFunction, budget, mu, lambda_, population, parameters=None):
+def _MIES(n, fitnessFunction, budget, mu, lambda_, population, parameters=None, rng=None):
     """
         Defines a Mixed-Integer Evolution Strategy (MIES) that evolves an Evolution Strategy (ES)
         for a given fitness function
@@ -663,20 +1014,26 @@ def _MIES(n, fitnessFunction, budget, mu, lambda_, population, parameters=None):
         :param lambda_:         Offpsring size of the MIES
         :param population:      Initial population of candidates to be used by the MIES
         :param parameters:      Parameters object to be used by the MIES
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
         :returns:               A tuple containing a bunch of optimization results
     """
 
-    mies = MIESOptimizer(n, fitnessFunction, budget, mu, lambda_, population, parameters)
+    mies = MIESOptimizer(n, mu, lambda_, population, fitnessFunction, budget, parameters, rng=rng)
     mies.runOptimizer()
     return mies.used_budget, (mies.generation_size, mies.sigma_over_time,
                               mies.fitness_over_time, mies.best_individual)
 
 
 def _customizedES(n, fitnessFunction, budget, mu=None, lambda_=None, opts=None, values=None,
-                  target=None, threshold=None, seed=None):
-    if seed is not None:
+                  target=None, threshold=None, seed=None, rng=None, quasi_table=None, boundary_handling=None,
+                  pipelined_eigh=False, speculative=None, charge_speculative=False):
+    if isinstance(seed, np.random.SeedSequence):
+        rng = createRNG(seed)
+    elif seed is not None:
         np.random.seed(seed)
-    custom_es = CustomizedES(n, fitnessFunction, budget, mu, lambda_, opts, values)
+    custom_es = CustomizedES(n, fitnessFunction, budget, mu, lambda_, opts, values, rng=rng, quasi_table=quasi_table,
+                             boundary_handling=boundary_handling, pipelined_eigh=pipelined_eigh,
+                             speculative=speculative, charge_speculative=charge_speculative)
 
     if opts is not None and opts['ipop']:
         custom_es.runLocalRestartOptimizer(target=target, threshold=threshold)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This module contains an asyncio-based variant of the main loop of :class:`~modea.Algorithms.EvolutionaryOptimizer`,
+for fitness functions that are coroutines, such as calls to remote simulation services. Requires Python 3.5+.
+
+The optimizer's ``fitnessFunction`` should be a coroutine function that accepts a single (flattened) genotype.
+All candidates of a generation are then evaluated concurrently, with at most ``max_concurrency`` evaluations
+running at the same time. A synchronous function can be wrapped using ``loop.run_in_executor``.
+
+For evaluation times that vary a lot between candidates, :func:`~runSteadyStateAsync` removes the barrier between
+generations altogether.
+
+Example::
+
+    async def fitness(genotype):
+        return await simulation_service.evaluate(genotype)
+
+    optimizer = CustomizedES(n, fitness, budget)
+    asyncio.get_event_loop().run_until_complete(runOptimizerAsync(optimizer, max_concurrency=8))
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__author__ = 'Sander van Rijn <svr003@gmail.com>'
+
+import asyncio
+from collections import deque
+from modea.Individual import FloatIndividual
+
+
+def _createSemaphore(max_concurrency):
+    """ Semaphore to limit the number of concurrent evaluations, or None if there is no limit """
+    return asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+
+async def _evaluate(fitnessFunction, genotype, semaphore):
+    """ Await a single evaluation, after acquiring the semaphore if given """
+    if semaphore is None:
+        return await fitnessFunction(genotype)
+    async with semaphore:
+        return await fitnessFunction(genotype)
+
+
+async def _cancelAll(tasks):
+    """
+        Cancel all given tasks and wait for them to finish
+
+        :param tasks:   List of tasks
+        :returns:       The number of tasks that had already completed successfully, and were therefore not cancelled
+    """
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return sum(1 for task in tasks if not task.cancelled() and task.exception() is None)
+
+
+async def evaluateAll(fitnessFunction, genotypes, max_concurrency=None):
+    """
+        Evaluate all genotypes concurrently. If any evaluation raises an exception, all outstanding evaluations
+        are cancelled and the exception is raised.
+
+        :param fitnessFunction: Coroutine function that accepts a single genotype and returns its fitness
+        :param genotypes:       List of genotypes to evaluate
+        :param max_concurrency: Maximum number of evaluations running at the same time. Default: None, no limit
+        :returns:               List of fitness values, in the same order as ``genotypes``
+    """
+    semaphore = _createSemaphore(max_concurrency)
+    tasks = [asyncio.ensure_future(_evaluate(fitnessFunction, genotype, semaphore)) for genotype in genotypes]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        await _cancelAll(tasks)
+        raise
+
+
+async def evalPopulationAsync(optimizer, max_concurrency=None):
+    """
+        Asynchronous variant of :func:`~modea.Algorithms.EvolutionaryOptimizer.evalPopulation`: mutate and evaluate
+        the whole new population, together with any pending TPA probes
+
+        :param optimizer:       :class:`~modea.Algorithms.EvolutionaryOptimizer` with a coroutine ``fitnessFunction``
+        :param max_concurrency: Maximum number of evaluations running at the same time. Default: None, no limit
+    """
+    penalties = optimizer.mutateNewPopulation()
+    genotypes = [ind.genotype.flatten() for ind in optimizer.new_population]
+    probes = optimizer.popTpaProbes()
+    fitnesses = await evaluateAll(optimizer.fitnessFunction, genotypes + probes, max_concurrency)
+    optimizer.assignFitnesses(fitnesses, penalties, num_probes=len(probes))
+
+
+async def evalPopulationSequentiallyAsync(optimizer, max_concurrency=None):
+    """
+        Asynchronous variant of :func:`~modea.Algorithms.EvolutionaryOptimizer.evalPopulationSequentially`.
+        All evaluations are started concurrently, but their results are processed in order. Once the sequential
+        stopping criterion is met, all outstanding evaluations are cancelled and the remaining individuals are
+        discarded. Evaluations that had already finished by then are still counted towards the used budget. No
+        evaluations are started beyond the remaining budget.
+
+        :param optimizer:       :class:`~modea.Algorithms.EvolutionaryOptimizer` with a coroutine ``fitnessFunction``
+        :param max_concurrency: Maximum number of evaluations running at the same time. Default: None, no limit
+    """
+    fitnessFunction = optimizer.fitnessFunction
+    semaphore = _createSemaphore(max_concurrency)
+    penalties = optimizer.mutateNewPopulation()
+    population = optimizer.new_population
+
+    # The TPA probes are started first, and are never cancelled
+    probes = optimizer.popTpaProbes()
+    probe_tasks = [asyncio.ensure_future(_evaluate(fitnessFunction, probe, semaphore)) for probe in probes]
+    # Candidates beyond the remaining budget would never be charged, so they are not evaluated at all
+    remaining = max(optimizer.budget - optimizer.used_budget - len(probes), 1)
+    tasks = [asyncio.ensure_future(_evaluate(fitnessFunction, ind.genotype.flatten(), semaphore))
+             for ind in population[:remaining]]
+
+    improvement_found = False
+    optimizer.gen_size = 0
+    i = -1
+    try:
+        for i, individual in enumerate(population[:len(tasks)]):
+            individual.fitness = await tasks[i]
+            if penalties is not None:
+                individual.fitness += penalties[i]
+            optimizer.used_budget += 1
+            optimizer.gen_size += 1
+
+            if optimizer.parameters.sequential:  # We interrupt once a better individual has been found
+                if individual.fitness < optimizer.best_individual.fitness:
+                    improvement_found = True
+                if i >= optimizer.seq_cutoff and improvement_found and (i+1) % optimizer.seq_granularity == 0:
+                    break
+                if optimizer.used_budget == optimizer.budget:
+                    break
+    except BaseException:
+        await _cancelAll(tasks + probe_tasks)
+        raise
+
+    already_finished = await _cancelAll(tasks[i+1:])
+    optimizer.used_budget += already_finished
+    optimizer.gen_size += already_finished
+    optimizer.new_population = population[:i+1]  # Discard unused individuals
+
+    if probe_tasks:
+        tpa_fitness_plus, tpa_fitness_min = await asyncio.gather(*probe_tasks)
+        optimizer.applyTpaResult(tpa_fitness_plus, tpa_fitness_min)
+        optimizer.used_budget += 2
+        optimizer.gen_size += 2
+
+
+async def runOneGenerationAsync(optimizer, max_concurrency=None):
+    """
+        Asynchronous variant of :func:`~modea.Algorithms.EvolutionaryOptimizer.runOneGeneration`. If sequential
+        evaluation is enabled in the optimizer's parameters, :func:`~evalPopulationSequentiallyAsync` is used, otherwise
+        :func:`~evalPopulationAsync`. The TPA probes are always evaluated together with the next generation.
+
+        :param optimizer:       :class:`~modea.Algorithms.EvolutionaryOptimizer` with a coroutine ``fitnessFunction``
+        :param max_concurrency: Maximum number of evaluations running at the same time. Default: None, no limit
+    """
+    optimizer.startGeneration()
+
+    if optimizer.parameters.sequential:
+        await evalPopulationSequentiallyAsync(optimizer, max_concurrency)
+    else:
+        await evalPopulationAsync(optimizer, max_concurrency)
+
+    optimizer.finishGeneration(batch_tpa=True)
+
+
+async def runOptimizerAsync(optimizer, target=None, threshold=1e-8, max_concurrency=None):
+    """
+        Asynchronous variant of :func:`~modea.Algorithms.EvolutionaryOptimizer.runOptimizer`
+
+        :param optimizer:       :class:`~modea.Algorithms.EvolutionaryOptimizer` with a coroutine ``fitnessFunction``
+        :param target:          Target fitness value: stop once the best fitness is within ``threshold`` of it
+        :param threshold:       Allowed distance to the target fitness value. Default: 1e-8
+        :param max_concurrency: Maximum number of evaluations running at the same time. Default: None, no limit
+    """
+    while optimizer.optimizationOngoing(target, threshold):
+        await runOneGenerationAsync(optimizer, max_concurrency)
+        optimizer.recordStatistics()
+
+
+async def runSteadyStateAsync(optimizer, num_workers, target=None, threshold=1e-8):
+    """
+        Steady-state asynchronous variant of the CMA-ES, which keeps ``num_workers`` evaluations running at all times.
+
+        Whenever an evaluation finishes, a new candidate is sampled from the *current* distribution and submitted.
+        The finished candidates are kept in a window of the ``lambda`` most recent results. Once the window is full
+        and ``mu`` new results have arrived since the last update, the regular selection, recombination and
+        :func:`~modea.Parameters.Parameters.adaptCovarianceMatrix` update are performed using the window as the
+        new population. Because candidates may have been sampled from an older mean, step size and covariance
+        matrix, the mutation vector of every candidate is recomputed from its genotype relative to the current mean
+        and step size before each update, i.e. ``y = (x - wcm) / sigma``.
+
+        Two-point step-size adaptation (TPA) and sequential evaluation are not supported in this mode.
+
+        :param optimizer:   :class:`~modea.Algorithms.EvolutionaryOptimizer` using CMA mutation, such as
+                            :class:`~modea.Algorithms.CustomizedES`, with a coroutine ``fitnessFunction``
+        :param num_workers: Number of evaluations to keep running concurrently
+        :param target:      Target fitness value: stop once the best fitness is within ``threshold`` of it
+        :param threshold:   Allowed distance to the target fitness value. Default: 1e-8
+    """
+    param = optimizer.parameters
+    if param.tpa:
+        raise ValueError("Two-point step-size adaptation is not supported in steady-state mode")
+
+    window = deque(maxlen=param.lambda_)
+    running = {}
+    num_submitted = optimizer.used_budget
+    num_new = 0
+
+    def submit():
+        individual = FloatIndividual.spawn(param.wcm, param.sigma)
+        optimizer.mutate(individual, param)
+        penalties = optimizer.handleBoundaries([individual], [param.wcm])
+        penalty = 0 if penalties is None else penalties[0]
+        task = asyncio.ensure_future(optimizer.fitnessFunction(individual.genotype.flatten()))
+        running[task] = (individual, penalty)
+
+    try:
+        while True:
+            ongoing = optimizer.optimizationOngoing(target, threshold)
+            while ongoing and len(running) < num_workers and num_submitted < optimizer.budget:
+                submit()
+                num_submitted += 1
+            if not ongoing or not running:
+                break
+
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            fitnesses = []
+            for task in done:
+                individual, penalty = running.pop(task)
+                individual.fitness = task.result() + penalty
+                fitnesses.append(individual.fitness)
+                window.append(individual)
+            optimizer.used_budget += len(done)
+            num_new += len(done)
+            param.recordRecentFitnessValues(optimizer.used_budget, fitnesses)
+
+            if len(window) == param.lambda_ and num_new >= param.mu_int:
+                # Express all steps relative to the current distribution, which may differ from the one sampled from
+                for individual in window:
+                    individual.mutation_vector = (individual.genotype - param.wcm) / param.sigma
+
+                optimizer.new_population = list(window)
+                optimizer.population = optimizer.select(optimizer.population, optimizer.new_population,
+                                                        optimizer.used_budget, param)
+                optimizer.recombine(optimizer.population, param)
+                param.updateThreshold(optimizer.used_budget)
+                optimizer.mutateParameters(optimizer.used_budget)
+
+                optimizer.gen_size = num_new
+                optimizer.recordStatistics()
+                num_new = 0
+    finally:
+        await _cancelAll(list(running))
+
+    if num_new:  # Results that arrived after the last update
+        optimizer.gen_size = num_new
+        optimizer.recordStatistics()
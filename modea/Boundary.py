@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This module contains a collection of boundary handling strategies, which repair candidate solutions that have been
+mutated outside of the search space.
+
+All strategies work in-place on a whole block of candidates at once, given as an ``(n, k)`` array with one candidate
+per column, and a lower and upper bound of shape ``(n, 1)`` or ``(n,)``. The block must be a floating point array.
+Every strategy returns either None, or an array of ``k`` penalty values to be added to the fitness of the candidates.
+
+Strategies
+==========
+* :func:`~reflect`      Mirror the out-of-bounds distance back into the search space, as in
+                        :func:`modea.Mutation._keepInBounds`
+* :func:`~clip`         Move every out-of-bounds value to the nearest bound
+* :func:`~toroidal`     Wrap around, as if the search space were periodic
+* :func:`~resample`     Draw new candidates until they are inside the search space
+* :func:`~penalty`      Clip, and penalize by the squared distance to the search space
+* :func:`~unbounded`    Do nothing at all
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__author__ = 'Sander van Rijn <svr003@gmail.com>'
+
+import numpy as np
+
+
+def _asColumn(bound, X):
+    """ Reshape a 1-D bound to a column vector, so it broadcasts over the columns of the 2-D block ``X`` """
+    bound = np.asarray(bound)
+    if bound.ndim == 1 and X.ndim == 2:
+        return bound.reshape((-1, 1))
+    return bound
+
+
+def outOfBounds(X, l_bound, u_bound):
+    """
+        Determine which candidates are not within the search space
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+        :returns:       Boolean array of length ``k``, True for every column with at least one value out of bounds
+    """
+    l_bound, u_bound = _asColumn(l_bound, X), _asColumn(u_bound, X)
+    return np.any((X < l_bound) | (X > u_bound), axis=0)
+
+
+def reflect(X, l_bound, u_bound):
+    """
+        Reflect all values back into the search space in-place. This is the transformation T^{r}_{[a,b]} from
+        Rui Li's PhD thesis "Mixed-Integer Evolution Strategies for Parameter Optimization and Their Applications to
+        Medical Image Analysis", algorithm 6.
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+    """
+    l_bound, u_bound = _asColumn(l_bound, X), _asColumn(u_bound, X)
+    width = u_bound - l_bound
+
+    np.subtract(X, l_bound, out=X)
+    np.divide(X, width, out=X)
+    floor_y = np.floor(X, out=np.empty_like(X))
+    np.subtract(X, floor_y, out=X)
+    odd = np.mod(floor_y, 2, out=floor_y) != 0
+    np.subtract(1.0, X, out=X, where=odd)
+    np.multiply(X, width, out=X)
+    np.add(X, l_bound, out=X)
+
+
+def clip(X, l_bound, u_bound):
+    """
+        Set all out-of-bounds values to the nearest bound in-place
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+    """
+    np.clip(X, _asColumn(l_bound, X), _asColumn(u_bound, X), out=X)
+
+
+def toroidal(X, l_bound, u_bound):
+    """
+        Wrap all values around into the search space in-place, i.e. ``u_bound + d`` becomes ``l_bound + d``
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+    """
+    l_bound, u_bound = _asColumn(l_bound, X), _asColumn(u_bound, X)
+    np.subtract(X, l_bound, out=X)
+    np.mod(X, u_bound - l_bound, out=X)
+    np.add(X, l_bound, out=X)
+
+
+def resample(X, l_bound, u_bound, sample=None, max_tries=100):
+    """
+        Replace all out-of-bounds candidates in-place by newly sampled ones, until all candidates are inside the
+        search space. Candidates that are still out of bounds after ``max_tries`` attempts are reflected instead.
+
+        :param X:           ``(n, k)`` block of candidates
+        :param l_bound:     Lower bound column vector
+        :param u_bound:     Upper bound column vector
+        :param sample:      Function that accepts an array of column indices, and returns an ``(n, len(indices))`` block
+                            of new candidates to replace those columns. If None, candidates are only reflected
+        :param max_tries:   Maximum number of times to resample. Default: 100
+    """
+    if sample is not None:
+        for _ in range(max_tries):
+            indices = np.flatnonzero(outOfBounds(X, l_bound, u_bound))
+            if len(indices) == 0:
+                return
+            X[:, indices] = sample(indices)
+
+    indices = np.flatnonzero(outOfBounds(X, l_bound, u_bound))
+    if len(indices) > 0:
+        remaining = X[:, indices]
+        reflect(remaining, l_bound, u_bound)
+        X[:, indices] = remaining
+
+
+def penalty(X, l_bound, u_bound):
+    """
+        Set all out-of-bounds values to the nearest bound in-place, and determine a penalty for each candidate
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+        :returns:       Array of ``k`` penalties: the squared distance of each original candidate to the search space
+    """
+    clipped = np.clip(X, _asColumn(l_bound, X), _asColumn(u_bound, X))
+    np.subtract(X, clipped, out=X)
+    penalties = np.sum(np.square(X), axis=0)
+    X[...] = clipped
+    return penalties
+
+
+def unbounded(X, l_bound, u_bound):
+    """
+        Leave all candidates as they are. Selecting this strategy also disables the default per-individual bound
+        handling during mutation, so no work at all is spent on the bounds.
+
+        :param X:       ``(n, k)`` block of candidates
+        :param l_bound: Lower bound column vector
+        :param u_bound: Upper bound column vector
+    """
+    pass
+
+
+strategies = {
+    'reflect': reflect,
+    'clip': clip,
+    'toroidal': toroidal,
+    'resample': resample,
+    'penalty': penalty,
+    'unbounded': unbounded,
+}
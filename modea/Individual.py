@@ -18,9 +18,14 @@ class FloatIndividual(object):
         Stores the genotype column vector and all individual-specific parameters.
         Default genotype is np.ones((n,1))
 
+        Attributes are stored in ``__slots__`` instead of a ``__dict__``. The ``last_z`` and ``mutation_vector``
+        column vectors are only allocated (as zeros) when they are first read before being set.
+
         :param n: dimensionality of the problem to be solved
     """
 
+    __slots__ = ('n', 'genotype', 'fitness', 'sigma', '_last_z', '_mutation_vector')
+
     def __init__(self, n):
         self.n = n
         self.genotype = np.ones((n, 1))         # Column vector
@@ -28,9 +33,48 @@ class FloatIndividual(object):
 
         self.sigma = 1
 
-        self.last_z = np.zeros((n,1))
-        self.mutation_vector = np.zeros((n,1))
+        self._last_z = None
+        self._mutation_vector = None
+
+    @property
+    def last_z(self):
+        if self._last_z is None:
+            self._last_z = np.zeros((self.n, 1))
+        return self._last_z
+
+    @last_z.setter
+    def last_z(self, value):
+        self._last_z = value
+
+    @property
+    def mutation_vector(self):
+        if self._mutation_vector is None:
+            self._mutation_vector = np.zeros((self.n, 1))
+        return self._mutation_vector
 
+    @mutation_vector.setter
+    def mutation_vector(self, value):
+        self._mutation_vector = value
+
+    @classmethod
+    def spawn(cls, genotype, sigma=1):
+        """
+            Create a lightweight FloatIndividual without allocating any arrays: the given genotype is shared instead
+            of copied, and ``last_z`` and ``mutation_vector`` are left unallocated. Intended for offspring that are
+            mutated right away, which replaces these arrays instead of writing into them.
+
+            :param genotype:    Column vector to use as genotype, e.g. the weighted center of mass. Not copied
+            :param sigma:       Initial value for sigma. Default: 1
+            :returns:           FloatIndividual object that shares its genotype
+        """
+        individual = cls.__new__(cls)
+        individual.n = len(genotype)
+        individual.genotype = genotype
+        individual.fitness = np.inf
+        individual.sigma = sigma
+        individual._last_z = None
+        individual._mutation_vector = None
+        return individual
 
     def __copy__(self):
         """
@@ -38,15 +82,18 @@ class FloatIndividual(object):
             >>> import copy
             >>> copy.copy(FloatIndividual())
 
+            Skips the default initialization, and only copies ``last_z`` and ``mutation_vector`` if allocated.
+
             :returns:  FloatIndividual object with all attributes explicitly copied
         """
-        return_copy = FloatIndividual(self.n)
+        return_copy = FloatIndividual.__new__(FloatIndividual)
+        return_copy.n = self.n
         return_copy.genotype = copy(self.genotype)
         return_copy.fitness = self.fitness
         return_copy.sigma = self.sigma
 
-        return_copy.last_z = copy(self.last_z)
-        return_copy.mutation_vector = copy(self.mutation_vector)
+        return_copy._last_z = None if self._last_z is None else copy(self._last_z)
+        return_copy._mutation_vector = None if self._mutation_vector is None else copy(self._mutation_vector)
 
         return return_copy
 
@@ -70,6 +117,8 @@ class MixedIntIndividual(object):
         Stores the genotype column vector and all individual-specific parameters.
         Default genotype is np.ones((n,1))
 
+        Attributes are stored in ``__slots__`` instead of a ``__dict__``.
+
         :param n:            Dimensionality of the problem to be solved, consisting of discrete, integers and
                              floating point values
         :param num_discrete: Number of discrete values in the genotype.
@@ -77,6 +126,9 @@ class MixedIntIndividual(object):
         :param num_floats:   Number of floating point values in the genotype.
     """
 
+    __slots__ = ('n', 'num_discrete', 'num_ints', 'num_floats', 'genotype', 'fitness', 'sigma',
+                 'stepSizeOffsetMIES', 'stepSizeOffset', 'maxStepSize', 'initStepSize', 'baseStepSize')
+
     def __init__(self, n, num_discrete, num_ints, num_floats=None):
 
         if n < 2:
@@ -91,7 +143,6 @@ class MixedIntIndividual(object):
         self.genotype = np.ones((n, 1))                                       # Column vector
         self.fitness = np.inf                                                 # Default 'unset' value
         self.sigma = 1
-        self.stepSizeOffsetMIES = np.ones(n)
         # Self-adaptive step size parameters
         self.maxStepSize = 0.5
         self.initStepSize = 0.2
@@ -101,9 +152,9 @@ class MixedIntIndividual(object):
         else:
             self.baseStepSize = 0.175  # Random guess value, may need to be updated
 
-        for x in range(self.n):
-            # self.baseStepSizeMIES[x] = 1/(3 * num_options[x])
-            self.stepSizeOffsetMIES[x] = self.initStepSize - self.baseStepSize
+        # self.baseStepSizeMIES[x] = 1/(3 * num_options[x])
+        self.stepSizeOffsetMIES = np.full(n, self.initStepSize - self.baseStepSize)
+        self.stepSizeOffset = self.initStepSize - self.baseStepSize  # Single offset used by the GA mutations
 
 
     @property
@@ -116,9 +167,15 @@ class MixedIntIndividual(object):
             >>> import copy
             >>> copy.copy(MixedIntIndividual())
 
+            Skips the default initialization.
+
             :returns:  Individual object with all attributes explicitly copied
         """
-        return_copy = MixedIntIndividual(self.n, self.num_discrete, self.num_ints)
+        return_copy = MixedIntIndividual.__new__(MixedIntIndividual)
+        return_copy.n = self.n
+        return_copy.num_discrete = self.num_discrete
+        return_copy.num_ints = self.num_ints
+        return_copy.num_floats = self.num_floats
         return_copy.genotype = copy(self.genotype)
         return_copy.fitness = self.fitness
         return_copy.sigma = self.sigma
@@ -126,5 +183,231 @@ class MixedIntIndividual(object):
         return_copy.maxStepSize = self.maxStepSize
         return_copy.baseStepSize = self.baseStepSize
         return_copy.initStepSize = self.initStepSize
-        return_copy.stepSizeOffsetMIES=copy(self.stepSizeOffsetMIES)
+        return_copy.stepSizeOffsetMIES = copy(self.stepSizeOffsetMIES)
+        return_copy.stepSizeOffset = self.stepSizeOffset
         return return_copy
+
+
+class MixedIntPopulation(object):
+    """
+        Array-backed population of mixed-integer individuals. Instead of a separate :class:`~MixedIntIndividual`
+        object per individual, the discrete, integer and floating point parts of all genotypes are stored as one
+        ``int8``, ``int32`` and ``float64`` matrix each, with a row per individual. The MIES step size offsets and
+        fitness values are stored per row as well.
+
+        Indexing with an integer returns a :class:`~MixedIntMember` view on that row, which can be used as if it
+        were a :class:`~MixedIntIndividual`. Indexing with a slice or :func:`~take` returns a new population.
+
+        :param size:         Number of individuals in the population
+        :param n:            Dimensionality of the problem to be solved, consisting of discrete, integers and
+                             floating point values
+        :param num_discrete: Number of discrete values in the genotype.
+        :param num_ints:     Number of integer values in the genotype.
+        :param num_floats:   Number of floating point values in the genotype.
+    """
+
+    def __init__(self, size, n, num_discrete, num_ints, num_floats=None):
+
+        if n < 2:
+            raise MixedIntIndividualError("Cannot define a mixed-integer representation in < 2 dimensions")
+        if num_floats is None and num_discrete is None and num_ints is None:
+            raise MixedIntIndividualError("Number of discrete, integer or floating point values not specified")
+
+        self.size = size
+        self.n = n
+        self.num_discrete = num_discrete
+        self.num_ints = num_ints
+        self.num_floats = n - (num_discrete + num_ints)
+
+        self.discrete = np.ones((size, self.num_discrete), dtype=np.int8)
+        self.ints = np.ones((size, self.num_ints), dtype=np.int32)
+        self.floats = np.ones((size, self.num_floats), dtype=np.float64)
+        self.fitness = np.full(size, np.inf, dtype=object)            # Object array, as fitness may be an ESFitness
+        self.sigma = np.ones(size)
+
+        # Self-adaptive step size parameters, shared by all individuals
+        self.maxStepSize = 0.5
+        self.initStepSize = 0.2
+        if n > 5:
+            self.baseStepSize = 1 / n
+        else:
+            self.baseStepSize = 0.175  # Random guess value, may need to be updated
+        self.stepSizeOffsetMIES = np.full((size, n), self.initStepSize - self.baseStepSize)
+
+    @classmethod
+    def fromIndividuals(cls, individuals):
+        """
+            Create a population from a list of :class:`~MixedIntIndividual` objects
+
+            :param individuals: Non-empty list of :class:`~MixedIntIndividual` objects with the same representation
+            :returns:           A new :class:`~MixedIntPopulation` with a copy of the values of all individuals
+        """
+        first = individuals[0]
+        population = cls(len(individuals), first.n, first.num_discrete, first.num_ints)
+        population.baseStepSize = first.baseStepSize
+        population.maxStepSize = first.maxStepSize
+        population.initStepSize = first.initStepSize
+        population.genotypes = np.vstack([ind.genotype.reshape((1, -1)) for ind in individuals])
+        population.stepSizeOffsetMIES[:] = np.vstack([ind.stepSizeOffsetMIES for ind in individuals])
+        population.fitness[:] = [ind.fitness for ind in individuals]
+        population.sigma[:] = [ind.sigma for ind in individuals]
+        return population
+
+    @property
+    def genotypes(self):
+        """ ``(size, n)`` float matrix of all genotypes. Assign to this property to update all genotypes at once """
+        return np.hstack((self.discrete, self.ints, self.floats)).astype(np.float64)
+
+    @genotypes.setter
+    def genotypes(self, values):
+        values = np.asarray(values)
+        self.discrete[:] = values[:, :self.num_discrete]
+        self.ints[:] = values[:, self.num_discrete:self.num_discrete+self.num_ints]
+        self.floats[:] = values[:, self.num_discrete+self.num_ints:]
+
+    @property
+    def stepsizeMIES(self):
+        return self.stepSizeOffsetMIES + self.baseStepSize
+
+    def take(self, indices):
+        """
+            Select (and possibly repeat) individuals by index
+
+            :param indices: Sequence of row indices
+            :returns:       A new :class:`~MixedIntPopulation` containing a copy of the selected rows, in order
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        population = copy(self)
+        population.size = len(indices)
+        population.discrete = self.discrete[indices]
+        population.ints = self.ints[indices]
+        population.floats = self.floats[indices]
+        population.fitness = self.fitness[indices]
+        population.sigma = self.sigma[indices]
+        population.stepSizeOffsetMIES = self.stepSizeOffsetMIES[indices]
+        return population
+
+    def concatenate(self, other):
+        """
+            :param other:   Another :class:`~MixedIntPopulation` with the same representation
+            :returns:       A new :class:`~MixedIntPopulation` containing the rows of this population followed by
+                            those of ``other``
+        """
+        population = copy(self)
+        population.size = self.size + other.size
+        population.discrete = np.vstack((self.discrete, other.discrete))
+        population.ints = np.vstack((self.ints, other.ints))
+        population.floats = np.vstack((self.floats, other.floats))
+        population.fitness = np.concatenate((self.fitness, other.fitness))
+        population.sigma = np.concatenate((self.sigma, other.sigma))
+        population.stepSizeOffsetMIES = np.vstack((self.stepSizeOffsetMIES, other.stepSizeOffsetMIES))
+        return population
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self.size)[index])
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("Index {} out of range for population of size {}".format(index, self.size))
+        return MixedIntMember(self, index)
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield MixedIntMember(self, index)
+
+    def __repr__(self):
+        return "<MixedIntPopulation [{} x {}]>".format(self.size, self.n)
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class MixedIntMember(object):
+    """
+        View on a single row of a :class:`~MixedIntPopulation`, offering the interface of a
+        :class:`~MixedIntIndividual`. Note that ``genotype`` returns a copy: changes only take effect when
+        (part of) the genotype is assigned back, e.g. ``member.genotype = new_genotype``.
+
+        :param population:  The :class:`~MixedIntPopulation` this member is part of
+        :param index:       Row index of this member in the population
+    """
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    n = property(lambda self: self.population.n)
+    num_discrete = property(lambda self: self.population.num_discrete)
+    num_ints = property(lambda self: self.population.num_ints)
+    num_floats = property(lambda self: self.population.num_floats)
+    baseStepSize = property(lambda self: self.population.baseStepSize)
+    maxStepSize = property(lambda self: self.population.maxStepSize)
+    initStepSize = property(lambda self: self.population.initStepSize)
+
+    @property
+    def genotype(self):
+        pop, i = self.population, self.index
+        return np.hstack((pop.discrete[i], pop.ints[i], pop.floats[i])).astype(np.float64).reshape((-1, 1))
+
+    @genotype.setter
+    def genotype(self, value):
+        pop, i = self.population, self.index
+        value = np.asarray(value).flatten()
+        pop.discrete[i] = value[:pop.num_discrete]
+        pop.ints[i] = value[pop.num_discrete:pop.num_discrete+pop.num_ints]
+        pop.floats[i] = value[pop.num_discrete+pop.num_ints:]
+
+    @property
+    def fitness(self):
+        return self.population.fitness[self.index]
+
+    @fitness.setter
+    def fitness(self, value):
+        self.population.fitness[self.index] = value
+
+    @property
+    def sigma(self):
+        return self.population.sigma[self.index]
+
+    @sigma.setter
+    def sigma(self, value):
+        self.population.sigma[self.index] = value
+
+    @property
+    def stepSizeOffsetMIES(self):
+        return self.population.stepSizeOffsetMIES[self.index]  # View, so in-place changes are kept
+
+    @stepSizeOffsetMIES.setter
+    def stepSizeOffsetMIES(self, value):
+        self.population.stepSizeOffsetMIES[self.index] = value
+
+    @property
+    def stepsizeMIES(self):
+        return self.stepSizeOffsetMIES + self.baseStepSize
+
+    def __copy__(self):
+        """
+            Return a new, independent :class:`~MixedIntIndividual` with the values of this member
+
+            :returns:  MixedIntIndividual object with all attributes explicitly copied
+        """
+        return_copy = MixedIntIndividual(self.n, self.num_discrete, self.num_ints)
+        return_copy.genotype = self.genotype
+        return_copy.fitness = self.fitness
+        return_copy.sigma = self.sigma
+
+        return_copy.maxStepSize = self.maxStepSize
+        return_copy.baseStepSize = self.baseStepSize
+        return_copy.initStepSize = self.initStepSize
+        return_copy.stepSizeOffsetMIES = copy(self.stepSizeOffsetMIES)
+        return return_copy
+
+    def __repr__(self):
+        return "<MixedIntMember {} of {}>".format(self.index, self.population)
+
+    def __str__(self):
+        return self.__repr__()
@@ -11,10 +11,14 @@ __author__ = 'Sander van Rijn <svr003@gmail.com>'
 
 import numpy as np
 import random
-from numpy import add, bitwise_and, dot, exp, floor, mod, shape, zeros
+from copy import copy
+from numpy import add, bitwise_and, dot, exp, floor, shape
 from numpy.linalg import norm
 from random import gauss
 from math import sqrt
+from modea.Boundary import reflect
+from modea.Individual import MixedIntMember, MixedIntPopulation
+from modea.Utils import getRNG, randomIntegers
 
 
 '''-----------------------------------------------------------------------------
@@ -35,31 +39,40 @@ def _keepInBounds(x, l_bound, u_bound):
         :param u_bound: Upper bound column vector
         :returns:       An in-bounds kept version of the column vector ``x``
     """
+    x, l_bound, u_bound = np.broadcast_arrays(x, l_bound, u_bound)
+    x = np.array(x, dtype=np.float64)  # Copy, as reflect works in-place
+    reflect(x, l_bound, u_bound)
+    return x
 
-    y = (x - l_bound) / (u_bound - l_bound)
-    floor_y = floor(y)                              # Local storage to prevent double calls
-    I = mod(floor_y, 2) == 0
-    yprime = zeros(shape(y))
-    yprime[I] = np.abs(y[I] - floor_y[I])
-    yprime[~I] = 1.0 - np.abs(y[~I] - floor_y[~I])
 
-    x = l_bound + (u_bound - l_bound) * yprime
-    return x
+def _gauss(mu, sigma, rng=None):
+    """
+        Draw a single value from a Gaussian distribution, using Python's ``random`` module by default
+
+        :param mu:      Mean of the distribution
+        :param sigma:   Standard deviation of the distribution
+        :param rng:     ``np.random.Generator`` to draw from instead of Python's ``random`` module
+        :returns:       A single float
+    """
+    if rng is None:
+        return gauss(mu, sigma)
+    return rng.normal(mu, sigma)
 
 
-def adaptStepSize(individual):
+def adaptStepSize(individual, rng=None):
     """
         Given the current individual, randomly determine a new step size offset
         that can be no greater than maxStepSize - baseStepSize
 
         :param individual:  The :class:`~modea.Individual.FloatIndividual` object whose step size should be adapted
+        :param rng:         ``np.random.Generator`` to draw from. Default: Python's ``random`` module
     """
     # Empirically determined, see paper
     gamma = 0.22
 
     offset = individual.stepSizeOffset
     offset = 1 + ((1 - offset) / offset)
-    offset = 1 / (offset * exp(gamma * gauss(0, 1)))
+    offset = 1 / (offset * exp(gamma * _gauss(0, 1, rng)))
     individual.stepSizeOffset = min(offset, (individual.maxStepSize - individual.baseStepSize))
 
 
@@ -100,12 +113,15 @@ def _adaptSigma(sigma, p_s, c=0.817):
     return sigma
 
 
-def _getXi():
+def _getXi(rng=None):
     """
         Randomly returns 5/7 or 7/5 with equal probability
+        :param rng: Random state to draw from, as returned by :func:`~modea.Utils.getRNG`.
+                    Default: Python's ``random`` module
         :return: float Xi
     """
-    if bool(random.getrandbits(1)):
+    bit = random.getrandbits(1) if rng is None else randomIntegers(rng, 0, 2)
+    if bool(bit):
         return 5/7
     else:
         return 7/5
@@ -124,10 +140,10 @@ def addRandomOffset(individual, param, sampler):
         :param param:       :class:`~modea.Parameters.Parameters` object to store settings
         :param sampler:     :mod:`~modea.Sampling` module from which the random values should be drawn
     """
-    individual.genotype += param.sigma * sampler.next()
+    individual.genotype = individual.genotype + param.sigma * sampler.next()  # Not in-place: may be shared
 
 
-def CMAMutation(individual, param, sampler, threshold_convergence=False):
+def CMAMutation(individual, param, sampler, threshold_convergence=False, keep_in_bounds=True):
     """
         CMA mutation: x = x + (sigma * B*D*N(0,I))
 
@@ -135,6 +151,9 @@ def CMAMutation(individual, param, sampler, threshold_convergence=False):
         :param param:                   :class:`~modea.Parameters.Parameters` object to store settings
         :param sampler:                 :mod:`~modea.Sampling` module from which the random values should be drawn
         :param threshold_convergence:   Boolean: Should threshold convergence be applied. Default: False
+        :param keep_in_bounds:          Boolean: Should the result be reflected back into the search space. Set to
+                                        False when bounds are handled per population using :mod:`~modea.Boundary`.
+                                        Default: True
     """
 
     individual.last_z = sampler.next()
@@ -145,7 +164,10 @@ def CMAMutation(individual, param, sampler, threshold_convergence=False):
     individual.mutation_vector = dot(param.B, (param.D * individual.last_z))  # y_k in cmatutorial.pdf)
     mutation_vector = individual.mutation_vector * param.sigma
 
-    individual.genotype = _keepInBounds(add(individual.genotype, mutation_vector), param.l_bound, param.u_bound)
+    if keep_in_bounds:
+        individual.genotype = _keepInBounds(add(individual.genotype, mutation_vector), param.l_bound, param.u_bound)
+    else:
+        individual.genotype = add(individual.genotype, mutation_vector)
 
 
 '''-----------------------------------------------------------------------------
@@ -153,21 +175,34 @@ def CMAMutation(individual, param, sampler, threshold_convergence=False):
 -----------------------------------------------------------------------------'''
 
 
-def mutateBitstring(individual):
+def mutateBitstring(individual, rng=None):
     """
         Simple 1/n bit-flip mutation
 
         :param individual:  :mod:`~modea.Individual` with a bit-string as genotype to undergo p=1/n mutation
+        :param rng:         Random state to draw from. Default: the global ``np.random`` state
     """
+    rng = getRNG(rng)
     bitstring = individual.genotype
     n = len(bitstring)
-    p = 1/n
-    for i in range(n):
-        if np.random.random() < p:
-            bitstring[i] = 1-bitstring[i]
+    flips = np.flatnonzero(rng.random(n) < 1/n)  # Same draws as one rng.random() per bit
+    for i in flips:
+        bitstring[i] = 1-bitstring[i]
+
 
+def mutateBitstringPopulation(genotypes, rng=None):
+    """
+        Simple 1/n bit-flip mutation, applied to a whole population at once
 
-def mutateIntList(individual, param, num_options_per_module):
+        :param genotypes:   ``(lambda, n)`` array of bit-strings, one per row, mutated in-place with p=1/n per bit
+        :param rng:         Random state to draw from. Default: the global ``np.random`` state
+    """
+    rng = getRNG(rng)
+    flips = rng.random(genotypes.shape) < 1/genotypes.shape[1]
+    genotypes[flips] = 1 - genotypes[flips]
+
+
+def mutateIntList(individual, param, num_options_per_module, rng=None):
     """
         Self-adaptive random integer mutation to mutate the structure of an ES
 
@@ -175,56 +210,108 @@ def mutateIntList(individual, param, num_options_per_module):
         :param param:                   :class:`~modea.Parameters.Parameters` object
         :param num_options_per_module:  List :data:`~modea.num_options` with the number of available modules per module
                                         position that are available to choose from
+        :param rng:                     Random state to draw from. Default: the global ``np.random`` state
     """
-
+    shape = np.shape(individual.genotype)
+    genotypes = np.array(individual.genotype).reshape((1, -1))
     p = individual.baseStepSize + individual.stepSizeOffset
-    num_ints = individual.num_ints
+    mutateIntListPopulation(genotypes, p, param, num_options_per_module, individual.num_ints, rng=rng)
+    individual.genotype = genotypes.reshape(shape)
+
+
+def mutateIntListPopulation(genotypes, step_sizes, param, num_options_per_module, num_ints, rng=None):
+    """
+        Self-adaptive random integer mutation to mutate the structure of an ES, applied to a whole population at once.
+        Each genotype starts with a value per module, followed by the population size lambda at index ``num_ints-1``.
+
+        :param genotypes:               ``(lambda, n)`` array with a genotype per row, mutated in-place
+        :param step_sizes:              Mutation probability per individual, as array of shape ``(lambda,)`` or scalar
+        :param param:                   :class:`~modea.Parameters.Parameters` object
+        :param num_options_per_module:  List :data:`~modea.num_options` with the number of available modules per module
+                                        position that are available to choose from
+        :param num_ints:                Number of integer values at the start of each genotype
+        :param rng:                     Random state to draw from. Default: the global ``np.random`` state
+    """
+    rng = getRNG(rng)
+    lambda_ = genotypes.shape[0]
+    num_opts = np.array(num_options_per_module)
+    p = np.reshape(step_sizes, (-1, 1)) * np.ones((lambda_, 1))
+
+    int_part = genotypes[:, :len(num_opts)]
+    mutate_mask = (rng.random(int_part.shape) < p) & (num_opts > 1)
+    # Choose from all but the last value. If we randomly selected the current value, pick the value we left out
+    new_ints = randomIntegers(rng, 0, np.maximum(num_opts - 1, 1), size=int_part.shape)
+    new_ints = np.where(new_ints == int_part, num_opts - 1, new_ints)
+    int_part[mutate_mask] = new_ints[mutate_mask]
+
+    l_bound = np.ravel(param.l_bound)[num_ints-1]
+    u_bound = np.ravel(param.u_bound)[num_ints-1]
+    lambda_mask = rng.random(lambda_) < p[:, 0]
+    new_lambdas = randomIntegers(rng, l_bound, u_bound+1, size=lambda_)
+    genotypes[lambda_mask, num_ints-1] = new_lambdas[lambda_mask]
+
+
+def _conditionalMask(module_values, options, num_floats):
+    """
+        Determine which floating point values should be mutated: those of the active modules, plus the leading ones
+        that are not associated with any module, i.e. the default CMA-ES parameters, which are always used
 
-    int_list = individual.genotype[:num_ints-1]  # Get the relevant slice
-    for i, val in enumerate(num_options_per_module):
-        if np.random.random() < p:
-            # -1 as random_integers is [1, val], -1 to simulate leaving out the current value
-            new_int = np.random.random_integers(val-1)-1
-            if int_list[i] == new_int:
-                new_int = val - 1  # If we randomly selected the same value, pick the value we left out
+        :param module_values:   ``(lambda, k)`` array with the chosen option per module, for the first ``k`` modules
+        :param options:         List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param num_floats:      Number of floating point values per genotype
+        :returns:               ``(lambda, num_floats)`` boolean mask
+    """
+    lambda_, k = module_values.shape
+    num_params = [opt[2] for opt in options[:k]]
+    num_always_used = _numAlwaysUsedFloats(options[:k], num_floats)
+    return np.hstack([np.ones((lambda_, num_always_used), dtype=bool),
+                      np.repeat(module_values != 0, num_params, axis=1)])
 
-            int_list[i] = new_int
 
-    if np.random.random() < p:
-        new_lambda = np.random.random_integers(param.l_bound[num_ints-1], param.u_bound[num_ints-1])
-        individual.genotype[num_ints-1] = new_lambda
+def _numAlwaysUsedFloats(options, num_floats):
+    """
+        :param options:     List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param num_floats:  Number of floating point values per genotype
+        :returns:           Number of leading floats that do not belong to any module
+    """
+    num_always_used = num_floats - sum(opt[2] for opt in options)
+    if num_always_used < 0:
+        raise ValueError("{} floating point values cannot hold the {} parameters of the given modules"
+                         .format(num_floats, num_floats - num_always_used))
+    return num_always_used
 
 
-def mutateFloatList(individual, param, options):
+def mutateFloatList(individual, param, options, rng=None):
     """
         Self-adaptive, uniformly random floating point mutation on the tunable parameters of an ES
 
         :param individual:  :class:`~modea.Individual.MixedIntegerIndividual` whose integer-part will be mutated
         :param param:       :class:`~modea.Parameters.Parameters` object
         :param options:     List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param rng:         Random state to draw from. Default: the global ``np.random`` state
     """
+    rng = getRNG(rng)
 
     # Setup of values
     p = individual.baseStepSize + individual.stepSizeOffset
     float_part = individual.genotype[individual.num_ints:]
     int_part = individual.genotype[:individual.num_ints-1]
-    l_bound = param.l_bound[individual.num_ints:].flatten()
-    u_bound = param.u_bound[individual.num_ints:].flatten()
+    l_bound = np.reshape(param.l_bound[individual.num_ints:], float_part.shape)
+    u_bound = np.reshape(param.u_bound[individual.num_ints:], float_part.shape)
     search_space = u_bound - l_bound
 
     # Create the mask: which float values will actually be mutated?
-    cond_mask = [True,True,True,True,True,True,True]  # TODO FIXME: these are default CMA parameters, make this dynamic!
-    for i, val in enumerate(options):
-        cond_mask.extend([bool(int_part[i] * 1)] * val[2])
-    mutate_mask =np.random.random_sample(float_part.shape) < p
+    module_values = np.reshape(int_part, (1, -1))[:, :len(options)]
+    cond_mask = _conditionalMask(module_values, options, float_part.size).reshape(float_part.shape)
+    mutate_mask = rng.random(float_part.shape) < p
     combined_mask = bitwise_and(cond_mask, mutate_mask)
 
     # Scale the random values to the search space, then start at the lower bound
-    float_part[combined_mask] =np.random.random_sample(float_part.shape)[combined_mask] * search_space[combined_mask]
+    float_part[combined_mask] = rng.random(float_part.shape)[combined_mask] * search_space[combined_mask]
     float_part[combined_mask] += l_bound[combined_mask]
 
 
-def mutateMixedInteger(individual, param, options, num_options_per_module):
+def mutateMixedInteger(individual, param, options, num_options_per_module, rng=None):
     """
         Self-adaptive mixed-integer mutation of the structure of an ES
 
@@ -233,10 +320,11 @@ def mutateMixedInteger(individual, param, options, num_options_per_module):
         :param options:                 List of tuples :data:`~modea.options` with the number of tunable parameters per module
         :param num_options_per_module:  List :data:`~modea.num_options` with the number of available modules per module position
                                         that are available to choose from
+        :param rng:                     ``np.random.Generator`` to draw from. Default: the global random states
     """
-    adaptStepSize(individual)
-    mutateIntList(individual, param, num_options_per_module)
-    mutateFloatList(individual, param, options)
+    adaptStepSize(individual, rng=rng)
+    mutateIntList(individual, param, num_options_per_module, rng=rng)
+    mutateFloatList(individual, param, options, rng=rng)
 
 
 '''-----------------------------------------------------------------------------
@@ -244,7 +332,7 @@ def mutateMixedInteger(individual, param, options, num_options_per_module):
 -----------------------------------------------------------------------------'''
 
 
-def MIES_MutateDiscrete(individual, begin, end, u, num_options, options):
+def MIES_MutateDiscrete(individual, begin, end, u, num_options, options, rng=None):
     """
         Mutate the discrete part of a Mixed-Integer representation
 
@@ -255,10 +343,12 @@ def MIES_MutateDiscrete(individual, begin, end, u, num_options, options):
         :param num_options:     List :data:`~modea.num_options` with the number of available modules per module position
                                 that are available to choose from
         :param options:         List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
         :return:                A boolean mask array to be used for further conditional mutations based on which modules
                                 are active
     """
-    conditional_mask = [True,True,True,True,True,True,True]
+    np_rng = getRNG(rng)
+    conditional_mask = [True] * _numAlwaysUsedFloats(options[begin:end], individual.num_floats)
     for x in range(begin, end):
         if individual.genotype[x] is not None:
 
@@ -267,26 +357,26 @@ def MIES_MutateDiscrete(individual, begin, end, u, num_options, options):
             tau_prime = 1 / sqrt(2 * sqrt(individual.num_discrete))
             individual.stepSizeOffsetMIES[x] = 1 / (
                 1 + ((1 - individual.stepSizeOffsetMIES[x]) / individual.stepSizeOffsetMIES[x]) * exp(
-                    (-tau) * u - tau_prime * gauss(0.5, 1)))
+                    (-tau) * u - tau_prime * _gauss(0.5, 1, rng)))
             # Keep stepsize within the bounds
             baseMIESstep = 1 / (3 * num_options[x])  # p'_i = T[ 1 / (3n_d) , 0.5]
             individual.stepSizeOffsetMIES[x] = _keepInBounds(individual.stepSizeOffsetMIES[x], baseMIESstep, 0.5)
 
-            threshold = np.random.random_sample()
+            threshold = np_rng.random()
             # change discrete
-            if threshold < individual.stepSizeMIES(x):
+            if threshold < individual.stepsizeMIES[x]:
                 temparray = []
                 for i in range(num_options[x]):
                     temparray.append(i)
                 temparray.remove(individual.genotype[x])
-                individual.genotype[x] = random.choice(temparray)
+                individual.genotype[x] = random.choice(temparray) if rng is None else rng.choice(temparray)
             for i in range(options[x][2]):
                 conditional_mask.append(individual.genotype[x])
 
     return conditional_mask
 
 
-def MIES_MutateIntegers(individual, begin, end, u, param):
+def MIES_MutateIntegers(individual, begin, end, u, param, rng=None):
     """
         Mutate the integer part of a Mixed-Integer representation
 
@@ -295,19 +385,21 @@ def MIES_MutateIntegers(individual, begin, end, u, param):
         :param end:             End index of the integer part of the individual's representation
         :param u:               A pre-determined random value from a Gaussian distribution
         :param param:           :class:`~modea.Parameters.Parameters` object
+        :param rng:             ``np.random.Generator`` to draw from. Default: the global random states
     """
+    np_rng = getRNG(rng)
     for x in range(begin, end):
         if individual.genotype[x] is not None:
             # Adapt stepsize
             tau = 1 / sqrt(2 * individual.num_ints)
             tau_prime = 1 / sqrt(2 * sqrt(individual.num_ints))
             individual.stepSizeOffsetMIES[x] = max(1,
-                                                   individual.stepSizeOffsetMIES[x] * exp(tau * u + tau_prime * gauss(0.5, 1)))
+                                                   individual.stepSizeOffsetMIES[x] * exp(tau * u + tau_prime * _gauss(0.5, 1, rng)))
 
             # Mudate integer
-            psi = 1 - (individual.stepSizeMIES(x) / individual.num_ints) / (
-                1 + sqrt(1 + pow(individual.stepSizeMIES(x) / individual.num_ints, 2)))
-            u1, u2 = np.random.random_sample(2)
+            psi = 1 - (individual.stepsizeMIES[x] / individual.num_ints) / (
+                1 + sqrt(1 + pow(individual.stepsizeMIES[x] / individual.num_ints, 2)))
+            u1, u2 = np_rng.random(2)
             G1 = int(floor(np.log(1 - u1) / np.log(1 - psi)))
             G2 = int(floor(np.log(1 - u2) / np.log(1 - psi)))
             individual.genotype[x] = individual.genotype[x] + G1 - G2
@@ -315,7 +407,7 @@ def MIES_MutateIntegers(individual, begin, end, u, param):
             individual.genotype[x] = int(_keepInBounds(individual.genotype[x], param.l_bound[x], param.u_bound[x]))
 
 
-def MIES_MutateFloats(conditional_mask, individual, begin, end, u, param):
+def MIES_MutateFloats(conditional_mask, individual, begin, end, u, param, rng=None):
     """
         Mutate the floating point part of a Mixed-Integer representation
 
@@ -325,18 +417,20 @@ def MIES_MutateFloats(conditional_mask, individual, begin, end, u, param):
         :param end:                 End index of the integer part of the individual's representation
         :param u:                   A pre-determined random value from a Gaussian distribution
         :param param:               :class:`~modea.Parameters.Parameters` object
+        :param rng:                 ``np.random.Generator`` to draw from. Default: the global random states
     """
+    np_rng = getRNG(rng)
     for x in range(begin, end):
         if individual.genotype[x] is not None and conditional_mask[x-(individual.num_discrete+individual.num_ints)]:
             # Adapt stepsize
             tau = 1 / sqrt(2 * individual.num_floats)
             tau_prime = 1 / sqrt(2 * sqrt(individual.num_floats))
-            individual.stepSizeOffsetMIES[x] = individual.stepSizeOffsetMIES[x] * exp(u * tau + gauss(0.5, 1) * tau_prime)
+            individual.stepSizeOffsetMIES[x] = individual.stepSizeOffsetMIES[x] * exp(u * tau + _gauss(0.5, 1, rng) * tau_prime)
 
             # Mutate float
-            rand = np.random.randn()
-            old_value = individual.genotype[x]
-            individual.genotype[x] += individual.stepSizeMIES(x) * rand
+            rand = np_rng.standard_normal()
+            old_value = float(individual.genotype[x])
+            individual.genotype[x] += individual.stepsizeMIES[x] * rand
             individual.genotype[x] = _keepInBounds(individual.genotype[x], param.l_bound[x], param.u_bound[x])
 
             # Reverse-engineer the actual stepsize based on the final mutation step
@@ -344,7 +438,7 @@ def MIES_MutateFloats(conditional_mask, individual, begin, end, u, param):
             individual.stepSizeOffsetMIES[x] = actual_stepsize - individual.baseStepSize
 
 
-def MIES_Mutate(individual, param, options, num_options):
+def MIES_Mutate(individual, param, options, num_options, rng=None):
     """
         Self-adaptive mixed-integer mutation of the structure of an ES
 
@@ -353,10 +447,139 @@ def MIES_Mutate(individual, param, options, num_options):
         :param options:     List of tuples :data:`~modea.options` with the number of tunable parameters per module
         :param num_options: List :data:`~modea.num_options` with the number of available modules per module position
                             that are available to choose from
+        :param rng:         ``np.random.Generator`` to draw from. Default: the global random states
     """
+    if isinstance(individual, MixedIntMember):
+        # A member's genotype is an assembled copy, so mutate a standalone individual and write the result back
+        member, individual = individual, copy(individual)
+        MIES_Mutate(individual, param, options, num_options, rng=rng)
+        member.genotype = individual.genotype
+        member.stepSizeOffsetMIES = individual.stepSizeOffsetMIES
+        return
+
+    u = _gauss(0.5, 1, rng)
 
-    u = gauss(0.5, 1)
+    conditional_mask = MIES_MutateDiscrete(individual, 0, individual.num_discrete, u, num_options, options, rng=rng)
+    MIES_MutateIntegers(individual, individual.num_discrete, individual.num_discrete+individual.num_ints, u, param,
+                        rng=rng)
+    MIES_MutateFloats(conditional_mask, individual, individual.num_discrete+individual.num_ints, individual.n, u, param,
+                      rng=rng)
 
-    conditional_mask = MIES_MutateDiscrete(individual, 0, individual.num_discrete, u, num_options, options)
-    MIES_MutateIntegers(individual, individual.num_discrete, individual.num_discrete+individual.num_ints, u, param)
-    MIES_MutateFloats(conditional_mask, individual, individual.num_discrete+individual.num_ints, individual.n, u, param)
+
+def MIES_MutateMatrix(genotypes, step_size_offsets, base_step_sizes, num_discrete, num_ints, param, options,
+                      num_options, rng=None):
+    """
+        Self-adaptive mixed-integer mutation of the structure of an ES, applied to a whole population at once.
+        Statistically equivalent to applying :func:`~MIES_Mutate` to each individual separately.
+
+        :param genotypes:           ``(lambda, n)`` array with a genotype per row, mutated in-place
+        :param step_size_offsets:   ``(lambda, n)`` array with the MIES step size offsets per gene, updated in-place
+        :param base_step_sizes:     Base step size per individual, as array of shape ``(lambda, 1)`` or scalar
+        :param num_discrete:        Number of discrete values at the start of each genotype
+        :param num_ints:            Number of integer values following the discrete values
+        :param param:               :class:`~modea.Parameters.Parameters` object
+        :param options:             List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param num_options:         List :data:`~modea.num_options` with the number of available modules per module
+                                    position that are available to choose from
+        :param rng:                 Random state to draw from. Default: the global ``np.random`` state
+    """
+    rng = getRNG(rng)
+    lambda_, n = genotypes.shape
+    num_floats = n - (num_discrete + num_ints)
+    discrete = slice(0, num_discrete)
+    ints = slice(num_discrete, num_discrete+num_ints)
+    floats = slice(num_discrete+num_ints, n)
+    l_bound = np.reshape(param.l_bound, (1, -1))
+    u_bound = np.reshape(param.u_bound, (1, -1))
+
+    u = rng.normal(0.5, 1, size=(lambda_, 1))  # One shared value per individual
+
+    if num_discrete > 0:
+        # Adapt step sizes, kept in bounds p'_i = T[ 1 / (3n_d) , 0.5]
+        tau = 1 / sqrt(2 * num_discrete)
+        tau_prime = 1 / sqrt(2 * sqrt(num_discrete))
+        offsets = step_size_offsets[:, discrete]
+        gauss_prime = rng.normal(0.5, 1, size=offsets.shape)
+        offsets[...] = 1 / (1 + ((1 - offsets) / offsets) * exp(-tau * u - tau_prime * gauss_prime))
+        num_opts = np.array(num_options[:num_discrete]).reshape((1, -1))
+        reflect(offsets, 1 / (3 * num_opts), 0.5)
+
+        # Choose uniformly from all options except the current one: draw from one option less and skip the current
+        values = genotypes[:, discrete]
+        mutate_mask = (rng.random(offsets.shape) < offsets + base_step_sizes) & (num_opts > 1)
+        new_values = floor(rng.random(offsets.shape) * (num_opts - 1))
+        new_values += new_values >= values
+        values[mutate_mask] = new_values[mutate_mask]
+
+    if num_ints > 0:
+        tau = 1 / sqrt(2 * num_ints)
+        tau_prime = 1 / sqrt(2 * sqrt(num_ints))
+        offsets = step_size_offsets[:, ints]
+        gauss_prime = rng.normal(0.5, 1, size=offsets.shape)
+        np.maximum(1, offsets * exp(tau * u + tau_prime * gauss_prime), out=offsets)
+
+        # Difference of two geometrically distributed values
+        scaled_step_size = (offsets + base_step_sizes) / num_ints
+        log_psi = np.log(scaled_step_size / (1 + np.sqrt(1 + scaled_step_size**2)))  # log(1 - psi)
+        u1 = rng.random(offsets.shape)
+        u2 = rng.random(offsets.shape)
+        values = genotypes[:, ints]
+        values += floor(np.log(1 - u1) / log_psi) - floor(np.log(1 - u2) / log_psi)
+        reflect(values, l_bound[:, ints], u_bound[:, ints])
+        np.trunc(values, out=values)
+
+    if num_floats > 0:
+        # Only mutate the floats of modules that are active, plus those that are always used
+        conditional_mask = _conditionalMask(genotypes[:, discrete], options, num_floats)
+
+        tau = 1 / sqrt(2 * num_floats)
+        tau_prime = 1 / sqrt(2 * sqrt(num_floats))
+        offsets = step_size_offsets[:, floats]
+        gauss_prime = rng.normal(0.5, 1, size=offsets.shape)
+        new_offsets = offsets * exp(u * tau + gauss_prime * tau_prime)
+
+        rand = rng.standard_normal(offsets.shape)
+        old_values = genotypes[:, floats]
+        new_values = old_values + (new_offsets + base_step_sizes) * rand
+        reflect(new_values, l_bound[:, floats], u_bound[:, floats])
+
+        # Reverse-engineer the actual stepsize based on the final mutation step
+        new_offsets = np.abs((new_values - old_values) / rand) - base_step_sizes
+        old_values[conditional_mask] = new_values[conditional_mask]
+        offsets[conditional_mask] = new_offsets[conditional_mask]
+
+
+def MIES_MutatePopulation(population, param, options, num_options, rng=None):
+    """
+        Self-adaptive mixed-integer mutation of the structure of an ES, applied to a whole population at once using
+        :func:`~MIES_MutateMatrix`
+
+        :param population:  List of :class:`~modea.Individual.MixedIntIndividual` objects or a
+                            :class:`~modea.Individual.MixedIntPopulation` to be mutated in-place
+        :param param:       :class:`~modea.Parameters.Parameters` object
+        :param options:     List of tuples :data:`~modea.options` with the number of tunable parameters per module
+        :param num_options: List :data:`~modea.num_options` with the number of available modules per module position
+                            that are available to choose from
+        :param rng:         Random state to draw from. Default: the global ``np.random`` state
+    """
+    if not len(population):
+        return
+
+    if isinstance(population, MixedIntPopulation):
+        genotypes = population.genotypes
+        MIES_MutateMatrix(genotypes, population.stepSizeOffsetMIES, population.baseStepSize, population.num_discrete,
+                          population.num_ints, param, options, num_options, rng=rng)
+        population.genotypes = genotypes
+        return
+
+    genotypes = np.vstack([ind.genotype.reshape((1, -1)) for ind in population]).astype(np.float64)
+    step_size_offsets = np.vstack([ind.stepSizeOffsetMIES for ind in population]).astype(np.float64)
+    base_step_sizes = np.array([[ind.baseStepSize] for ind in population])
+
+    first = population[0]
+    MIES_MutateMatrix(genotypes, step_size_offsets, base_step_sizes, first.num_discrete, first.num_ints, param,
+                      options, num_options, rng=rng)
+
+    for ind, genotype, offsets in zip(population, genotypes, step_size_offsets):
+        ind.genotype = genotype.reshape(ind.genotype.shape)
+        ind.stepSizeOffsetMIES = offsets
@@ -0,0 +1,630 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This module contains parallel evaluators: callables that can be used as the ``fitnessFunction`` of an
+:class:`~modea.Algorithms.EvolutionaryOptimizer` in parallel mode, i.e. that accept a list of genotypes and return
+a list of their fitness values. Requires Python 3.8+.
+
+The :class:`~SharedMemoryEvaluator` evaluates a generation using a set of worker processes. Instead of pickling every
+genotype for every task, the whole population matrix is written to a ``multiprocessing.shared_memory`` block that
+is reused across generations. Workers only receive small ``(offset, shape)`` descriptors of the rows to evaluate, and
+write the fitness values into a shared result array.
+
+Example::
+
+    with SharedMemoryEvaluator(fitness, num_workers=8) as evaluator:
+        optimizer = CustomizedES(n, evaluator, budget)
+        optimizer.parallel = True
+        optimizer.runOptimizer()
+
+The ``fitness`` function has to be picklable, e.g. a module-level function, and should not modify the genotype
+it is given, as that is a view on the shared population matrix.
+
+A hung or pathological evaluation does not have to block a whole generation: with a ``timeout``, each candidate is
+evaluated as a separate task and any worker exceeding the timeout is terminated and replaced by a fresh process.
+With ``max_stragglers=k``, the generation also continues as soon as all but ``k`` evaluations have finished. The
+abandoned candidates get the ``penalty`` fitness and are listed in the evaluator's ``timed_out`` attribute, which
+the optimizer uses to count timeouts in its statistics and, if requested, to replace them by freshly sampled
+candidates.
+
+Many independent runs, e.g. of :func:`~modea.Algorithms._customizedES`, can be spread over worker processes using a
+:class:`~ParallelRunner`. As the NumPy BLAS of every process otherwise starts a thread per core for the ``eigh`` and
+``dot`` calls in :func:`~modea.Parameters.Parameters.adaptCovarianceMatrix`, the runner limits the number of BLAS
+threads per worker: a single thread for many small runs, and all cores for a single large run, see
+:func:`~chooseBlasThreads`. The BLAS threads are limited at runtime if the optional ``threadpoolctl`` package is
+available, and otherwise through environment variables for newly spawned worker processes.
+
+The :class:`~BIPOPPortfolio` runs the restart instances of the BIPOP strategy concurrently in worker processes,
+sharing a single budget and the best fitness found so far.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__author__ = 'Sander van Rijn <svr003@gmail.com>'
+
+import multiprocessing
+import os
+import numpy as np
+from numpy import floor, log
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait as futures_wait
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+from timeit import default_timer
+try:
+    from threadpoolctl import threadpool_info, threadpool_limits
+    threadpoolctl_available = True
+except ImportError:
+    threadpoolctl_available = False
+    threadpool_info = threadpool_limits = None
+
+from modea.Algorithms import CustomizedES, _customizedES
+from modea.Utils import createRNG
+
+
+_worker_fitness = None
+_worker_blocks = {}  # Shared memory blocks attached to by this worker process, by name
+_blas_limits = None  # Keeps the runtime BLAS thread limit of this process alive
+
+blas_environment_variables = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS',
+                              'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+min_blas_dimensionality = 100  # Below this dimensionality, multi-threaded BLAS does not pay off
+
+
+def chooseBlasThreads(n, num_workers, num_cores=None):
+    """
+        Choose the number of BLAS threads per worker process, such that the workers together do not use more
+        threads than there are cores
+
+        :param n:           Dimensionality of the runs, or None if unknown
+        :param num_workers: Number of worker processes running at the same time
+        :param num_cores:   Number of available cores. Default: None, the number of CPUs
+        :returns:           1 for small ``n`` or at least as many workers as cores, otherwise the number of cores
+                            divided over the workers
+    """
+    if num_cores is None:
+        num_cores = multiprocessing.cpu_count()
+    if n is None or n < min_blas_dimensionality:
+        return 1
+    return max(num_cores // num_workers, 1)
+
+
+def limitBlasThreads(num_threads):
+    """
+        Limit the number of BLAS threads of the current process at runtime. Without ``threadpoolctl``, this only sets
+        the environment variables, which are only read by processes that are started afterwards.
+
+        :param num_threads: Maximum number of BLAS threads
+    """
+    global _blas_limits
+    for name in blas_environment_variables:
+        os.environ[name] = str(num_threads)
+    if threadpoolctl_available:
+        _blas_limits = threadpool_limits(limits=num_threads, user_api='blas')
+
+
+def blasThreads():
+    """
+        :returns:   The number of BLAS threads of the current process according to ``threadpoolctl``, or otherwise
+                    according to the environment. None if unknown
+    """
+    if threadpoolctl_available:
+        return max([info['num_threads'] for info in threadpool_info() if info['user_api'] == 'blas'], default=None)
+    value = os.environ.get('OMP_NUM_THREADS')
+    return int(value) if value else None
+
+
+@contextmanager
+def _blasEnvironment(num_threads):
+    """ Temporarily set the BLAS environment variables, so processes started meanwhile inherit them """
+    original = {name: os.environ.get(name) for name in blas_environment_variables}
+    for name in blas_environment_variables:
+        os.environ[name] = str(num_threads)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _callWithArguments(task):
+    function, args, kwargs = task
+    return function(*args, **kwargs)
+
+
+def _workerLoop(connection, fitnessFunction):
+    """
+        Main loop of a worker process: evaluate the rows described by each received descriptor, and report back the
+        offset of the rows once done. The fitness function is only sent to each worker process once.
+
+        :param connection:      Connection to the evaluator, on which ``None`` is sent to stop the worker
+        :param fitnessFunction: Function that accepts a single genotype and returns its fitness
+    """
+    global _worker_fitness
+    _worker_fitness = fitnessFunction
+    while True:
+        descriptor = connection.recv()
+        if descriptor is None:
+            break
+        _evaluateRows(descriptor)
+        connection.send(descriptor[2])
+
+
+def _attach(names):
+    """
+        Attach to the given shared memory blocks, reusing earlier attachments. Attachments to any other blocks are
+        closed, as those have been replaced by the evaluator.
+
+        :param names:   Names of the shared memory blocks
+        :returns:       List of the attached :class:`SharedMemory` blocks, in the same order as ``names``
+    """
+    for name in list(_worker_blocks):
+        if name not in names:
+            _worker_blocks.pop(name).close()
+    for name in names:
+        if name not in _worker_blocks:
+            _worker_blocks[name] = SharedMemory(name=name)
+    return [_worker_blocks[name] for name in names]
+
+
+def _evaluateRows(descriptor):
+    """
+        Evaluate a contiguous set of rows of the shared population matrix in a worker process
+
+        :param descriptor:  Tuple ``(genotypes_name, results_name, offset, shape)``: the names of the shared memory
+                            blocks holding the population matrix and the results, the index of the first row to
+                            evaluate and the ``(rows, n)`` shape of the rows to evaluate
+    """
+    genotypes_name, results_name, offset, shape = descriptor
+    genotype_block, result_block = _attach([genotypes_name, results_name])
+    num_rows, n = shape
+
+    genotypes = np.ndarray(shape, dtype=np.float64, buffer=genotype_block.buf, offset=offset * n * 8)
+    results = np.ndarray((num_rows,), dtype=np.float64, buffer=result_block.buf, offset=offset * 8)
+    for i in range(num_rows):
+        results[i] = _worker_fitness(genotypes[i])
+
+
+class _Worker(object):
+    """ Worker process of a :class:`~SharedMemoryEvaluator`, together with the task it is currently working on """
+
+    def __init__(self, context, fitnessFunction):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_workerLoop, args=(child_connection, fitnessFunction), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.task = None      # (offset, number of rows) of the task being evaluated, None if idle
+        self.started = None   # Time at which the current task was started
+
+
+    def submit(self, descriptor):
+        self.connection.send(descriptor)
+        self.task = descriptor[2], descriptor[3][0]
+        self.started = default_timer()
+
+
+    def stop(self):
+        """ Ask the worker to stop, or terminate it right away if it is still busy """
+        if self.task is None:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+
+
+class SharedMemoryEvaluator(object):
+    """
+        Parallel evaluator that passes the population to a set of worker processes through shared memory.
+
+        The workers and the shared memory blocks are created on first use. The blocks are reused for as long as the
+        population fits, and only replaced by larger ones when needed, e.g. after a restart with a larger population
+        size. Call :func:`~close`, or use the evaluator as a context manager, to stop the workers and release the
+        shared memory.
+
+        :param fitnessFunction: Picklable function that accepts a single genotype and returns its fitness
+        :param num_workers:     Number of worker processes. Default: None, the number of CPUs
+        :param context:         ``multiprocessing`` context used to start the workers. Default: None, the default
+                                context
+        :param timeout:         Maximum time in seconds a single evaluation may take. The worker of an evaluation that
+                                takes longer is terminated and replaced. Default: None, no timeout
+        :param max_stragglers:  Stop waiting once all but this many evaluations of a batch have finished: the
+                                remaining evaluations are abandoned and their workers replaced. Default: 0
+        :param penalty:         Fitness value given to evaluations that timed out or were abandoned. Default: inf
+    """
+
+    def __init__(self, fitnessFunction, num_workers=None, context=None, timeout=None, max_stragglers=0,
+                 penalty=np.inf):
+        self.fitnessFunction = fitnessFunction
+        self.num_workers = num_workers if num_workers else multiprocessing.cpu_count()
+        self.context = context if context is not None else multiprocessing.get_context()
+        self.timeout = timeout
+        self.max_stragglers = max_stragglers
+        self.penalty = penalty
+        self.workers = []
+        self.genotype_block = None
+        self.result_block = None
+        self.capacity = (0, 0)  # (rows, n) of the population matrix that fits in the current blocks
+
+        self.timed_out = []     # Indices of the evaluations in the most recent batch that timed out or were abandoned
+        self.num_timeouts = 0   # Total number of evaluations that timed out or were abandoned
+        self.num_recycled = 0   # Total number of worker processes that were replaced
+
+
+    def reserve(self, num_rows, n):
+        """
+            Make sure populations of up to ``num_rows`` genotypes of length ``n`` fit in shared memory, replacing the
+            current blocks if they are too small
+
+            :param num_rows:    Number of genotypes to evaluate at once
+            :param n:           Length of each genotype
+        """
+        if num_rows <= self.capacity[0] and n == self.capacity[1]:
+            return
+        self.releaseBlocks()
+        self.genotype_block = SharedMemory(create=True, size=num_rows * n * 8)
+        self.result_block = SharedMemory(create=True, size=num_rows * 8)
+        self.capacity = (num_rows, n)
+
+
+    def __call__(self, genotypes):
+        """
+            :param genotypes:   List of genotypes to evaluate
+            :returns:           List of fitness values, in the same order as ``genotypes``
+        """
+        self.timed_out = []
+        num_rows = len(genotypes)
+        if num_rows == 0:
+            return []
+        n = np.size(genotypes[0])
+        self.reserve(num_rows, n)
+        while len(self.workers) < self.num_workers:
+            self.workers.append(_Worker(self.context, self.fitnessFunction))
+
+        matrix = np.ndarray((num_rows, n), dtype=np.float64, buffer=self.genotype_block.buf)
+        for i, genotype in enumerate(genotypes):
+            matrix[i] = np.ravel(genotype)
+
+        # One contiguous chunk of rows per worker, or a separate task per row if evaluations can be abandoned
+        if self.timeout is None and not self.max_stragglers:
+            bounds = np.linspace(0, num_rows, min(self.num_workers, num_rows) + 1).astype(int)
+        else:
+            bounds = np.arange(num_rows + 1)
+        tasks = deque((self.genotype_block.name, self.result_block.name, start, (stop - start, n))
+                      for start, stop in zip(bounds[:-1], bounds[1:]))
+
+        results = np.ndarray((num_rows,), dtype=np.float64, buffer=self.result_block.buf)
+        results[:] = self.penalty
+        self._runTasks(tasks, num_rows)
+        results[self.timed_out] = self.penalty  # In case an abandoned evaluation finished after all
+
+        return results.tolist()
+
+
+    def _runTasks(self, tasks, num_rows):
+        """
+            Distribute the tasks over the workers until all rows have been evaluated, timed out or abandoned
+
+            :param tasks:       Deque of task descriptors, as used by :func:`~_evaluateRows`
+            :param num_rows:    Total number of rows in the tasks
+        """
+        num_finished = 0
+        while True:
+            for worker in self.workers:
+                if worker.task is None and tasks:
+                    worker.submit(tasks.popleft())
+            busy = [worker for worker in self.workers if worker.task is not None]
+            if not busy:
+                break
+
+            wait_time = None
+            if self.timeout is not None:
+                wait_time = max(min(worker.started for worker in busy) + self.timeout - default_timer(), 0)
+            ready = wait([worker.connection for worker in busy], timeout=wait_time)
+
+            for worker in busy:
+                if worker.connection in ready:
+                    try:
+                        worker.connection.recv()
+                        num_finished += worker.task[1]
+                        worker.task = None
+                    except EOFError:  # The worker process died
+                        self._abandon(worker)
+                elif self.timeout is not None and default_timer() - worker.started > self.timeout:
+                    self._abandon(worker)
+
+            if num_finished >= num_rows - self.max_stragglers:  # Do not wait for the stragglers
+                for worker in self.workers:
+                    if worker.task is not None:
+                        self._abandon(worker)
+                for _, _, offset, shape in tasks:
+                    self._markTimedOut(offset, shape[0])
+                tasks.clear()
+
+        self.timed_out.sort()
+
+
+    def _abandon(self, worker):
+        """ Give up on the task of the given worker, and replace the worker by a fresh process """
+        self._markTimedOut(*worker.task)
+        worker.stop()
+        self.workers[self.workers.index(worker)] = _Worker(self.context, self.fitnessFunction)
+        self.num_recycled += 1
+
+
+    def _markTimedOut(self, offset, num_rows):
+        rows = list(range(offset, offset + num_rows))
+        self.timed_out.extend(rows)
+        self.num_timeouts += num_rows
+
+
+    def releaseBlocks(self):
+        """ Release the shared memory blocks """
+        for block in [self.genotype_block, self.result_block]:
+            if block is not None:
+                block.close()
+                block.unlink()
+        self.genotype_block = self.result_block = None
+        self.capacity = (0, 0)
+
+
+    def close(self):
+        """ Stop the worker processes and release the shared memory """
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+        self.releaseBlocks()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ParallelRunner(object):
+    """
+        Runs many independent optimization runs in a pool of worker processes, with a limited number of BLAS threads
+        per worker to avoid oversubscribing the cores. After every call, the achieved throughput is available in
+        :attr:`~throughput`, to verify the choice of BLAS threads.
+
+        :param num_workers:     Number of worker processes. Default: None, the number of CPUs
+        :param blas_threads:    Number of BLAS threads per worker. Default: None, chosen by :func:`~chooseBlasThreads`
+        :param context:         ``multiprocessing`` context used to start the workers. Default: None, the default
+                                context if ``threadpoolctl`` is available, otherwise 'spawn', so the workers pick up the
+                                BLAS environment variables
+    """
+
+    def __init__(self, num_workers=None, blas_threads=None, context=None):
+        self.num_workers = num_workers if num_workers else multiprocessing.cpu_count()
+        self.blas_threads = blas_threads
+        if context is None:
+            context = multiprocessing.get_context() if threadpoolctl_available else multiprocessing.get_context('spawn')
+        self.context = context
+        self.throughput = None
+
+
+    def map(self, function, arguments, n=None, kwargs=None):
+        """
+            Call the (picklable) function for every set of arguments in parallel
+
+            :param function:    Function to call in the worker processes
+            :param arguments:   List of tuples of positional arguments, one for each call
+            :param n:           Dimensionality of the runs, used to choose the number of BLAS threads
+            :param kwargs:      Dictionary of keyword arguments passed to every call. Default: None
+            :returns:           List of the return values, in the same order as ``arguments``
+        """
+        kwargs = kwargs if kwargs is not None else {}
+        num_workers = max(min(self.num_workers, len(arguments)), 1)
+        blas_threads = self.blas_threads if self.blas_threads else chooseBlasThreads(n, num_workers)
+
+        start = default_timer()
+        with _blasEnvironment(blas_threads):
+            pool = self.context.Pool(num_workers, initializer=limitBlasThreads, initargs=(blas_threads,))
+        try:
+            results = pool.map(_callWithArguments, [(function, args, kwargs) for args in arguments])
+        finally:
+            pool.close()
+            pool.join()
+        seconds = default_timer() - start
+
+        self.throughput = {'num_workers': num_workers, 'blas_threads': blas_threads, 'num_runs': len(arguments),
+                           'seconds': seconds, 'runs_per_second': len(arguments) / seconds}
+        return results
+
+
+    def runCustomizedES(self, n, fitnessFunction, budget, num_runs, seed=None, **kwargs):
+        """
+            Perform independent runs of :func:`~modea.Algorithms._customizedES`, each with its own random stream
+            spawned from ``seed``. The throughput additionally includes the number of evaluations per second.
+
+            :param n:               Dimensionality of the problem to be solved
+            :param fitnessFunction: Picklable function to determine the fitness of an individual
+            :param budget:          Number of function evaluations allowed for each run
+            :param num_runs:        Number of runs to perform
+            :param seed:            Integer seed, ``np.random.SeedSequence`` or None for fresh entropy from the OS
+            :param kwargs:          Further keyword arguments for :func:`~modea.Algorithms._customizedES`
+            :returns:               List of the results of all runs
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        arguments = [(n, fitnessFunction, budget) for _ in range(num_runs)]
+        all_kwargs = [dict(kwargs, seed=child) for child in seed.spawn(num_runs)]
+
+        results = self.map(_customizedESWithKwargs, list(zip(arguments, all_kwargs)), n=n)
+
+        evaluations = sum(len(fitness_over_time) for _, _, fitness_over_time, _ in results)
+        self.throughput['evaluations'] = evaluations
+        self.throughput['evaluations_per_second'] = evaluations / self.throughput['seconds']
+        return results
+
+
+def _customizedESWithKwargs(args, kwargs):
+    return _customizedES(*args, **kwargs)
+
+
+_shared_best = None  # Best fitness found so far by any restart instance of a BIPOPPortfolio
+
+
+def _initPortfolioWorker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _targetReached(fitness, target, threshold):
+    return target is not None and not fitness - target > threshold
+
+
+def _runRestartInstance(n, fitnessFunction, budget, lambda_, sigma, opts, seed, target, threshold):
+    """
+        Run a single restart instance of a :class:`~BIPOPPortfolio` in a worker process, until a local restart
+        condition holds, its budget is used up or any instance has reached the target
+
+        :returns:   Tuple ``(used_budget, best_fitness, best_genotype)``
+    """
+    es = CustomizedES(n, fitnessFunction, budget, lambda_=lambda_, opts=dict(opts), rng=createRNG(seed))
+    es.mutateParameters = es.parameters.adaptCovarianceMatrix
+    if sigma is not None:
+        es.parameters.sigma = es.parameters.sigma_mean = sigma
+
+    while es.optimizationOngoing(target, threshold) and not _targetReached(_shared_best.value, target, threshold):
+        es.runOneGeneration()
+        es.recordStatistics()
+        with _shared_best.get_lock():
+            _shared_best.value = min(_shared_best.value, es.best_individual.fitness)
+
+    # When the budget runs out, the last generation is evaluated but not selected from anymore
+    best = min([es.best_individual] + list(es.new_population), key=lambda individual: individual.fitness)
+    return es.used_budget, best.fitness, best.genotype.flatten()
+
+
+class BIPOPPortfolio(object):
+    """
+        Parallel variant of the BIPOP restart strategy of
+        :func:`~modea.Algorithms.EvolutionaryOptimizer.runLocalRestartOptimizer`: instead of one after another,
+        several restart instances of the large- and small-population regimes run
+        concurrently in separate worker processes, sharing the global budget and the best fitness found so far.
+
+        As in BIPOP, the budget is split evenly between the two regimes, and every new instance is started in the
+        regime with the most remaining budget. Large-regime instances double their population size every time, while
+        small-regime instances draw theirs from the range between the initial and half the current large population
+        size. Each instance is allotted at most an equal share of the remaining budget per worker, rounded down to
+        whole generations. Budget an instance does not use, because a local restart condition was met, is returned to
+        whichever regime most recently improved the shared best fitness. Unlike in the sequential version, the first
+        default run is counted as part of the large regime, so all workers can start right away.
+
+        :param n:               Dimensionality of the problem to be solved
+        :param fitnessFunction: Picklable function to determine the fitness of an individual
+        :param budget:          Total number of function evaluations allowed for all instances together
+        :param num_workers:     Number of restart instances to run at the same time. Default: None, the number of CPUs
+        :param opts:            Dictionary of further options for :class:`~modea.Algorithms.CustomizedES`
+        :param seed:            Integer seed, ``np.random.SeedSequence`` or None for fresh entropy from the OS
+        :param context:         ``multiprocessing`` context used to start the workers. Default: None, the default
+                                context
+    """
+
+    def __init__(self, n, fitnessFunction, budget, num_workers=None, opts=None, seed=None, context=None):
+        self.n = n
+        self.fitnessFunction = fitnessFunction
+        self.budget = budget
+        self.num_workers = num_workers if num_workers else multiprocessing.cpu_count()
+        self.opts = dict(opts if opts is not None else {}, ipop='BIPOP')
+        self.seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = createRNG(self.seed.spawn(1)[0])
+        self.context = context if context is not None else multiprocessing.get_context()
+
+        self.lambda_init = int(4 + floor(3 * log(n)))
+        self.lambda_ = {'small': None, 'large': None}
+        self.budgets = {'small': budget - budget // 2, 'large': budget // 2}  # Remaining budget of each regime
+        self.progressing = 'large'  # Regime that most recently improved the best fitness
+        self.used_budget = 0
+        self.best_fitness = np.inf
+        self.best_genotype = None
+        self.history = []  # (regime, lambda_, used budget, best fitness) of every finished instance
+
+
+    def determineRegime(self):
+        """ :returns: The regime with the most remaining budget, or None if neither has any left """
+        large, small = self.budgets['large'], self.budgets['small']
+        if large <= 0 and small <= 0:
+            return None
+        return 'large' if large > small else 'small'
+
+
+    def nextInstance(self, regime):
+        """
+            :param regime:  Regime of the next instance, 'large' or 'small'
+            :returns:       Tuple ``(lambda_, sigma)`` of the next instance in the given regime
+        """
+        if regime == 'large':
+            if self.lambda_['large'] is None:  # The first, default run
+                self.lambda_['large'] = self.lambda_init
+                return self.lambda_init, None
+            self.lambda_['large'] *= 2
+            return self.lambda_['large'], 2
+
+        rand_val = self.rng.random() ** 2
+        large = max(self.lambda_['large'] or self.lambda_init, self.lambda_init)
+        self.lambda_['small'] = int(floor(self.lambda_init * (.5 * large / self.lambda_init)**rand_val))
+        return max(self.lambda_['small'], 2), 2e-2 * self.rng.random()
+
+
+    def run(self, target=None, threshold=1e-8):
+        """
+            Run restart instances until the budget is used up, or the target has been reached
+
+            :param target:      Target fitness value: stop once the best fitness is within ``threshold`` of it
+            :param threshold:   Allowed distance to the target fitness value. Default: 1e-8
+            :returns:           Tuple ``(best_fitness, best_genotype)``
+        """
+        shared_best = self.context.Value('d', self.best_fitness)
+        running = {}
+        with ProcessPoolExecutor(self.num_workers, mp_context=self.context, initializer=_initPortfolioWorker,
+                                 initargs=(shared_best,)) as executor:
+            while True:
+                while len(running) < self.num_workers and not _targetReached(self.best_fitness, target, threshold):
+                    regime = self.determineRegime()
+                    if regime is None:
+                        break
+                    lambda_, sigma = self.nextInstance(regime)
+                    share = max(sum(self.budgets.values()) // self.num_workers, lambda_)
+                    allotted = min(self.budgets[regime], share) // lambda_ * lambda_
+                    if allotted == 0:  # Not even a single generation fits: any leftovers go to the other regime
+                        other = 'small' if regime == 'large' else 'large'
+                        if self.budgets[other] > 0:
+                            self.budgets[other] += self.budgets[regime]
+                        self.budgets[regime] = 0
+                        continue
+
+                    self.budgets[regime] -= allotted
+                    future = executor.submit(_runRestartInstance, self.n, self.fitnessFunction, allotted, lambda_,
+                                             sigma, self.opts, self.seed.spawn(1)[0], target, threshold)
+                    running[future] = (regime, lambda_, allotted)
+
+                if not running:
+                    break
+                done, _ = futures_wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.finishInstance(future.result(), *running.pop(future))
+
+        return self.best_fitness, self.best_genotype
+
+
+    def finishInstance(self, result, regime, lambda_, allotted):
+        """ Process the result of a finished instance, and return its unused budget """
+        used_budget, best_fitness, best_genotype = result
+        self.used_budget += used_budget
+        self.history.append((regime, lambda_, used_budget, best_fitness))
+        if best_fitness < self.best_fitness:
+            self.best_fitness, self.best_genotype = best_fitness, best_genotype
+            self.progressing = regime
+        self.budgets[self.progressing] += allotted - used_budget
@@ -8,13 +8,45 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 __author__ = 'Sander van Rijn <svr003@gmail.com>'
 
-from modea.Utils import initializable_parameters
+from concurrent.futures import ThreadPoolExecutor
+from modea.Utils import initializable_parameters, getRNG, roundUpToMultiple
 import numpy as np
 from numpy import abs, all, any, append, arange, ceil, diag, dot, exp, eye, floor, isfinite, isinf, isreal,\
                   ones, log, max, mean, median, mod, newaxis, outer, real, sqrt, square, sum, triu, zeros
 from numpy.linalg import cond, eig, eigh, norm, LinAlgError
 
 
+_eigh_executor = None
+
+
+def _getEighExecutor():
+    """ Single background thread shared by all pipelined eigendecompositions, created on first use """
+    global _eigh_executor
+    if _eigh_executor is None:
+        _eigh_executor = ThreadPoolExecutor(max_workers=1)
+    return _eigh_executor
+
+
+def _decomposeCovariance(C):
+    """
+        Eigendecomposition of a symmetric covariance matrix, as used to sample from it
+
+        :param C:   Symmetric covariance matrix
+        :returns:   Tuple ``(D, B, sqrt_C)`` of the column vector of square roots of the eigenvalues, the
+                    eigenvectors and the inverse square root of ``C``, or None if ``C`` has degenerated
+    """
+    try:
+        w, e_vector = eigh(C)
+    except LinAlgError as e:
+        print("Restarting, degeneration detected: {}".format(e))
+        return None
+
+    e_value = sqrt(list(map(complex, w))).reshape(-1, 1)
+    if any(~isreal(e_value)) or any(isinf(e_value)):  # Eigenvalues of C are not real, or infinite
+        return None
+    return real(e_value), e_vector, dot(e_vector, e_value**-1 * e_vector.T)
+
+
 
 class BaseParameters(object):
     """
@@ -54,22 +86,33 @@ class Parameters(BaseParameters):
         :param l_bound:         Lower bound of the search space
         :param u_bound:         Upper bound of the search space
         :param seq_cutoff:      Minimal cut-off allowed in sequential selection
+        :param seq_granularity: Sequential evaluation may only be stopped after a multiple of this many individuals,
+                                e.g. 2 to only stop after complete pairs for pairwise selection. Default: 1
         :param wcm:             Initial weighted center of mass
         :param active:          Boolean switch on using an active update. Default: False
         :param elitist:         Boolean switch on using a (mu, l) strategy rather than (mu + l). Default: False
         :param sequential:      Boolean switch on using sequential evaluation. Default: False
         :param tpa:             Boolean switch on using two-point step-size adaptation. Default: False
+        :param pipelined_eigh:  Boolean switch on running the eigendecomposition of C on a background thread, so
+                                it overlaps with the evaluation of the next generation. The next generation is then
+                                still sampled using the decomposition of the *previous* C, i.e. the sampling basis
+                                ``B``, ``D`` and ``sqrt_C`` lag one generation behind C. Default: False
+        :param worker_count:    Number of parallel evaluation workers. If given, the default ``lambda_`` is rounded up
+                                to a multiple of it, and local restarts keep their population sizes aligned to it.
+                                Default: None
         :param values:          Dictionary in the form of ``{'name': value}`` of initial values for allowed parameters.
                                 Any values for names not in :data:`modea.Utils.initializable_parameters` are ignored.
+        :param rng:             ``np.random.Generator`` used to draw the initial ``wcm`` if none is given.
+                                Default: the global ``np.random`` state
     """
 
     def __init__(self, n, budget, sigma=None,
                  mu=None, lambda_=None, weights_option=None, l_bound=None, u_bound=None, seq_cutoff=1, wcm=None,
                  active=False, elitist=False, local_restart=None, sequential=False, tpa=False,
-                 values=None):
+                 values=None, rng=None, seq_granularity=1, pipelined_eigh=False, worker_count=None):
 
         if lambda_ is None:
-            lambda_ = int(4 + floor(3 * log(n)))
+            lambda_ = roundUpToMultiple(int(4 + floor(3 * log(n))), worker_count)
         eff_lambda = lambda_ - 2 if tpa else lambda_
         if mu is None:
             mu = 0.5
@@ -88,11 +131,12 @@ class Parameters(BaseParameters):
         if seq_cutoff is None:
             seq_cutoff = mu * eff_lambda
         if wcm is None:
-            wcm = (np.random.randn(n,1) * (u_bound - l_bound)) + l_bound
+            wcm = (getRNG(rng).standard_normal((n,1)) * (u_bound - l_bound)) + l_bound
 
         ### Basic parameters ###
         self.n = n
         self.budget = budget
+        self.rng = rng
         self.mu = mu
         self.lambda_ = lambda_
         self.eff_lambda = eff_lambda
@@ -106,7 +150,11 @@ class Parameters(BaseParameters):
         self.local_restart = local_restart
         self.sequential = sequential
         self.seq_cutoff = seq_cutoff
+        self.seq_granularity = seq_granularity
         self.tpa = tpa
+        self.pipelined_eigh = pipelined_eigh
+        self.worker_count = worker_count
+        self.pending_decomposition = None  # Future of the background eigendecomposition if pipelined
         self.weights_option = weights_option
         self.weights = self.getWeights(weights_option)
         self.mu_eff = 1 / sum(square(self.weights))
@@ -191,7 +239,9 @@ class Parameters(BaseParameters):
                 'mu': self.mu, 'lambda_': self.lambda_, 'weights_option': self.weights_option, 'l_bound': self.l_bound,
                 'u_bound': self.u_bound, 'seq_cutoff': self.seq_cutoff, 'wcm': self.wcm,
                 'active': self.active, 'elitist': self.elitist, 'local_restart': self.local_restart,
-                'sequential': self.sequential, 'tpa': self.tpa, 'values': self.values}
+                'sequential': self.sequential, 'tpa': self.tpa, 'values': self.values, 'rng': self.rng,
+                'seq_granularity': self.seq_granularity, 'pipelined_eigh': self.pipelined_eigh,
+                'worker_count': self.worker_count}
 
 
     def __init_values(self, values):
@@ -294,10 +344,11 @@ class Parameters(BaseParameters):
 
         # Adapt step size sigma
         if self.tpa:
-            alpha_act = self.tpa_result * self.alpha
-            alpha_act += self.beta_tpa if self.tpa_result > 1 else 0
-            self.alpha_s += self.c_alpha * (alpha_act - self.alpha_s)
-            self.sigma *= exp(self.alpha_s)
+            if self.tpa_result is not None:  # No result yet when the TPA probes are evaluated with the next batch
+                alpha_act = self.tpa_result * self.alpha
+                alpha_act += self.beta_tpa if self.tpa_result > 1 else 0
+                self.alpha_s += self.c_alpha * (alpha_act - self.alpha_s)
+                self.sigma *= exp(self.alpha_s)
         else:
             exponent = (norm(self.p_sigma) / self.chiN - 1) * self.c_sigma / self.damps
 
@@ -319,23 +370,20 @@ class Parameters(BaseParameters):
         elif not 1e-16 < self.sigma_mean < 1e6:
             degenerated = True
         else:
-            try:
-                w, e_vector = eigh(C)
-                e_value = sqrt(list(map(complex, w))).reshape(-1, 1)
-                if any(~isreal(e_value)):
-                    degenerated = True
-                    # raise Exception("Eigenvalues of C are not real")
-                elif any(isinf(e_value)):
-                    degenerated = True
-                    # raise Exception("Eigenvalues of C are infinite")
+            if self.pipelined_eigh:
+                # Use the decomposition of the previous C, and start decomposing the current one in the background
+                if self.pending_decomposition is not None:
+                    decomposition = self.pending_decomposition.result()
                 else:
-                    self.D = real(e_value)
-                    self.B = e_vector
-                    self.sqrt_C = dot(e_vector, e_value**-1 * e_vector.T)
-            except LinAlgError as e:
-                # raise Exception(e)
-                print("Restarting, degeneration detected: {}".format(e))
+                    decomposition = self.D, self.B, self.sqrt_C
+                self.pending_decomposition = _getEighExecutor().submit(_decomposeCovariance, C)
+            else:
+                decomposition = _decomposeCovariance(C)
+
+            if decomposition is None:
                 degenerated = True
+            else:
+                self.D, self.B, self.sqrt_C = decomposition
 
         if degenerated:
             self.restart()
@@ -415,6 +463,7 @@ class Parameters(BaseParameters):
         self.C = eye(n)
         self.B = eye(n)
         self.D = ones((n,1))
+        self.pending_decomposition = None  # Decomposition of the old C is no longer valid
         self.p_sigma = zeros((n, 1))
         self.sigma_mean = self.sigma = 1          # TODO: make this depend on any input default sigma value
         # TODO: add feedback of resetting sigma to the sigma per individual
@@ -15,33 +15,46 @@ import numpy as np
 from copy import copy
 from numpy import dot
 from random import choice
+from modea.Individual import FloatIndividual, MixedIntPopulation
+from modea.Utils import getRNG, randomIntegers
 
 
-def onePointCrossover(ind_a, ind_b):
+def onePointCrossover(ind_a, ind_b, rng=None):
     """
         Perform one-point crossover between two individuals.
 
         :param ind_a:   An individual
         :param ind_b:   Another individual
+        :param rng:     Random state to draw from. Default: the global ``np.random`` state
         :returns:       The original individuals, whose genotype has been modified inline
     """
     # -1 as randint is inclusive, -1 to not choose the last element
-    crossover_point = np.random.randint(1, len(ind_a.genotype) - 2)
+    crossover_point = randomIntegers(getRNG(rng), 1, len(ind_a.genotype) - 2)
     ind_a.genotype[:crossover_point], ind_b.genotype[:crossover_point] = ind_b.genotype[:crossover_point], ind_a.genotype[:crossover_point]
     return ind_a, ind_b
 
 
-def random(pop, param):
+def random(pop, param, rng=None):
     """
         Create a new population by selecting random parents from the given population.
         To be used when no actual recombination occurs
 
         :param pop:     The population to be recombined
         :param param:   :class:`~modea.Parameters.Parameters` object
+        :param rng:     Random state to draw from, as returned by :func:`~modea.Utils.getRNG`.
+                        Default: Python's ``random`` module
         :returns:       A list of lambda individuals, each a copy of a randomly chosen individual from the population
     """
 
-    new_population = [copy(choice(pop)) for _ in range(param.lambda_)]
+    if isinstance(pop, MixedIntPopulation):
+        if rng is None:
+            return pop.take([choice(range(len(pop))) for _ in range(param.lambda_)])
+        return pop.take(randomIntegers(rng, 0, len(pop), size=param.lambda_))
+
+    if rng is None:
+        new_population = [copy(choice(pop)) for _ in range(param.lambda_)]
+    else:
+        new_population = [copy(pop[i]) for i in randomIntegers(rng, 0, len(pop), size=param.lambda_)]
     return new_population
 
 
@@ -66,6 +79,7 @@ def weighted(pop, param):
         :param param:   :class:`~modea.Parameters.Parameters` object, of which ``param.weights``
                         will be used to calculate the weighted average
         :returns:       A list of lambda individuals, with as genotype the weighted average of the given population.
+                        The genotype array is shared between all of them: see :func:`~modea.Individual.FloatIndividual.spawn`
     """
 
     param.wcm_old = param.wcm
@@ -74,32 +88,40 @@ def weighted(pop, param):
     param.offspring = offspring
     param.wcm = dot(offspring, param.weights)
 
-    new_ind = copy(pop[0])
-    new_ind.genotype = param.wcm
-    new_population = [new_ind]
-    for _ in range(int(param.lambda_-1)):
-        new_population.append(copy(new_ind))
-
-    return new_population
+    # All offspring share the wcm as genotype, as mutation replaces the genotype instead of modifying it in-place
+    sigma = pop[0].sigma
+    return [FloatIndividual.spawn(param.wcm, sigma) for _ in range(int(param.lambda_))]
 
 
-def MIES_recombine(pop, param):
+def MIES_recombine(pop, param, rng=None):
     """
         Returns a new set of individuals whose genotype is determined according to
         the Mixed-Integer ES by Rui Li.
 
         :param pop:     The population to be recombined
         :param param:   :class:`~modea.Parameters.Parameters` object
+        :param rng:     Random state to draw from. Default: the global ``np.random`` state
         :returns:       A list of lambda individuals, with as genotype the weighted average of the given population.
+                        If ``pop`` is a :class:`~modea.Individual.MixedIntPopulation`, a new population of lambda
+                        rows is returned instead.
     """
+    np_rng = getRNG(rng)
+    if isinstance(pop, MixedIntPopulation):
+        indices = [0]
+        for _ in range(param.lambda_-1):
+            c1 = randomIntegers(np_rng, 0, param.mu_int)
+            randomIntegers(np_rng, 0, param.mu_int)  # Unused second parent, drawn to keep the random stream identical
+            indices.append(c1)
+        return pop.take(indices)
+
     new_ind = copy(pop[0])
     new_population = [new_ind]
     reco = 1  # TODO: Remove or store in Parameters
 
     for _ in range(param.lambda_-1):
         # Select random individual from the current parent population
-        c1 = np.random.random_integers(0, param.mu_int-1)
-        c2 = np.random.random_integers(0, param.mu_int-1)
+        c1 = randomIntegers(np_rng, 0, param.mu_int)
+        c2 = randomIntegers(np_rng, 0, param.mu_int)
 
         if reco == 1:
             new_population.append(copy(pop[c1]))  # Optional: replace by copy(choice(pop))
@@ -110,7 +132,7 @@ def MIES_recombine(pop, param):
             new_ind.genotype //= 2
             new_population.append(new_ind)
         elif reco > 1:
-            x = (choice(range(1, 10000))/10000)
+            x = (choice(range(1, 10000)) if rng is None else randomIntegers(rng, 1, 10000)) / 10000
             if x > 0.5:
                 new_population.append(copy(pop[c1]))
             else:
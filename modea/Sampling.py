@@ -12,22 +12,33 @@ Base samplers
 * :class:`~GaussianSampling`
 * :class:`~QuasiGaussianHaltonSampling`
 * :class:`~QuasiGaussianSobolSampling`
+* :class:`~StructuredOrthogonalSampling`
+
+The quasi-random base samplers can read their points from a :class:`~QuasiRandomTable`, an on-disk cache of
+precomputed sequences that can be shared between processes.
 
 Indirect samplers
 =================
 * :class:`~MirroredSampling`
 * :class:`~OrthogonalSampling`
 * :class:`~MirroredOrthogonalSampling`
+* :class:`~FusedSampling`
+* :class:`~PrefetchingSampler`
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 __author__ = 'Sander van Rijn <svr003@gmail.com>'
 # External libraries
+import os
+import tempfile
+import threading
 import numpy as np
+from collections import deque
 from numpy import array, dot, any, isnan
 from numpy.linalg import norm
 from scipy.stats import norm as norm_dist
 from sobol_seq import i4_sobol
+from modea.Utils import getRNG, randomIntegers, guaranteeFolderExists
 try:
     from ghalton import Halton
     halton_available = True
@@ -43,10 +54,13 @@ class GaussianSampling(object):
         :param n:       Dimensionality of the vectors to be sampled
         :param shape:   String to select between whether column (``'col'``) or row (``'row'``) vectors should be
                         returned. Defaults to column vectors.
+        :param rng:     Random state to draw from, preferably a ``np.random.Generator``. Defaults to the global
+                        ``np.random`` state
     """
-    def __init__(self, n, shape='col'):
+    def __init__(self, n, shape='col', rng=None):
         self.n = n
         self.shape = (n,1) if shape == 'col' else (1,n)
+        self.rng = getRNG(rng)
 
     def next(self):
         """
@@ -54,7 +68,81 @@ class GaussianSampling(object):
 
             :return:    A new vector sampled from a Gaussian distribution with mean 0 and standard deviation 1
         """
-        return np.random.randn(*self.shape)
+        return self.rng.standard_normal(self.shape)
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler. As all samples are independent, this does nothing.
+        """
+        pass
+
+
+class QuasiRandomTable(object):
+    """
+        On-disk cache of precomputed uniform low-discrepancy sequences, to be shared between all samplers, and through
+        the OS page cache between all processes, that use the same ``directory``.
+
+        For every sequence type and dimensionality, the first ``max_length`` points are stored once as a ``.npy`` file
+        of shape ``(max_length, n)``, and opened as a read-only memory map. Row ``i`` of a Sobol table is the point at
+        seed ``i``, row ``i`` of a Halton table the ``i``-th point of the sequence. Tables are written to a temporary
+        file first, so processes creating the same table at the same time never see a partially written file.
+
+        :param directory:   Folder in which the tables are stored
+        :param max_length:  Number of points to precompute per table. Defaults to 2**16
+    """
+    def __init__(self, directory, max_length=2**16):
+        self.directory = directory
+        self.max_length = int(max_length)
+        self.tables = {}
+
+    def sobol(self, n):
+        """
+            :param n:   Dimensionality of the Sobol sequence
+            :return:    Read-only array of shape ``(max_length, n)`` with the uniform Sobol points per seed
+        """
+        return self.__getTable('sobol', n, self.__generateSobol)
+
+    def halton(self, n):
+        """
+            :param n:   Dimensionality of the Halton sequence
+            :return:    Read-only array of shape ``(max_length, n)`` with the uniform Halton points in order
+        """
+        return self.__getTable('halton', n, self.__generateHalton)
+
+    def __getTable(self, kind, n, generate):
+        """ Return the cached memory map, or open (and if required, first create) the table file """
+        key = (kind, n)
+        if key not in self.tables:
+            path = os.path.join(self.directory, '{}_{}.npy'.format(kind, n))
+            table = np.load(path, mmap_mode='r') if os.path.isfile(path) else None
+            if table is None or table.shape[0] < self.max_length:
+                self.__save(path, generate(n))
+                table = np.load(path, mmap_mode='r')
+            self.tables[key] = table
+        return self.tables[key]
+
+    def __save(self, path, table):
+        """ Atomically write ``table`` to ``path`` by writing to a temporary file and renaming it """
+        guaranteeFolderExists(self.directory)
+        handle, temp_path = tempfile.mkstemp(suffix='.npy', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.save(temp_file, table)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def __generateSobol(self, n):
+        table = np.empty((self.max_length, n))
+        for seed in range(self.max_length):
+            table[seed], _ = i4_sobol(n, seed)
+        return table
+
+    def __generateHalton(self, n):
+        if not halton_available:
+            raise ImportError("Package 'ghalton' not found, Halton tables cannot be generated.")
+        return np.array(Halton(n).get(self.max_length))
 
 
 class QuasiGaussianSobolSampling(object):
@@ -64,14 +152,20 @@ class QuasiGaussianSobolSampling(object):
         :param n:       Dimensionality of the vectors to be sampled
         :param shape:   String to select between whether column (``'col'``) or row (``'row'``) vectors should be
                         returned. Defaults to column vectors
+        :param seed:    Index in the Sobol sequence to start from. Chosen randomly if None or smaller than 2
+        :param rng:     Random state to draw a random ``seed`` from, preferably a ``np.random.Generator``.
+                        Defaults to the global ``np.random`` state
+        :param table:   :class:`~QuasiRandomTable` to read precomputed points from. Points beyond the end of the table
+                        are computed as usual
     """
-    def __init__(self, n, shape='col', seed=None):
+    def __init__(self, n, shape='col', seed=None, rng=None, table=None):
         self.n = n
         self.shape = (n,1) if shape == 'col' else (1,n)
         if seed is None or seed < 2:
-            self.seed = np.random.randint(2, max(3, n**2))  # seed=1 will give a null-vector as first result
+            self.seed = randomIntegers(getRNG(rng), 2, max(3, n**2))  # seed=1 will give a null-vector as first result
         else:
             self.seed = seed
+        self.table = table.sobol(n) if table is not None else None
 
     def next(self):
         """
@@ -79,13 +173,37 @@ class QuasiGaussianSobolSampling(object):
 
             :return:    A new vector sampled from a Sobol sequence with mean 0 and standard deviation 1
         """
-        vec, seed = i4_sobol(self.n, self.seed)
-        self.seed = seed if seed > 1 else 2
+        if self.table is not None and self.seed < len(self.table):
+            vec = self.table[self.seed]
+            self.seed += 1
+        else:
+            vec, seed = i4_sobol(self.n, self.seed)
+            self.seed = seed if seed > 1 else 2
 
         vec = array(norm_dist.ppf(vec))
         vec = vec.reshape(self.shape)
         return vec
 
+    def nextBlock(self, num_samples):
+        """
+            Draw the next ``num_samples`` samples from the Sampler at once
+
+            :param num_samples: Number of samples to draw
+            :return:            An array of shape ``(n, num_samples)`` with the samples as columns
+        """
+        if self.table is not None and self.seed + num_samples <= len(self.table):
+            block = norm_dist.ppf(self.table[self.seed:self.seed+num_samples]).T
+            self.seed += num_samples
+            return block
+
+        return np.column_stack([self.next().flatten() for _ in range(num_samples)])
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler. The Sobol sequence simply continues where it left off.
+        """
+        pass
+
 
 class QuasiGaussianHaltonSampling(object):
     """
@@ -94,14 +212,18 @@ class QuasiGaussianHaltonSampling(object):
         :param n:       Dimensionality of the vectors to be sampled
         :param shape:   String to select between whether column (``'col'``) or row (``'row'``) vectors should be
                         returned. Defaults to column vectors
+        :param table:   :class:`~QuasiRandomTable` to read precomputed points from. Points beyond the end of the table
+                        are computed as usual, which requires the ``ghalton`` package
     """
-    def __init__(self, n, shape='col'):
+    def __init__(self, n, shape='col', table=None):
 
-        if not halton_available:
+        if not halton_available and table is None:
             raise ImportError("Package 'ghalton' not found, QuasiGaussianHaltonSampling not available.")
         self.n = n
         self.shape = (n,1) if shape == 'col' else (1,n)
-        self.halton = Halton(n)
+        self.table = table.halton(n) if table is not None else None
+        self.halton = Halton(n) if self.table is None else None
+        self.count = 0
 
 
     def next(self):
@@ -110,12 +232,141 @@ class QuasiGaussianHaltonSampling(object):
 
             :return:    A new vector sampled from a Halton sequence with mean 0 and standard deviation 1
         """
-        vec = self.halton.get(1)[0]
+        if self.table is not None and self.count < len(self.table):
+            vec = self.table[self.count]
+        else:
+            vec = self.__getHalton().get(1)[0]
+        self.count += 1
 
         vec = array(norm_dist.ppf(vec))
         vec = vec.reshape(self.shape)
         return vec
 
+    def nextBlock(self, num_samples):
+        """
+            Draw the next ``num_samples`` samples from the Sampler at once
+
+            :param num_samples: Number of samples to draw
+            :return:            An array of shape ``(n, num_samples)`` with the samples as columns
+        """
+        if self.table is not None and self.count + num_samples <= len(self.table):
+            block = norm_dist.ppf(self.table[self.count:self.count+num_samples]).T
+            self.count += num_samples
+            return block
+
+        return np.column_stack([self.next().flatten() for _ in range(num_samples)])
+
+    def __getHalton(self):
+        """ Continue the sequence beyond the end of the table, skipping all points already taken from the table """
+        if self.halton is None:
+            if not halton_available:
+                raise ImportError("Package 'ghalton' not found, cannot sample beyond the end of the Halton table.")
+            self.halton = Halton(self.n)
+            if self.count:
+                self.halton.get(self.count)
+        return self.halton
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler. The Halton sequence simply continues where it left off.
+        """
+        pass
+
+
+def _fastWalshHadamard(x):
+    """
+        Normalized fast Walsh-Hadamard transform along the first axis of ``x``, in O(m log m) for m rows.
+        The number of rows must be a power of two.
+
+        :param x:   Array of shape ``(m,)`` or ``(m, k)``
+        :return:    A new array of the same shape, equal to ``H x / sqrt(m)`` for the Sylvester-ordered Hadamard matrix H
+    """
+    m = x.shape[0]
+    trailing = x.shape[1:]
+    x = np.array(x, dtype=np.float64)
+    h = 1
+    while h < m:
+        x = x.reshape((m // (2*h), 2, h) + trailing)
+        a = x[:, 0]
+        b = x[:, 1]
+        x = np.stack((a + b, a - b), axis=1)
+        h *= 2
+    return x.reshape((m,) + trailing) / np.sqrt(m)
+
+
+class StructuredOrthogonalSampling(object):
+    """
+        A sampler to create (near-)orthogonal Gaussian-like vectors without forming a dense orthogonal matrix.
+
+        Every block of samples is taken from the columns of a random structured orthogonal matrix
+        ``H D_k ... H D_1``, where ``H`` is the normalized Hadamard matrix and each ``D_i`` a random diagonal
+        matrix of signs. Each column costs O(m log m) to compute using a fast Walsh-Hadamard transform, where m is
+        n rounded up to a power of two. The directions are then scaled by a chi-distributed length, so the resulting
+        vectors have the same length distribution as those of a :class:`~GaussianSampling` sampler.
+
+        Within a block, samples are exactly orthogonal if n is a power of two, and nearly orthogonal otherwise, as
+        the directions are then truncated to the first n coordinates.
+
+        :param n:               Dimensionality of the vectors to be sampled
+        :param shape:           String to select between whether column (``'col'``) or row (``'row'``) vectors should be
+                                returned. Defaults to column vectors
+        :param num_rotations:   Number of randomized Hadamard rotations ``H D_i`` to chain. Defaults to 3
+        :param rng:             Random state to draw from, preferably a ``np.random.Generator``. Defaults to the
+                                global ``np.random`` state
+    """
+    def __init__(self, n, shape='col', num_rotations=3, rng=None):
+        if n == 0:
+            raise ValueError("'n' ({}) cannot be zero".format(n))
+
+        self.n = n
+        self.shape = (n,1) if shape == 'col' else (1,n)
+        self.padded_n = 1 << int(np.ceil(np.log2(n)))
+        self.num_rotations = num_rotations
+        self.rng = getRNG(rng)
+        self.current_sample = 0
+        self.signs = None
+        self.order = None
+
+    def next(self):
+        """
+            Draw the next sample from the Sampler
+
+            :return:    A new vector from a randomly rotated orthogonal basis, with a chi-distributed length
+        """
+        direction = None
+        while direction is None:
+            if self.current_sample % self.padded_n == 0:
+                self.current_sample = 0
+                self.signs = self.rng.choice([-1.0, 1.0], size=(self.num_rotations, self.padded_n))
+                self.order = self.rng.permutation(self.padded_n)
+
+            direction = self.__direction(self.order[self.current_sample])
+            self.current_sample += 1
+
+        length = np.sqrt(self.rng.chisquare(self.n))
+        return (direction * length).reshape(self.shape)
+
+    def __direction(self, index):
+        """ Compute the unit-length (truncated) column ``index`` of the current random orthogonal matrix """
+        vec = np.zeros(self.padded_n)
+        vec[index] = 1
+        for signs in self.signs:
+            vec = _fastWalshHadamard(signs * vec)
+
+        vec = vec[:self.n]
+        length = norm(vec)
+        if length == 0:  # Only possible when truncating, in which case we simply skip this column
+            return None
+        return vec / length
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler, so the next sample is forced to be taken from a new basis.
+        """
+        self.current_sample = 0
+        self.signs = None
+        self.order = None
+
 
 class OrthogonalSampling(object):
     """
@@ -128,15 +379,16 @@ class OrthogonalSampling(object):
         :param base_sampler:    A different Sampling object from which samples to be mirrored are drawn. If no
                                 base_sampler is given, a :class:`~GaussianSampling` object will be
                                 created and used.
+        :param rng:             Random state for the default :class:`~GaussianSampling` base_sampler
     """
-    def __init__(self, n, lambda_, shape='col', base_sampler=None):
+    def __init__(self, n, lambda_, shape='col', base_sampler=None, rng=None):
         if n == 0 or lambda_ == 0:
             raise ValueError("'n' ({}) and 'lambda_' ({}) cannot be zero".format(n, lambda_))
 
         self.n = n
         self.shape = (n,1) if shape == 'col' else (1,n)
         if base_sampler is None:
-            self.base_sampler = GaussianSampling(n, shape)
+            self.base_sampler = GaussianSampling(n, shape, rng=rng)
         else:
             self.base_sampler = base_sampler
         self.num_samples = int(lambda_)
@@ -220,14 +472,15 @@ class MirroredSampling(object):
         :param base_sampler:    A different Sampling object from which samples to be mirrored are drawn. If no
                                 base_sampler is given, a :class:`~GaussianSampling` object will be
                                 created and used.
+        :param rng:             Random state for the default :class:`~GaussianSampling` base_sampler
     """
-    def __init__(self, n, shape='col', base_sampler=None):
+    def __init__(self, n, shape='col', base_sampler=None, rng=None):
         self.n = n
         self.shape = (n,1) if shape == 'col' else (1,n)
         self.mirror_next = False
         self.last_sample = None
         if base_sampler is None:
-            self.base_sampler = GaussianSampling(n, shape)
+            self.base_sampler = GaussianSampling(n, shape, rng=rng)
         else:
             self.base_sampler = base_sampler
 
@@ -268,11 +521,12 @@ class MirroredOrthogonalSampling(object):
         :param base_sampler:    A different Sampling object from which samples to be mirrored are drawn. If no
                                 base_sampler is given, a :class:`~GaussianSampling` object will be
                                 created and used.
+        :param rng:             Random state for the default :class:`~GaussianSampling` base_sampler
         :return:                A ``MirroredSampling`` object with as base sampler an ``OrthogonalSampling`` object
                                 initialized with the given parameters.
     """
-    def __init__(self, n, lambda_, shape='col', base_sampler=None):
-        sampler = OrthogonalSampling(n, lambda_, shape, base_sampler)
+    def __init__(self, n, lambda_, shape='col', base_sampler=None, rng=None):
+        sampler = OrthogonalSampling(n, lambda_, shape, base_sampler, rng=rng)
         self.base_sampler = sampler
         self.sampler = MirroredSampling(n, shape, sampler)
 
@@ -290,3 +544,270 @@ class MirroredOrthogonalSampling(object):
             Reset the internal state of this sampler, so the next sample is forced to be taken new.
         """
         self.sampler.reset()
+
+
+class FusedSampling(object):
+    """
+        A single sampler equivalent to a chain of a base sampler, :class:`~OrthogonalSampling` and
+        :class:`~MirroredSampling`, as e.g. constructed by :class:`~modea.Algorithms.CustomizedES`. Instead of
+        passing every sample through each layer of wrapper objects, the samples are produced a block at a time:
+        all base samples in a single call, orthogonalized per group of ``lambda_`` samples using a QR decomposition,
+        and mirrored by interleaving the block with its negation.
+
+        The produced stream is the same as that of the wrapper chain it replaces, up to floating point differences
+        from the orthogonalization. When no ``base_sampler`` is given, the Gaussian base samples are drawn from
+        ``rng`` in exactly the same order as a :class:`~GaussianSampling` object would.
+
+        :param n:               Dimensionality of the vectors to be sampled
+        :param lambda_:         Number of samples to be orthonormalized together. Only used if ``orthogonal`` is True
+        :param shape:           String to select between whether column (``'col'``) or row (``'row'``) vectors should be
+                                returned. Defaults to column vectors
+        :param base_sampler:    A different Sampling object from which the base samples are drawn. If no base_sampler
+                                is given, Gaussian samples are drawn directly from ``rng``
+        :param orthogonal:      Boolean switch on orthogonalizing the base samples. Default: False
+        :param mirrored:        Boolean switch on mirroring the (orthogonalized) samples. Default: False
+        :param block_size:      Minimum number of samples to produce at once, typically the number of samples used per
+                                generation. Defaults to ``lambda_``
+        :param rng:             Random state for the Gaussian base samples, preferably a ``np.random.Generator``.
+                                Defaults to the global ``np.random`` state
+    """
+    def __init__(self, n, lambda_=1, shape='col', base_sampler=None, orthogonal=False, mirrored=False,
+                 block_size=None, rng=None):
+        if n == 0 or lambda_ == 0:
+            raise ValueError("'n' ({}) and 'lambda_' ({}) cannot be zero".format(n, lambda_))
+
+        self.n = n
+        self.shape = (n,1) if shape == 'col' else (1,n)
+        self.base_sampler = base_sampler
+        self.orthogonal = orthogonal
+        self.mirrored = mirrored
+        self.rng = getRNG(rng)
+
+        # Base samples are always drawn in whole orthogonalization groups, samples are always mirrored in pairs
+        self.group_size = int(lambda_) if orthogonal else 1
+        unit_size = self.group_size * (2 if mirrored else 1)
+        block_size = int(lambda_) if block_size is None else int(block_size)
+        self.num_groups = max(1, -(-block_size // unit_size))  # Ceiling division
+
+        self.samples = None
+        self.current_sample = 0
+
+    def next(self):
+        """
+            Draw the next sample from the Sampler
+
+            :return:    A new vector from the (orthogonalized and/or mirrored) stream of base samples
+        """
+        return self.nextBlock(1).reshape(self.shape)
+
+    def nextBlock(self, num_samples):
+        """
+            Draw the next ``num_samples`` samples from the Sampler at once
+
+            :param num_samples: Number of samples to draw
+            :return:            An array of shape ``(n, num_samples)`` with the samples as columns, equal to what
+                                ``num_samples`` consecutive calls to :func:`~next` would return
+        """
+        blocks = []
+        while num_samples > 0:
+            if self.samples is None or self.current_sample == self.samples.shape[1]:
+                self.samples = self.__generateSamples()
+                self.current_sample = 0
+
+            end = min(self.current_sample + num_samples, self.samples.shape[1])
+            blocks.append(self.samples[:, self.current_sample:end])
+            num_samples -= end - self.current_sample
+            self.current_sample = end
+
+        return blocks[0] if len(blocks) == 1 else np.hstack(blocks)
+
+    def __drawBase(self, num_samples):
+        """ Draw an ``(n, num_samples)`` block of samples from the base sampler """
+        if self.base_sampler is None:
+            # Row-major order, so column i is the i-th vector GaussianSampling would have drawn
+            return self.rng.standard_normal((num_samples, self.n)).T
+        if hasattr(self.base_sampler, 'nextBlock'):
+            return np.array(self.base_sampler.nextBlock(num_samples))
+
+        block = np.empty((self.n, num_samples))
+        for i in range(num_samples):
+            block[:, i] = self.base_sampler.next().flatten()
+        return block
+
+    def __orthogonalize(self, group):
+        """ Orthonormalize the first n vectors of a group in-place, preserving their original lengths """
+        k = min(group.shape[1], self.n)
+        vectors = group[:, :k]
+        lengths = norm(vectors, axis=0)
+        q, r = np.linalg.qr(vectors)
+        diagonal = np.diag(r)
+        if np.any(np.abs(diagonal) <= 1e-12 * lengths):
+            return False  # Linearly dependent samples, Gram-Schmidt would produce a zero-vector here
+
+        # Fix the signs so Q is equal to the result of the Gram-Schmidt process
+        group[:, :k] = q * np.sign(diagonal) * lengths
+        return not any(isnan(group))
+
+    def __generateSamples(self):
+        """ Produce the next block of samples, consisting of <num_groups> whole groups """
+        groups = []
+        for _ in range(self.num_groups):
+            group = self.__drawBase(self.group_size)
+            if self.orthogonal:
+                while not self.__orthogonalize(group):
+                    group = self.__drawBase(self.group_size)
+            groups.append(group)
+        samples = groups[0] if len(groups) == 1 else np.hstack(groups)
+
+        if self.mirrored:
+            mirrored_samples = np.empty((self.n, 2*samples.shape[1]))
+            mirrored_samples[:, 0::2] = samples
+            mirrored_samples[:, 1::2] = -samples
+            samples = mirrored_samples
+
+        return samples
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler, so the next sample is forced to be taken new.
+        """
+        self.samples = None
+        self.current_sample = 0
+        if self.base_sampler is not None:
+            self.base_sampler.reset()
+
+
+class PrefetchingSampler(object):
+    """
+        A wrapper around any other sampler that draws blocks of ``(n, block_size)`` future samples on a background
+        thread, so sampling can overlap with e.g. waiting for fitness evaluations. At most ``buffer_size`` blocks
+        are kept ready at any time.
+
+        The returned sequence is exactly the sequence the wrapped sampler would produce, as only the background thread
+        ever draws from it. Whenever the buffer is discarded by :func:`~reset`, the background thread first fills the
+        buffer completely, so the amount of discarded samples never depends on timing. For the results to be fully
+        independent of timing, the wrapped sampler should have a random state of its own (see e.g. the ``rng``
+        argument of :class:`~GaussianSampling`) rather than share the global ``np.random`` state with the main thread.
+
+        :param sampler:     The Sampling object to draw samples from
+        :param block_size:  Number of samples per prefetched block, typically lambda
+        :param buffer_size: Maximum number of blocks to prefetch. Defaults to 2
+    """
+    def __init__(self, sampler, block_size, buffer_size=2):
+        if block_size < 1 or buffer_size < 1:
+            raise ValueError("'block_size' ({}) and 'buffer_size' ({}) must be at least 1".format(block_size,
+                                                                                                buffer_size))
+        self.sampler = sampler
+        self.n = sampler.n
+        self.shape = sampler.shape
+        self.block_size = int(block_size)
+        self.buffer_size = int(buffer_size)
+
+        self.block = None
+        self.current_sample = 0
+        self.__buffer = deque()
+        self.__produced = 0
+        self.__consumed = 0
+        self.__stopping = False
+        self.__error = None
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def next(self):
+        """
+            Draw the next sample from the Sampler
+
+            :return:    The next vector from the prefetched blocks of the wrapped sampler
+        """
+        if self.block is None or self.current_sample == self.block_size:
+            self.block = self.__takeBlock()
+            self.current_sample = 0
+
+        sample = self.block[:, self.current_sample].reshape(self.shape)
+        self.current_sample += 1
+        return sample
+
+    def __takeBlock(self):
+        """ Wait for the next prefetched block, (re)starting the background thread if required """
+        if self.__thread is None:
+            self.__start()
+
+        with self.__condition:
+            while not self.__buffer and self.__error is None:
+                self.__condition.wait()
+            error = self.__error
+            if error is None:
+                block = self.__buffer.popleft()
+                self.__consumed += 1
+                self.__condition.notify_all()
+
+        if error is not None:
+            self.__stop()
+            raise error
+        return block
+
+    def __start(self):
+        self.__stopping = False
+        self.__thread = threading.Thread(target=self.__prefetch)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __prefetch(self):
+        """ Background loop: keep the buffer filled. Only stops once the buffer is full and a stop was requested """
+        with self.__condition:
+            while True:
+                while self.__produced - self.__consumed >= self.buffer_size and not self.__stopping:
+                    self.__condition.wait()
+                if self.__produced - self.__consumed >= self.buffer_size:
+                    return
+
+                self.__condition.release()
+                try:
+                    if hasattr(self.sampler, 'nextBlock'):
+                        block = np.array(self.sampler.nextBlock(self.block_size))
+                    else:
+                        block = np.empty((self.n, self.block_size))
+                        for i in range(self.block_size):
+                            block[:, i] = self.sampler.next().flatten()
+                except Exception as e:
+                    block = None
+                    error = e
+                finally:
+                    self.__condition.acquire()
+
+                if block is None:
+                    self.__error = error
+                    self.__condition.notify_all()
+                    return
+                self.__buffer.append(block)
+                self.__produced += 1
+                self.__condition.notify_all()
+
+    def __stop(self):
+        """ Stop the background thread after it has filled the buffer, and discard all prefetched samples """
+        if self.__thread is not None:
+            with self.__condition:
+                self.__stopping = True
+                self.__condition.notify_all()
+            self.__thread.join()
+            self.__thread = None
+
+        self.__buffer.clear()
+        self.__produced = self.__consumed = 0
+        self.__error = None
+        self.block = None
+        self.current_sample = 0
+
+    def reset(self):
+        """
+            Reset the internal state of this sampler and the wrapped sampler, so the next sample is forced to be taken
+            new. All prefetched samples are discarded.
+        """
+        self.__stop()
+        self.sampler.reset()
+
+    def close(self):
+        """
+            Stop the background thread and discard all prefetched samples.
+        """
+        self.__stop()
@@ -12,48 +12,146 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 __author__ = 'Sander van Rijn <svr003@gmail.com>'
 
 import numpy as np
-from scipy import stats
-from modea import Utils
+from modea.Utils import getRNG
+from modea.Individual import MixedIntPopulation
+
+
+def bestIndices(fitnesses, mu):
+    """
+        Determine the indices of the (mu) lowest fitness values, without sorting all values.
+
+        Ties are broken by position: of two equal fitness values, the one with the lower index is selected first.
+        The result is therefore the same as the first ``mu`` elements of a stable ascending sort, as done by
+        ``list.sort``. NaN values are considered worse than any other value.
+
+        :param fitnesses:   Array or list of fitness values
+        :param mu:          Number of indices to select
+        :returns:           Array of at most ``mu`` indices, sorted by ascending fitness
+    """
+    fitnesses = np.asarray(fitnesses)
+    return _sortedSlice(fitnesses, 0, min(mu, len(fitnesses)))
+
+
+def _sortedSlice(fitnesses, start, stop):
+    """
+        Indices at positions ``[start, stop)`` of a stable ascending argsort of ``fitnesses``. Uses ``np.partition``
+        to find the values at both ends of the slice, so only the values in between have to be sorted.
+    """
+    num_values = len(fitnesses)
+    if stop <= start:
+        return np.array([], dtype=np.intp)
+    if (start == 0 and stop == num_values) or (fitnesses.dtype.kind == 'f' and np.isnan(fitnesses).any()):
+        return _stableArgsort(fitnesses)[start:stop]
+
+    partitioned = np.partition(fitnesses, [start, stop-1])
+    low, high = partitioned[start], partitioned[stop-1]
+
+    # All values within [low, high] in index order, of which the first few may sort before ``start``
+    candidates = np.flatnonzero((fitnesses >= low) & (fitnesses <= high))
+    order = candidates[_stableArgsort(fitnesses[candidates])]
+    offset = start - np.count_nonzero(fitnesses < low)
+    return order[offset:offset + stop - start]
+
+
+def _stableArgsort(fitnesses):
+    """ Stable ascending argsort with NaN values placed last """
+    if fitnesses.dtype.kind == 'f':
+        return np.argsort(fitnesses, kind='stable')  # NaN is sorted last by numpy
+    return np.array(sorted(range(len(fitnesses)), key=fitnesses.__getitem__), dtype=np.intp)
+
+
+def _candidates(population, new_population, param):
+    """ The individuals to select from: the new population, followed by the old population if elitist """
+    if param.elitist:
+        return list(new_population) + list(population)
+    return new_population
 
 
 def bestGA(population, new_population, param):
     """
-        Given the population, return the (mu) best
+        Given the population, return the (mu) best. Ties are won by the individual that appears first in
+        ``new_population``, followed by ``population`` when elitist selection is used.
 
-        :param population:      List of :class:`~modea.Individual.MixedIntIndividual` objects containing the previous generation
-        :param new_population:  List of :class:`~modea.Individual.MixedIntIndividual` objects containing the new generation
+        :param population:      List of :class:`~modea.Individual.MixedIntIndividual` objects containing the previous
+                                generation, or a :class:`~modea.Individual.MixedIntPopulation`
+        :param new_population:  List of :class:`~modea.Individual.MixedIntIndividual` objects containing the new
+                                generation, or a :class:`~modea.Individual.MixedIntPopulation`
         :param param:           :class:`~modea.Parameters.Parameters` object for storing all parameters, options, etc.
-        :returns:               A slice of the sorted new_population list.
+        :returns:               A sorted list of the (mu) best individuals, or a new
+                                :class:`~modea.Individual.MixedIntPopulation` with the (mu) best rows in sorted order
     """
-    if param.elitist:
-        new_population.extend(population)
-    new_population.sort(key=Utils.getFitness)  # sort ascending
+    if isinstance(new_population, MixedIntPopulation):
+        if param.elitist:
+            new_population = new_population.concatenate(population)
+        return new_population.take(bestIndices(new_population.fitness, param.mu_int))
 
-    return new_population[:param.mu_int]
+    candidates = _candidates(population, new_population, param)
+    indices = bestIndices([ind.fitness for ind in candidates], param.mu_int)
+    return [candidates[i] for i in indices]
 
 
 def best(population, new_population, param):
     """
         Given the population, return the (mu) best. Also performs some 'housekeeping' for the CMA-ES by collecting
-        all genotypes and most recent mutation vectors and storing them in the ``param`` object.
+        the genotypes and most recent mutation vectors of the selected individuals and storing them in the ``param``
+        object. When active CMA is used, the (mu) worst individuals are collected after the (mu) best.
+        Ties are won by the individual that appears first in ``new_population``, followed by ``population`` when
+        elitist selection is used.
 
         :param population:      List of :class:`~modea.Individual.FloatIndividual` objects containing the previous generation
         :param new_population:  List of :class:`~modea.Individual.FloatIndividual` objects containing the new generation
         :param param:           :class:`~modea.Parameters.Parameters` object for storing all parameters, options, etc.
-        :returns:               A slice of the sorted new_population list.
+        :returns:               A sorted list of the (mu) best individuals.
     """
-    if param.elitist:
-        new_population.extend(population)
+    candidates = _candidates(population, new_population, param)
+    return _selectBest(candidates, np.array([ind.fitness for ind in candidates]), param)
+
+
+def _selectBest(candidates, fitnesses, param):
+    """
+        Selection step shared by :func:`~best` and :func:`~pairwise`
 
-    new_population.sort(key=Utils.getFitness)  # sort ascending
+        :param candidates:  List of all individuals to select from
+        :param fitnesses:   Array with the fitness of each candidate
+        :param param:       :class:`~modea.Parameters.Parameters` object for storing all parameters, options, etc.
+        :returns:           A sorted list of the (mu) best candidates.
+    """
+    mu = param.mu_int
+    num_candidates = len(candidates)
+
+    if param.active and num_candidates <= 2*mu:
+        indices = _stableArgsort(fitnesses)
+        collected = indices
+    else:
+        indices = bestIndices(fitnesses, mu)
+        collected = indices
+        if param.active:
+            collected = np.concatenate((indices, _sortedSlice(fitnesses, num_candidates - mu, num_candidates)))
 
     # TODO: REMOVE THESE OPERATIONS FROM THIS FUNCTION, UNEXPECTED/UNDOCUMENTED FUNCTIONALITY
-    offspring = np.column_stack([ind.genotype for ind in new_population])  # Update to use the actual mutations
-    offset = np.column_stack([ind.mutation_vector for ind in new_population])
-    param.all_offspring = offspring
-    param.offset = offset
+    param.all_offspring = np.column_stack([candidates[i].genotype for i in collected])
+    param.offset = np.column_stack([candidates[i].mutation_vector for i in collected])
+
+    return [candidates[i] for i in indices[:mu]]
 
-    return new_population[:param.mu_int]
+
+def pairwiseWinners(fitnesses):
+    """
+        Determine the best individual of each consecutive pair, i.e. ``fitnesses[0:2]``, ``fitnesses[2:4]``, etc.
+        The first of a pair only wins if its fitness is strictly lower. If there is an odd number of values, the
+        last one has no partner and is always included as a winner.
+
+        :param fitnesses:   Array or list of fitness values
+        :returns:           Array of the indices of all winners, in ascending order
+    """
+    fitnesses = np.asarray(fitnesses)
+    num_pairs = len(fitnesses) // 2
+    pairs = fitnesses[:2*num_pairs].reshape((num_pairs, 2))
+    second_wins = np.logical_not((pairs[:, 0] < pairs[:, 1]).astype(bool))
+    winners = 2*np.arange(num_pairs) + second_wins
+    if len(fitnesses) % 2 != 0:
+        winners = np.append(winners, len(fitnesses) - 1)
+    return winners
 
 
 def pairwise(population, new_population, param):
@@ -62,68 +160,142 @@ def pairwise(population, new_population, param):
         make the final selection. Intended for use with a :class:`~modea.Sampling.MirroredSampling`
         sampler to prevent step-size bias.
 
-        Assumes that new_population contains pairs as [P1_a, P1_b, P2_a, P2_b, etc ... ]
+        Assumes that new_population contains pairs as [P1_a, P1_b, P2_a, P2_b, etc ... ]. A trailing individual
+        without partner, e.g. because sequential evaluation was stopped by the budget halfway through a pair, is
+        passed on to the final selection as if it won its pair.
 
         :param population:      List of :class:`~modea.Individual.FloatIndividual` objects containing the previous generation
         :param new_population:  List of :class:`~modea.Individual.FloatIndividual` objects containing the new generation
         :param param:           :class:`~modea.Parameters.Parameters` object for storing all parameters, options, etc.
-        :returns:               A slice of the sorted new_population list.
+        :returns:               A sorted list of the (mu) best individuals.
     """
-    pairwise_filtered = []
-    num_pairs = len(new_population) // 2
-
-    if len(new_population) % 2 != 0:
-        # raise Exception("Error: attempting to perform pairwise selection on an odd number of individuals")
-        pairwise_filtered.append(new_population[-1])  # TODO FIXME: TEMP FIX, OFTEN INCORRECT
-
-    # Select the best (=lowest) fitness for each consecutive pair of individuals
-    for i in range(0, num_pairs):
-        index = i*2
-        if new_population[index].fitness < new_population[index+1].fitness:
-            pairwise_filtered.append(new_population[index])
-        else:
-            pairwise_filtered.append(new_population[index+1])
+    fitnesses = np.array([ind.fitness for ind in new_population])
+    winners = pairwiseWinners(fitnesses)
 
-    # After pairwise filtering, we can re-use the regular selection function
-    return best(population, pairwise_filtered, param)
+    # After pairwise filtering, we can re-use the regular selection step
+    candidates = _candidates(population, [new_population[i] for i in winners], param)
+    fitnesses = fitnesses[winners]
+    if param.elitist:
+        fitnesses = np.concatenate((fitnesses, [ind.fitness for ind in population]))
+    return _selectBest(candidates, fitnesses, param)
 
 
-def roulette(population, new_population, param, force_unique=False):
+def roulette(population, new_population, param, force_unique=False, rng=None, sus=False):
     """
-        Given the population, return mu individuals, selected by roulette, using 1/fitness as probability
+        Given the population, return mu individuals, selected by roulette, using 1/fitness as probability.
+        Individuals with a fitness of 0 are selected with equal probability before any others.
 
         :param population:      List of :class:`~modea.Individual.FloatIndividual` objects containing the previous generation
         :param new_population:  List of :class:`~modea.Individual.FloatIndividual` objects containing the new generation
         :param param:           :class:`~modea.Parameters.Parameters` object for storing all parameters, options, etc.
-        :param force_unique:    Determine if an individual from the original population may be selected multiple times
-        :returns:               A slice of the sorted new_population list.
+        :param force_unique:    If True, an individual may not be selected multiple times: individuals are drawn
+                                without replacement using the keys of Efraimidis and Spirakis
+        :param rng:             Random state to draw from. Default: the global ``np.random`` state
+        :param sus:             If True, use stochastic universal sampling instead of mu independent draws.
+                                Ignored if ``force_unique`` is True
+        :returns:               A list of mu selected individuals, in the order in which they were drawn.
     """
-    if param.elitist:
-        new_population.extend(population)
-
-    new_population.sort(key=Utils.getFitness)  # sort descending
-    offspring = np.column_stack((ind.genotype for ind in new_population))
-    param.all_offspring = offspring
+    rng = getRNG(rng)
+    candidates = _candidates(population, new_population, param)
+    param.all_offspring = np.column_stack([ind.genotype for ind in candidates])
+    mu = param.mu_int
 
     # TODO: warning with negative fitness values?
     # Use normalized 1/fitness as probability for picking a certain individual
-    norm_inverses = np.array([1/abs(ind.fitness) for ind in new_population])  # We take the absolute just to be sure it works
-    norm_inverses /= sum(norm_inverses)
-
-    # Create a discrete sampler using the normalized 1/fitness values as probabilities
-    roulette_sampler = stats.rv_discrete(name='roulette', values=(list(range(len(new_population))), norm_inverses))
+    with np.errstate(divide='ignore'):
+        weights = 1 / np.abs(np.array([ind.fitness for ind in candidates], dtype=np.float64))  # abs just to be sure
+    if np.isinf(weights).any():
+        weights = np.isinf(weights).astype(np.float64)
+    probabilities = weights / np.sum(weights)
 
     if force_unique:
-        indices = set()
-        while len(indices) < param.mu_int:
-            to_be_sampled = param.mu_int - len(indices)
-            # Draw <to_be_sampled> samples from the defined distribution
-            sample = roulette_sampler.rvs(size=to_be_sampled)
-            indices.update(sample)
+        indices = _drawWithoutReplacement(probabilities, mu, rng)
+    elif sus:
+        indices = _stochasticUniversalSampling(probabilities, mu, rng)
+    else:
+        indices = _aliasDraw(_aliasTable(probabilities), mu, rng)
+
+    return [candidates[index] for index in indices]
+
+
+def _aliasTable(probabilities):
+    """
+        Create the table for Walker's alias method, as constructed by Vose's algorithm in O(n)
+
+        :param probabilities:   Array of n probabilities that sum to 1
+        :returns:               Tuple (acceptance, alias) of arrays of length n: a uniformly drawn column ``i`` is
+                                accepted with probability ``acceptance[i]``, otherwise ``alias[i]`` is selected
+    """
+    num_values = len(probabilities)
+    acceptance = np.asarray(probabilities, dtype=np.float64) * num_values
+    alias = np.arange(num_values)
+
+    small = list(np.flatnonzero(acceptance < 1))
+    large = list(np.flatnonzero(acceptance >= 1))
+    while small and large:
+        less, more = small.pop(), large.pop()
+        alias[less] = more
+        acceptance[more] -= 1 - acceptance[less]
+        if acceptance[more] < 1:
+            small.append(more)
+        else:
+            large.append(more)
+
+    # Any remaining values are only left due to rounding errors, and should be accepted with probability 1
+    acceptance[small] = 1
+    acceptance[large] = 1
+    return acceptance, alias
+
+
+def _aliasDraw(table, size, rng):
+    """
+        Draw from the distribution described by an alias table in O(1) per value
+
+        :param table:   Tuple (acceptance, alias) as created by :func:`~_aliasTable`
+        :param size:    Number of values to draw
+        :param rng:     Random state to draw from
+        :returns:       Array of ``size`` drawn indices
+    """
+    acceptance, alias = table
+    columns = np.floor(rng.random(size) * len(acceptance)).astype(np.intp)
+    accepted = rng.random(size) < acceptance[columns]
+    return np.where(accepted, columns, alias[columns])
+
+
+def _drawWithoutReplacement(probabilities, size, rng):
+    """
+        Weighted random sampling without replacement by Efraimidis and Spirakis: the ``size`` values with the largest
+        keys ``u^(1/p)`` are selected, which is done here in log-space as ``log(u)/p``
+
+        :param probabilities:   Array of n probabilities
+        :param size:            Number of values to draw. At most n values are returned
+        :param rng:             Random state to draw from
+        :returns:               Array of drawn indices, in the order in which they would have been drawn one-by-one
+    """
+    with np.errstate(divide='ignore'):
+        keys = np.log(rng.random(len(probabilities))) / probabilities
+    size = min(size, len(keys))
+    if size < len(keys):
+        selected = np.argpartition(-keys, size-1)[:size]
     else:
-        indices = roulette_sampler.rvs(size=param.mu_int)
+        selected = np.arange(len(keys))
+    return selected[np.argsort(-keys[selected], kind='stable')]
 
-    return [new_population[index] for index in indices]
+
+def _stochasticUniversalSampling(probabilities, size, rng):
+    """
+        Stochastic universal sampling: select ``size`` values using equally spaced pointers with a single random
+        offset, which guarantees that every value is selected at least ``floor(size*p)`` times
+
+        :param probabilities:   Array of n probabilities that sum to 1
+        :param size:            Number of values to draw
+        :param rng:             Random state to draw from
+        :returns:               Array of ``size`` drawn indices, in ascending order
+    """
+    cumulative = np.cumsum(probabilities)
+    pointers = (rng.random() + np.arange(size)) / size
+    indices = np.searchsorted(cumulative, pointers * cumulative[-1], side='right')
+    return np.minimum(indices, len(probabilities) - 1)
 
 
 def onePlusOneSelection(population, new_population, t, param):
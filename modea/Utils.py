@@ -265,6 +265,22 @@ def chunkListByLength(iterable, length):
         start, end = end, end+length
 
 
+def roundUpToMultiple(value, multiple):
+    """
+        Round up to the nearest multiple, e.g. to align a population size with the number of evaluation workers
+
+        >>> roundUpToMultiple(10, 8)
+        16
+
+        :param value:       Integer value to round
+        :param multiple:    Positive integer to round to a multiple of, or None to leave the value as is
+        :return:            The smallest multiple of ``multiple`` that is at least ``value``
+    """
+    if not multiple:
+        return value
+    return -(-value // multiple) * multiple
+
+
 def guaranteeFolderExists(path_name):
     """ Make sure the given path exists after this call """
     try:
@@ -273,6 +289,63 @@ def guaranteeFolderExists(path_name):
         pass  # Folder exists, nothing to be done
 
 
+def getRNG(rng=None):
+    """
+        Returns the random state to draw from: the given ``rng`` if any, otherwise the global ``np.random`` state.
+        Both support the common part of the ``np.random.Generator`` and ``np.random.RandomState`` interfaces, such as
+        ``standard_normal``, ``random``, ``choice`` and ``permutation``.
+
+        :param rng: A ``np.random.Generator``, ``np.random.RandomState`` or None
+        :return:    ``rng`` or the ``np.random`` module
+    """
+    return np.random if rng is None else rng
+
+
+def createRNG(seed=None):
+    """
+        Create a new ``np.random.Generator`` based on the PCG64 bit generator.
+
+        :param seed:    Integer seed, ``np.random.SeedSequence`` or None for fresh entropy from the OS
+        :return:        A ``np.random.Generator`` object
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return np.random.Generator(np.random.PCG64(seed))
+
+
+def spawnRNGs(seed, num_streams):
+    """
+        Create independent random number streams, e.g. one for each of a set of parallel runs. The streams are
+        spawned from a single ``np.random.SeedSequence``, so the same seed always reproduces the same set of streams.
+
+        >>> rngs = spawnRNGs(42, 1000)
+        >>> [_customizedES(n, fitnessFunction, budget, rng=rng) for rng in rngs]
+
+        :param seed:        Integer seed, ``np.random.SeedSequence`` or None for fresh entropy from the OS
+        :param num_streams: Number of independent streams to create
+        :return:            List of ``num_streams`` ``np.random.Generator`` objects
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [createRNG(child) for child in seed.spawn(num_streams)]
+
+
+def randomIntegers(rng, low, high=None, size=None):
+    """
+        Draw random integers from the half-open interval [low, high) for any random state returned by
+        :func:`~getRNG`, as ``np.random.Generator`` and ``np.random.RandomState`` name this function differently.
+
+        :param rng:     Random state as returned by :func:`~getRNG`
+        :param low:     Lowest integer to be drawn, or ``high`` if ``high`` is None (in which case low is 0)
+        :param high:    One above the highest integer to be drawn
+        :param size:    Output shape. Default: None, a single value
+        :return:        Random integer(s)
+    """
+    if hasattr(rng, 'integers'):
+        return rng.integers(low, high, size=size)
+    return rng.randint(low, high, size=size)
+
+
 @total_ordering
 class ESFitness(object):
     """
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This module contains a small evaluation cluster over TCP sockets, to spread the evaluations of a single optimizer
+over several machines without any third-party scheduler. Requires Python 3.
+
+The :class:`~Coordinator` runs inside the optimizer's process, created by passing ``distributed='host:port'`` to an
+:class:`~modea.Algorithms.EvolutionaryOptimizer`, where it is used as the ``fitnessFunction`` in parallel mode. It
+serves the candidates of each batch to any number of workers, started on any machine as::
+
+    python -m modea.worker host:port module:function
+
+Workers pull a few candidates at a time, and return their fitness values together with the request for the next
+ones, which amortizes the round-trips. While evaluating, workers send heartbeats: the candidates of a worker that
+disconnects, or has not been heard from for ``heartbeat_timeout`` seconds, are reassigned to the other workers.
+
+Example::
+
+    with CustomizedES(n, None, budget, distributed='0.0.0.0:5000') as optimizer:
+        optimizer.runOptimizer()
+
+Messages are JSON objects, each preceded by its length as a 4-byte unsigned integer. As no code or pickled objects
+are exchanged, a worker can only ever evaluate the function it was started with.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__author__ = 'Sander van Rijn <svr003@gmail.com>'
+
+import json
+import socketserver
+import struct
+import threading
+from collections import deque
+from itertools import count
+from timeit import default_timer
+
+
+_header = struct.Struct('!I')
+
+
+def sendMessage(sock, message):
+    """
+        Send a message as length-prefixed JSON
+
+        :param sock:    Connected socket
+        :param message: JSON-serializable dictionary
+    """
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_header.pack(len(data)) + data)
+
+
+def receiveMessage(sock):
+    """
+        Receive a single length-prefixed JSON message
+
+        :param sock:    Connected socket
+        :returns:       The received dictionary, or None if the connection was closed
+    """
+    header = _receiveExactly(sock, _header.size)
+    if header is None:
+        return None
+    data = _receiveExactly(sock, _header.unpack(header)[0])
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+
+def _receiveExactly(sock, num_bytes):
+    """ :returns: Exactly ``num_bytes`` bytes read from the socket, or None if the connection was closed first """
+    data = b''
+    while len(data) < num_bytes:
+        chunk = sock.recv(num_bytes - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def parseAddress(address):
+    """
+        :param address: String of the form ``host:port``
+        :returns:       Tuple ``(host, port)``
+    """
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    """ Serves a single connected worker on behalf of the :class:`~Coordinator` """
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker_id = coordinator.registerWorker()
+        try:
+            while True:
+                message = receiveMessage(self.request)
+                if message is None:
+                    break
+                coordinator.heardFrom(worker_id)
+
+                if message['type'] == 'error':
+                    coordinator.reportError(message['task'], message['message'])
+                elif message['type'] == 'pull':
+                    coordinator.storeResults(message['results'])
+                    tasks = coordinator.assignTasks(worker_id, message['max_tasks'])
+                    if tasks is None:
+                        sendMessage(self.request, {'type': 'stop'})
+                        break
+                    sendMessage(self.request, {'type': 'tasks', 'tasks': tasks})
+        except (OSError, ValueError):
+            pass  # Broken connection or message: treated as a disconnected worker
+        finally:
+            coordinator.unregisterWorker(worker_id)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator(object):
+    """
+        Parallel evaluator that serves the candidates of each batch to workers connected over TCP, see
+        :mod:`modea.worker`. The server is started right away, so workers can connect before the first batch.
+
+        :param host:                Host name or address to listen on. Default: 'localhost'
+        :param port:                Port to listen on. Default: 0, any free port, see :attr:`~address`
+        :param heartbeat_timeout:   Time in seconds after which a worker that has not been heard from is considered
+                                    dead, and its candidates are reassigned. Default: 10
+        :param worker_timeout:      Time in seconds a batch may wait while no worker at all is connected, e.g. because
+                                    all workers have died, before a RuntimeError is raised. Default: 60. If None, wait
+                                    for workers indefinitely
+    """
+
+    def __init__(self, host='localhost', port=0, heartbeat_timeout=10, worker_timeout=60):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.worker_timeout = worker_timeout
+        self.condition = threading.Condition()
+        self.closing = False
+
+        self.task_ids = count()
+        self.pending = deque()  # Ids of the tasks that still have to be assigned to a worker
+        self.genotypes = {}     # Genotypes of the tasks in the current batch, by task id
+        self.results = {}       # Fitness values of the finished tasks in the current batch, by task id
+        self.assigned = {}      # Ids of the tasks assigned to each worker, by worker id
+        self.last_seen = {}     # Time at which each worker was last heard from, by worker id
+        self.worker_ids = count()
+        self.error = None
+        self.num_reassigned = 0
+
+        self.server = _Server((host, port), _WorkerHandler)
+        self.server.coordinator = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+
+    @property
+    def address(self):
+        """ ``host:port`` on which the coordinator listens, as given to :mod:`modea.worker` """
+        host, port = self.server.server_address[:2]
+        return '{}:{}'.format(host, port)
+
+
+    @property
+    def num_workers(self):
+        """ Number of currently connected workers """
+        with self.condition:
+            return len(self.last_seen)
+
+
+    def __call__(self, genotypes):
+        """
+            :param genotypes:   List of genotypes to evaluate
+            :returns:           List of fitness values, in the same order as ``genotypes``
+            :raises RuntimeError: If an evaluation failed on a worker, or no worker was connected for longer than
+                                ``worker_timeout`` seconds
+        """
+        with self.condition:
+            ids = [next(self.task_ids) for _ in genotypes]
+            self.genotypes = {task_id: [float(x) for x in genotype.flatten()]
+                              for task_id, genotype in zip(ids, genotypes)}
+            self.results = {}
+            self.pending.extend(ids)
+            self.condition.notify_all()
+
+            without_workers_since = default_timer()
+            no_workers = False
+            while len(self.results) < len(ids) and self.error is None:
+                self.condition.wait(timeout=min(self.heartbeat_timeout, self.worker_timeout or 1, 1))
+                self.reassignDead()
+                if self.last_seen:
+                    without_workers_since = default_timer()
+                elif self.worker_timeout is not None and \
+                        default_timer() - without_workers_since > self.worker_timeout:
+                    no_workers = True
+                    break
+
+            error, self.error = self.error, None
+            self.genotypes = {}
+            self.pending.clear()
+            if error is not None:
+                raise RuntimeError("Evaluation failed on a worker: {}".format(error))
+            if no_workers:
+                raise RuntimeError("No worker has been connected for {} seconds".format(self.worker_timeout))
+            return [self.results[task_id] for task_id in ids]
+
+
+    def registerWorker(self):
+        with self.condition:
+            worker_id = next(self.worker_ids)
+            self.assigned[worker_id] = set()
+            self.last_seen[worker_id] = default_timer()
+            return worker_id
+
+
+    def unregisterWorker(self, worker_id):
+        """ Forget a disconnected worker, and reassign its unfinished tasks """
+        with self.condition:
+            self._requeue(self.assigned.pop(worker_id, ()))
+            self.last_seen.pop(worker_id, None)
+
+
+    def heardFrom(self, worker_id):
+        with self.condition:
+            if worker_id in self.last_seen:
+                self.last_seen[worker_id] = default_timer()
+
+
+    def storeResults(self, results):
+        """
+            :param results: List of ``[task_id, fitness]`` pairs. Results of tasks that are no longer part of the
+                            current batch, or were already finished by another worker, are ignored
+        """
+        with self.condition:
+            for task_id, fitness in results:
+                if task_id in self.genotypes and task_id not in self.results:
+                    self.results[task_id] = fitness
+            for tasks in self.assigned.values():
+                tasks.difference_update(task_id for task_id, _ in results)
+            self.condition.notify_all()
+
+
+    def reportError(self, task_id, message):
+        with self.condition:
+            if task_id in self.genotypes:
+                self.error = message
+                self.condition.notify_all()
+
+
+    def assignTasks(self, worker_id, max_tasks):
+        """
+            Wait until there are tasks to assign to the given worker
+
+            :param worker_id:   Id of the worker requesting tasks
+            :param max_tasks:   Maximum number of tasks to assign
+            :returns:           List of ``[task_id, genotype]`` pairs, or None if the coordinator is closing
+        """
+        with self.condition:
+            while not self.pending and not self.closing:
+                self.condition.wait()
+            if self.closing:
+                return None
+
+            tasks = [self.pending.popleft() for _ in range(min(max_tasks, len(self.pending)))]
+            self.assigned[worker_id].update(tasks)
+            self.last_seen[worker_id] = default_timer()
+            return [[task_id, self.genotypes[task_id]] for task_id in tasks]
+
+
+    def reassignDead(self):
+        """ Reassign the unfinished tasks of all workers that have not been heard from in time """
+        with self.condition:
+            now = default_timer()
+            for worker_id, tasks in self.assigned.items():
+                if tasks and now - self.last_seen[worker_id] > self.heartbeat_timeout:
+                    self._requeue(tasks)
+                    tasks.clear()
+
+
+    def _requeue(self, tasks):
+        tasks = [task_id for task_id in tasks if task_id in self.genotypes and task_id not in self.results]
+        self.pending.extendleft(sorted(tasks, reverse=True))
+        self.num_reassigned += len(tasks)
+        self.condition.notify_all()
+
+
+    def close(self):
+        """ Tell all workers to stop, and stop the server """
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Worker entry point of the evaluation cluster in :mod:`modea.distributed`. Start a worker with::
+
+    python -m modea.worker host:port module:function [--batch-size 4] [--heartbeat 1]
+
+where ``host:port`` is the address of the :class:`~modea.distributed.Coordinator`, and ``module:function`` names an
+importable fitness function that accepts a single genotype as a numpy array. The worker runs until the coordinator
+stops it or closes the connection.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__author__ = 'Sander van Rijn <svr003@gmail.com>'
+
+import argparse
+import importlib
+import socket
+import threading
+import numpy as np
+from modea.distributed import parseAddress, receiveMessage, sendMessage
+
+
+def importFunction(name):
+    """
+        :param name:    String of the form ``module:function``
+        :returns:       The named function
+    """
+    module_name, function_name = name.split(':', 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def _sendHeartbeats(sock, lock, interval, stopped):
+    """ Send a heartbeat every ``interval`` seconds until ``stopped`` is set """
+    while not stopped.wait(interval):
+        try:
+            with lock:
+                sendMessage(sock, {'type': 'heartbeat'})
+        except OSError:
+            return  # The connection was closed, by the coordinator or by the worker itself
+
+
+def runWorker(address, fitnessFunction, batch_size=4, heartbeat_interval=1.0):
+    """
+        Connect to a coordinator and evaluate the candidates it serves until it tells the worker to stop
+
+        :param address:             ``host:port`` of the coordinator
+        :param fitnessFunction:     Function that accepts a single genotype and returns its fitness
+        :param batch_size:          Maximum number of candidates to request at once. Default: 4
+        :param heartbeat_interval:  Time in seconds between heartbeats while evaluating. Default: 1
+        :returns:                   The number of candidates evaluated
+    """
+    sock = socket.create_connection(parseAddress(address))
+    lock = threading.Lock()
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=_sendHeartbeats, args=(sock, lock, heartbeat_interval, stopped), daemon=True)
+    heartbeat.start()
+
+    num_evaluated = 0
+    results = []
+    try:
+        while True:
+            with lock:
+                sendMessage(sock, {'type': 'pull', 'results': results, 'max_tasks': batch_size})
+            message = receiveMessage(sock)
+            if message is None or message['type'] == 'stop':
+                break
+
+            results = []
+            for task_id, genotype in message['tasks']:
+                try:
+                    fitness = float(fitnessFunction(np.array(genotype)))
+                except Exception as e:
+                    with lock:
+                        sendMessage(sock, {'type': 'error', 'task': task_id, 'message': repr(e)})
+                    raise
+                results.append([task_id, fitness])
+                num_evaluated += 1
+    except OSError:
+        pass  # The coordinator has gone away
+    finally:
+        stopped.set()
+        sock.close()
+    return num_evaluated
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Evaluate candidates served by a modea.distributed.Coordinator")
+    parser.add_argument('address', help="host:port of the coordinator")
+    parser.add_argument('function', help="Fitness function to evaluate, as module:function")
+    parser.add_argument('--batch-size', type=int, default=4, help="Maximum number of candidates to request at once")
+    parser.add_argument('--heartbeat', type=float, default=1.0, help="Time in seconds between heartbeats")
+    args = parser.parse_args(args)
+
+    runWorker(args.address, importFunction(args.function), args.batch_size, args.heartbeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import unittest
 import numpy as np
 import random
-from modea.Algorithms import _onePlusOneES, _customizedES
+from modea.Algorithms import _onePlusOneES, _customizedES, CustomizedES
+from modea.Parameters import _decomposeCovariance
 
 
 def sphere(X):
@@ -107,6 +108,207 @@ class CMATest(unittest.TestCase):
         np.testing.assert_array_almost_equal([[-0.037539876507280745], [0.5006237700034122], [0.007162824278235114],
                                               [0.8674124073459843], [-0.7366419353773903]], best_ind.genotype.tolist())
 
+
+class GeneratorCMATest(unittest.TestCase):
+    def test_reproducible(self):
+        first = _customizedES(5, sphere, 250, rng=np.random.default_rng(42))
+        second = _customizedES(5, sphere, 250, seed=np.random.SeedSequence(42))
+        self.assertListEqual(first[0], second[0])
+        np.testing.assert_array_equal(first[2], second[2])
+        np.testing.assert_array_equal(first[3].genotype, second[3].genotype)
+
+    def test_global_state_untouched(self):
+        np.random.seed(42)
+        expected = np.random.random()
+        np.random.seed(42)
+        _customizedES(5, sphere, 100, opts={'orthogonal': True, 'mirrored': True}, rng=np.random.default_rng(3))
+        self.assertEqual(np.random.random(), expected)
+
+
+class BoundaryHandlingTest(unittest.TestCase):
+    def test_strategies(self):
+        for strategy in ['reflect', 'clip', 'toroidal', 'resample', 'penalty']:
+            for parallel in [False, True]:
+                es = CustomizedES(5, sphere if not parallel else lambda pop: [sphere(x) for x in pop], 100,
+                                  boundary_handling=strategy, rng=np.random.default_rng(1))
+                es.parallel = parallel
+                es.mutateParameters = es.parameters.adaptCovarianceMatrix
+                es.runOptimizer()
+                for ind in es.new_population:
+                    self.assertTrue(np.all(np.abs(ind.genotype) <= 5), strategy)
+
+    def test_unbounded(self):
+        es = CustomizedES(5, sphere, 100, boundary_handling='unbounded')
+        self.assertIsNone(es.boundary_handling)
+        self.assertFalse(es.mutate.keywords['keep_in_bounds'])
+
+
+class SequentialPairwiseTest(unittest.TestCase):
+    def test_complete_pairs(self):
+        es = CustomizedES(5, sphere, 1000, opts={'sequential': True, 'mirrored': True, 'selection': 'pairwise'},
+                          rng=np.random.default_rng(1))
+        self.assertEqual(es.seq_granularity, 2)
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        while es.used_budget < es.budget - es.parameters.lambda_:
+            es.runOneGeneration()
+            self.assertEqual(len(es.new_population) % 2, 0)
+
+
+class ParallelTPATest(unittest.TestCase):
+    def test_single_batch(self):
+        batch_sizes = []
+
+        def fitness(population):
+            batch_sizes.append(len(population))
+            return [sphere(x) for x in population]
+
+        es = CustomizedES(5, fitness, 200, lambda_=8, opts={'tpa': True}, rng=np.random.default_rng(1))
+        es.parallel = True
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        es.runOneGeneration()
+        self.assertIsNone(es.parameters.tpa_result)
+        self.assertEqual(len(es.tpa_probes), 2)
+
+        es.runOneGeneration()
+        self.assertIn(es.parameters.tpa_result, [-1, 1])
+        self.assertListEqual(batch_sizes, [6, 8])
+        self.assertEqual(es.used_budget, 14)
+
+
+class SpeculativeTest(unittest.TestCase):
+
+    @staticmethod
+    def batchSphere(batch_sizes):
+        def fitness(population):
+            batch_sizes.append(len(population))
+            return [sphere(x) for x in population]
+        return fitness
+
+    def test_sequential_parity(self):
+        batch_sizes = []
+        sequential = CustomizedES(5, sphere, 1000, lambda_=12, opts={'sequential': True},
+                                  rng=np.random.default_rng(1))
+        speculative = CustomizedES(5, self.batchSphere(batch_sizes), 1000, lambda_=12, opts={'sequential': True},
+                                   speculative=4, rng=np.random.default_rng(1))
+
+        sequential.evalPopulationSequentially()
+        speculative.evalPopulationSpeculatively()
+
+        self.assertEqual(speculative.used_budget, sequential.used_budget)
+        self.assertEqual(speculative.gen_size, sequential.gen_size)
+        self.assertListEqual([ind.fitness for ind in speculative.new_population],
+                             [ind.fitness for ind in sequential.new_population])
+        self.assertEqual(sum(batch_sizes), 4 * int(np.ceil(sequential.used_budget / 4)))
+
+    def test_charge_surplus(self):
+        batch_sizes = []
+        es = CustomizedES(5, self.batchSphere(batch_sizes), 1000, lambda_=12, opts={'sequential': True},
+                          speculative=4, charge_speculative=True, rng=np.random.default_rng(1))
+        es.evalPopulationSpeculatively()
+        self.assertEqual(es.used_budget, sum(batch_sizes))
+        self.assertEqual(len(es.new_population), es.seq_cutoff + 1)
+
+    def test_run(self):
+        batch_sizes = []
+        es = CustomizedES(5, self.batchSphere(batch_sizes), 500, opts={'sequential': True, 'tpa': True},
+                          speculative=4, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        es.runOptimizer()
+
+        self.assertLessEqual(max(batch_sizes), 6)
+        self.assertGreaterEqual(sum(batch_sizes), es.used_budget)
+        self.assertEqual(len(es.fitness_over_time), es.used_budget)
+        self.assertLess(es.best_individual.fitness, es.fitness_over_time[0])
+
+    def test_customized_es(self):
+        batch_sizes = []
+        _customizedES(5, self.batchSphere(batch_sizes), 200, opts={'sequential': True}, speculative=4,
+                      charge_speculative=True, rng=np.random.default_rng(1))
+        self.assertEqual(max(batch_sizes), 4)
+        self.assertGreaterEqual(sum(batch_sizes), 200)
+
+
+class PipelinedEighTest(unittest.TestCase):
+
+    def test_one_generation_lag(self):
+        es = CustomizedES(5, sphere, 1000, pipelined_eigh=True, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+
+        es.runOneGeneration()
+        C = es.parameters.C.copy()
+        np.testing.assert_array_equal(es.parameters.B, np.eye(5))  # Still the decomposition of the initial C
+        es.runOneGeneration()
+        D, B, _ = _decomposeCovariance(C)
+        np.testing.assert_allclose(es.parameters.B, B)
+        np.testing.assert_allclose(es.parameters.D, D)
+
+    def test_convergence_parity(self):
+        for seed in range(5):
+            results = []
+            for pipelined in [False, True]:
+                es = CustomizedES(10, sphere, 4000, pipelined_eigh=pipelined, rng=np.random.default_rng(seed))
+                es.mutateParameters = es.parameters.adaptCovarianceMatrix
+                es.runOptimizer()
+                results.append(es.best_individual.fitness)
+            regular, pipelined = results
+            self.assertLess(regular, 1e-8)
+            self.assertLess(pipelined, 1e-8)
+
+    def test_customized_es(self):
+        regular = _customizedES(5, sphere, 500, rng=np.random.default_rng(1))
+        pipelined = _customizedES(5, sphere, 500, rng=np.random.default_rng(1), pipelined_eigh=True)
+        self.assertNotEqual(regular[2], pipelined[2])
+
+        es = CustomizedES(5, sphere, 500, pipelined_eigh=True, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        es.runOptimizer()
+        self.assertListEqual(es.fitness_over_time, pipelined[2])
+
+    def test_restarts(self):
+        es = CustomizedES(5, sphere, 4000, opts={'ipop': 'IPOP'}, pipelined_eigh=True, rng=np.random.default_rng(1))
+        es.runLocalRestartOptimizer()
+        self.assertGreater(es.parameters.lambda_, 8)  # Restarted with a new Parameters object
+        self.assertTrue(es.parameters.pipelined_eigh)
+
+
+class WorkerCountTest(unittest.TestCase):
+
+    def test_round_lambda(self):
+        es = CustomizedES(10, sphere, 1000, worker_count=8, rng=np.random.default_rng(1))
+        self.assertEqual(es.parameters.lambda_, 16)
+        self.assertEqual(es.parameters.mu_int, 8)
+        self.assertEqual(len(es.parameters.weights), 8)
+        self.assertEqual(len(es.new_population), 16)
+        default = CustomizedES(10, sphere, 1000, lambda_=16, rng=np.random.default_rng(1))
+        self.assertEqual(es.parameters.c_mu, default.parameters.c_mu)
+
+    def test_pairwise(self):
+        es = CustomizedES(5, sphere, 1000, worker_count=3, opts={'selection': 'pairwise'},
+                          rng=np.random.default_rng(1))
+        self.assertEqual(es.parameters.lambda_, 12)
+
+    def test_tpa(self):
+        es = CustomizedES(10, sphere, 1000, worker_count=8, opts={'tpa': True}, rng=np.random.default_rng(1))
+        self.assertEqual(es.parameters.lambda_, 16)
+        self.assertEqual(len(es.new_population), 16)
+
+    def test_restarts(self):
+        for ipop in ['IPOP', 'BIPOP']:
+            lambdas = []
+            es = CustomizedES(5, sphere, 3000, worker_count=6, opts={'ipop': ipop}, rng=np.random.default_rng(1))
+            restart = es.runOptimizer
+
+            def runOptimizer(*args, **kwargs):
+                lambdas.append(es.parameters.lambda_)
+                restart(*args, **kwargs)
+            es.runOptimizer = runOptimizer
+            es.runLocalRestartOptimizer()
+
+            self.assertGreater(len(lambdas), 1)
+            for lambda_ in lambdas:
+                self.assertEqual(lambda_ % 6, 0)
+
+
 class restartCMATest(unittest.TestCase):
     def setUp(self):
         np.random.seed(42)
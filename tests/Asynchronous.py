@@ -0,0 +1,230 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import heapq
+import unittest
+import numpy as np
+from modea.Algorithms import CustomizedES
+from modea.Asynchronous import evaluateAll, evalPopulationSequentiallyAsync, runOneGenerationAsync, \
+    runOptimizerAsync, runSteadyStateAsync
+
+
+def sphere(x):
+    return float(np.sum(np.square(x)))
+
+
+class SlowSphere(object):
+    """ Stand-in for a remote simulation: a coroutine sphere function with simulated latency """
+
+    def __init__(self, latency=0.001):
+        self.latency = latency
+        self.running = 0
+        self.max_running = 0
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self, x):
+        self.started += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+        return sphere(x)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class EvaluateAllTest(unittest.TestCase):
+
+    def test_order(self):
+        fitness = SlowSphere()
+        genotypes = [np.array([i, 0.]) for i in range(10)]
+        self.assertListEqual(run(evaluateAll(fitness, genotypes)), [i**2 for i in range(10)])
+
+    def test_max_concurrency(self):
+        fitness = SlowSphere()
+        run(evaluateAll(fitness, [np.zeros(2)] * 20, max_concurrency=3))
+        self.assertEqual(fitness.max_running, 3)
+
+    def test_exception_cancels(self):
+        fitness = SlowSphere(latency=0.05)
+
+        async def failing(x):
+            if x[0] == 0:
+                raise ValueError("Simulation failed")
+            return await fitness(x)
+
+        with self.assertRaises(ValueError):
+            run(evaluateAll(failing, [np.array([i, 0.]) for i in range(5)]))
+        self.assertEqual(fitness.cancelled, 4)
+
+
+class SequentialAsyncTest(unittest.TestCase):
+
+    def test_early_stop(self):
+        fitness = SlowSphere(latency=0.01)
+        es = CustomizedES(5, fitness, 1000, lambda_=12, opts={'sequential': True}, rng=np.random.default_rng(1))
+        es.startGeneration()
+        run(evalPopulationSequentiallyAsync(es, max_concurrency=4))
+
+        self.assertEqual(len(es.new_population), es.seq_cutoff + 1)
+        self.assertGreater(fitness.cancelled, 0)
+        self.assertEqual(es.used_budget, fitness.started - fitness.cancelled)
+        self.assertEqual(es.used_budget, es.gen_size)
+
+    def test_budget(self):
+        for opts in [{'sequential': True}, {'sequential': True, 'tpa': True}]:
+            fitness = SlowSphere()
+            es = CustomizedES(5, fitness, 50, lambda_=12, opts=opts, rng=np.random.default_rng(1))
+            es.mutateParameters = es.parameters.adaptCovarianceMatrix
+            run(runOptimizerAsync(es))
+            self.assertEqual(es.used_budget, 50)
+            self.assertEqual(fitness.started, 50)  # No evaluations were started beyond the budget
+            self.assertEqual(len(es.fitness_over_time), 50)
+
+
+class RunOptimizerAsyncTest(unittest.TestCase):
+
+    def test_run(self):
+        fitness = SlowSphere()
+        es = CustomizedES(5, fitness, 300, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        run(runOptimizerAsync(es, max_concurrency=4))
+        self.assertLessEqual(fitness.max_running, 4)
+
+        # Same results as the regular optimizer with the same seed
+        serial = CustomizedES(5, sphere, 300, rng=np.random.default_rng(1))
+        serial.mutateParameters = serial.parameters.adaptCovarianceMatrix
+        serial.runOptimizer()
+        self.assertEqual(es.used_budget, serial.used_budget)
+        self.assertListEqual(es.fitness_over_time, serial.fitness_over_time)
+        self.assertEqual(es.best_individual.fitness, serial.best_individual.fitness)
+
+    def test_tpa(self):
+        fitness = SlowSphere()
+        es = CustomizedES(5, fitness, 200, lambda_=8, opts={'tpa': True}, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        run(runOneGenerationAsync(es))
+        self.assertEqual(es.used_budget, 6)
+        run(runOneGenerationAsync(es))
+        self.assertEqual(es.used_budget, 14)
+        self.assertIn(es.parameters.tpa_result, [-1, 1])
+
+
+class ScheduledSphere(object):
+    """
+        Stand-in for remote simulations of varying duration, which finish in a deterministic order. Each evaluation
+        takes a simulated duration from a fixed schedule, and completes only once all earlier-finishing evaluations
+        have. An evaluation is only released once ``num_workers`` evaluations are running, or once all ``budget``
+        evaluations have been started, so the completion order does not depend on wall-clock time.
+    """
+
+    def __init__(self, num_workers, budget, schedule):
+        self.num_workers = num_workers
+        self.budget = budget
+        self.schedule = schedule
+        self.clock = 0.
+        self.waiting = []    # Heap of (finish time, evaluation number, event) of the unreleased evaluations
+        self.released = False
+        self.running = 0
+        self.max_running = 0
+        self.started = 0
+
+    def release(self):
+        """ Let the earliest-finishing evaluation complete, if it is the last one that can still start first """
+        if self.released or not self.waiting:
+            return
+        if len(self.waiting) >= self.num_workers or self.started >= self.budget:
+            self.released = True
+            heapq.heappop(self.waiting)[2].set()
+
+    async def __call__(self, x):
+        finish = self.clock + self.schedule[self.started % len(self.schedule)]
+        event = asyncio.Event()
+        heapq.heappush(self.waiting, (finish, self.started, event))
+        self.started += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            self.release()
+            await event.wait()
+        finally:
+            self.running -= 1
+        self.clock = finish
+        self.released = False
+        self.release()
+        return sphere(x)
+
+
+class SteadyStateTest(unittest.TestCase):
+
+    schedule = np.random.default_rng(3).random(97)
+
+    def test_run(self):
+        fitness = ScheduledSphere(4, 1000, self.schedule)
+        es = CustomizedES(5, fitness, 1000, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        run(runSteadyStateAsync(es, num_workers=4))
+
+        self.assertEqual(es.used_budget, 1000)
+        self.assertEqual(fitness.started, 1000)
+        self.assertEqual(fitness.max_running, 4)
+        self.assertEqual(len(es.fitness_over_time), es.used_budget)
+        self.assertLess(es.best_individual.fitness, 1e-10)
+
+    def test_stale_steps(self):
+        es = CustomizedES(5, ScheduledSphere(4, 200, self.schedule), 200, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        param = es.parameters
+        sampled_from = {}
+        num_stale = []
+
+        def mutate(individual, param, mutate=es.mutate):
+            sampled_from[id(individual)] = (param.wcm.copy(), param.sigma)
+            mutate(individual, param)
+
+        def select(pop, new_pop, used_budget, param, select=es.select):
+            stale = [ind for ind in new_pop if not np.array_equal(sampled_from[id(ind)][0], param.wcm)
+                     or sampled_from[id(ind)][1] != param.sigma]
+            num_stale.append(len(stale))
+            for individual in new_pop:
+                np.testing.assert_allclose(individual.mutation_vector,
+                                           (individual.genotype - param.wcm) / param.sigma)
+            return select(pop, new_pop, used_budget, param)
+
+        es.mutate, es.select = mutate, select
+        run(runSteadyStateAsync(es, num_workers=4))
+        self.assertGreater(len(num_stale), 1)
+        self.assertTrue(all(num_stale[1:]))  # Every update after the first one uses candidates from older updates
+
+    def test_target(self):
+        fitness = ScheduledSphere(4, 5000, self.schedule)
+        es = CustomizedES(5, fitness, 5000, rng=np.random.default_rng(1))
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        run(runSteadyStateAsync(es, num_workers=4, target=0, threshold=1e-5))
+
+        self.assertLess(es.used_budget, 5000)
+        self.assertLess(es.best_individual.fitness, 1e-5)
+        self.assertEqual(fitness.running, 0)
+
+    def test_tpa(self):
+        es = CustomizedES(5, SlowSphere(), 100, opts={'tpa': True}, rng=np.random.default_rng(1))
+        with self.assertRaises(ValueError):
+            run(runSteadyStateAsync(es, num_workers=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+import numpy as np
+from modea.Boundary import outOfBounds, reflect, clip, toroidal, resample, penalty, unbounded
+
+
+class BoundaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.l_bound = np.array([[-5], [-5], [0]])
+        self.u_bound = np.array([[5], [5], [1]])
+        self.X = np.array([[0., 7., -12., 3.],
+                           [1., 2., 4., -5.],
+                           [.5, 1.25, -.25, 1.]])
+
+
+class OutOfBoundsTest(BoundaryTest):
+
+    def test_columns(self):
+        self.assertListEqual(outOfBounds(self.X, self.l_bound, self.u_bound).tolist(), [False, True, True, False])
+
+    def test_flat_bounds(self):
+        result = outOfBounds(self.X, self.l_bound.flatten(), self.u_bound.flatten())
+        self.assertListEqual(result.tolist(), [False, True, True, False])
+
+
+class ReflectTest(BoundaryTest):
+
+    def test_reflect(self):
+        reflect(self.X, self.l_bound, self.u_bound)
+        np.testing.assert_array_almost_equal(self.X, [[0., 3., 2., 3.],
+                                                      [1., 2., 4., -5.],
+                                                      [.5, .75, .25, 1.]])
+
+    def test_flat_bounds(self):
+        reflect(self.X, self.l_bound.flatten(), self.u_bound.flatten())
+        self.assertFalse(any(outOfBounds(self.X, self.l_bound, self.u_bound)))
+
+
+class ClipTest(BoundaryTest):
+
+    def test_clip(self):
+        clip(self.X, self.l_bound, self.u_bound)
+        np.testing.assert_array_almost_equal(self.X, [[0., 5., -5., 3.],
+                                                      [1., 2., 4., -5.],
+                                                      [.5, 1., 0., 1.]])
+
+
+class ToroidalTest(BoundaryTest):
+
+    def test_toroidal(self):
+        toroidal(self.X, self.l_bound, self.u_bound)
+        np.testing.assert_array_almost_equal(self.X, [[0., -3., -2., 3.],
+                                                      [1., 2., 4., -5.],
+                                                      [.5, .25, .75, 0.]])
+
+
+class ResampleTest(BoundaryTest):
+
+    def test_resample(self):
+        calls = []
+
+        def sample(indices):
+            calls.append(indices.tolist())
+            return np.zeros((3, len(indices)))
+
+        resample(self.X, self.l_bound, self.u_bound, sample=sample)
+        self.assertListEqual(calls, [[1, 2]])
+        np.testing.assert_array_equal(self.X[:, 1:3], np.zeros((3, 2)))
+        np.testing.assert_array_equal(self.X[:, 0], [0., 1., .5])
+
+    def test_fallback_to_reflect(self):
+        expected = self.X.copy()
+        reflect(expected, self.l_bound, self.u_bound)
+        resample(self.X, self.l_bound, self.u_bound, sample=lambda indices: self.X[:, indices], max_tries=3)
+        np.testing.assert_array_almost_equal(self.X, expected)
+
+
+class PenaltyTest(BoundaryTest):
+
+    def test_penalty(self):
+        penalties = penalty(self.X, self.l_bound, self.u_bound)
+        np.testing.assert_array_almost_equal(penalties, [0., 4.0625, 49.0625, 0.])
+        self.assertFalse(any(outOfBounds(self.X, self.l_bound, self.u_bound)))
+
+
+class UnboundedTest(BoundaryTest):
+
+    def test_unbounded(self):
+        expected = self.X.copy()
+        self.assertIsNone(unbounded(self.X, self.l_bound, self.u_bound))
+        np.testing.assert_array_equal(self.X, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import unittest
 import copy
 import numpy as np
-from modea.Individual import FloatIndividual, MixedIntIndividual, MixedIntIndividualError
+from modea.Individual import FloatIndividual, MixedIntIndividual, MixedIntIndividualError, MixedIntPopulation, \
+    MixedIntMember
 
 class FloatIndividualTest(unittest.TestCase):
     def setUp(self):
@@ -25,7 +26,48 @@ class FloatIndividualTest(unittest.TestCase):
 
     def test_copy(self):
         new_ind = copy.copy(self.individual)
-        self.assertItemsEqual(self.individual.__dict__, new_ind.__dict__)
+        for attr in FloatIndividual.__slots__:
+            np.testing.assert_array_equal(getattr(self.individual, attr), getattr(new_ind, attr))
+        self.assertIsNot(self.individual.genotype, new_ind.genotype)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.individual, '__dict__'))
+
+    def test_lazy_vectors(self):
+        individual = FloatIndividual(self.n)
+        self.assertIsNone(individual._last_z)
+        self.assertIsNone(individual._mutation_vector)
+        new_ind = copy.copy(individual)
+        self.assertIsNone(new_ind._last_z)
+        individual.last_z += 1
+        np.testing.assert_array_equal(individual.last_z, np.ones((self.n, 1)))
+        np.testing.assert_array_equal(new_ind.last_z, np.zeros((self.n, 1)))
+
+
+class FloatIndividualSpawnTest(unittest.TestCase):
+    def setUp(self):
+        self.genotype = np.arange(5, dtype=np.float64).reshape((5, 1))
+        self.individuals = [FloatIndividual.spawn(self.genotype, sigma=.5) for _ in range(3)]
+
+    def test_spawn(self):
+        for ind in self.individuals:
+            self.assertIsInstance(ind, FloatIndividual)
+            self.assertEqual(ind.n, 5)
+            self.assertEqual(ind.fitness, np.inf)
+            self.assertEqual(ind.sigma, .5)
+            self.assertIs(ind.genotype, self.genotype)
+            np.testing.assert_array_equal(ind.last_z, np.zeros((5, 1)))
+            np.testing.assert_array_equal(ind.mutation_vector, np.zeros((5, 1)))
+
+    def test_vectors_not_shared(self):
+        self.individuals[0].last_z += 1
+        np.testing.assert_array_equal(self.individuals[1].last_z, np.zeros((5, 1)))
+
+    def test_copy_is_independent(self):
+        new_ind = copy.copy(self.individuals[0])
+        new_ind.genotype += 1
+        new_ind.last_z += 1
+        np.testing.assert_array_equal(self.genotype.flatten(), np.arange(5))
 
 
 class MixedIntIndividualTest(unittest.TestCase):
@@ -43,7 +85,9 @@ class MixedIntIndividualTest(unittest.TestCase):
 
     def test_copy(self):
         new_ind = copy.copy(self.individual)
-        self.assertItemsEqual(self.individual.__dict__, new_ind.__dict__)
+        for attr in MixedIntIndividual.__slots__:
+            np.testing.assert_array_equal(getattr(self.individual, attr), getattr(new_ind, attr))
+        self.assertIsNot(self.individual.stepSizeOffsetMIES, new_ind.stepSizeOffsetMIES)
 
     def test_n_too_small(self):
         with self.assertRaises(MixedIntIndividualError):
@@ -57,5 +101,74 @@ class MixedIntIndividualTest(unittest.TestCase):
         np.testing.assert_array_almost_equal(self.individual.stepsizeMIES, 0.2)
 
 
+class MixedIntPopulationTest(unittest.TestCase):
+    def setUp(self):
+        self.n = 6
+        self.individuals = []
+        for i in range(4):
+            ind = MixedIntIndividual(n=self.n, num_discrete=2, num_ints=1)
+            ind.genotype = np.array([[i % 2], [1], [i + 10], [.5], [i / 10], [-1.]])
+            ind.fitness = 10 - i
+            ind.stepSizeOffsetMIES = ind.stepSizeOffsetMIES + i
+            self.individuals.append(ind)
+        self.population = MixedIntPopulation.fromIndividuals(self.individuals)
+
+    def test_dtypes(self):
+        self.assertEqual(self.population.discrete.dtype, np.int8)
+        self.assertEqual(self.population.ints.dtype, np.int32)
+        self.assertEqual(self.population.floats.dtype, np.float64)
+        self.assertEqual(self.population.stepSizeOffsetMIES.shape, (4, self.n))
+
+    def test_from_individuals(self):
+        self.assertEqual(len(self.population), 4)
+        for ind, member in zip(self.individuals, self.population):
+            np.testing.assert_array_equal(member.genotype, ind.genotype)
+            np.testing.assert_array_equal(member.stepsizeMIES, ind.stepsizeMIES)
+            self.assertEqual(member.fitness, ind.fitness)
+
+    def test_genotypes(self):
+        np.testing.assert_array_equal(self.population.genotypes,
+                                      np.hstack([ind.genotype for ind in self.individuals]).T)
+        self.population.genotypes = np.zeros((4, self.n))
+        np.testing.assert_array_equal(self.population[2].genotype, np.zeros((self.n, 1)))
+
+    def test_member_write_back(self):
+        member = self.population[-1]
+        self.assertIsInstance(member, MixedIntMember)
+        member.genotype = np.arange(self.n)
+        member.fitness = 0
+        member.stepSizeOffsetMIES[:] = 0
+        np.testing.assert_array_equal(self.population.genotypes[3], np.arange(self.n))
+        self.assertEqual(self.population.fitness[3], 0)
+        np.testing.assert_array_equal(self.population.stepSizeOffsetMIES[3], 0)
+
+    def test_take(self):
+        subset = self.population.take([3, 3, 0])
+        self.assertIsInstance(subset, MixedIntPopulation)
+        self.assertListEqual(list(subset.fitness), [7, 7, 10])
+        subset.floats[:] = 0
+        np.testing.assert_array_equal(self.population.floats[:, 0], .5)
+
+    def test_slice(self):
+        subset = self.population[1:3]
+        self.assertIsInstance(subset, MixedIntPopulation)
+        self.assertListEqual(list(subset.fitness), [9, 8])
+
+    def test_index_error(self):
+        with self.assertRaises(IndexError):
+            _ = self.population[4]
+
+    def test_copy_member(self):
+        new_ind = copy.copy(self.population[1])
+        self.assertIsInstance(new_ind, MixedIntIndividual)
+        np.testing.assert_array_equal(new_ind.genotype, self.individuals[1].genotype)
+        new_ind.stepSizeOffsetMIES[:] = 0
+        self.assertFalse(np.any(self.population.stepSizeOffsetMIES[1] == 0))
+
+    def test_n_too_small(self):
+        with self.assertRaises(MixedIntIndividualError):
+            _ = MixedIntPopulation(3, 1, 0, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
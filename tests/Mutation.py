@@ -6,11 +6,15 @@ import unittest
 import random
 import numpy as np
 from mock import Mock, patch
-from modea.Utils import num_options_per_module
-from modea.Mutation import _keepInBounds, adaptStepSize, _scaleWithThreshold, _adaptSigma, _getXi, \
+from copy import copy
+from modea.Individual import MixedIntIndividual, MixedIntPopulation
+from modea.Utils import options, num_options_per_module, initializable_parameters
+from modea.Mutation import _conditionalMask, _keepInBounds, adaptStepSize, _scaleWithThreshold, _adaptSigma, _getXi, \
     addRandomOffset, CMAMutation, \
     mutateBitstring, mutateIntList, mutateFloatList, mutateMixedInteger, \
-    MIES_MutateDiscrete,  MIES_MutateIntegers, MIES_MutateFloats, MIES_Mutate
+    mutateBitstringPopulation, mutateIntListPopulation, \
+    MIES_MutateDiscrete,  MIES_MutateIntegers, MIES_MutateFloats, MIES_Mutate, \
+    MIES_MutateMatrix, MIES_MutatePopulation
 
 
 class keepInBoundsTest(unittest.TestCase):
@@ -80,6 +84,11 @@ class getXiTest(unittest.TestCase):
     def test_something(self):
         self.assertAlmostEqual(_getXi(), 5/7)
 
+    def test_random_state(self):
+        for seed in range(4):
+            expected = 5/7 if np.random.RandomState(seed).randint(0, 2) else 7/5
+            self.assertAlmostEqual(_getXi(rng=np.random.RandomState(seed)), expected)
+
 
 
 class MockSampler(object):
@@ -106,6 +115,11 @@ class addRandomOffsetTest(SamplerMutationTest):
         np.testing.assert_array_almost_equal(self.individual.genotype.flatten(),
                                              [ 0.05,  1.05,  2.05,  3.05,  4.05])
 
+    def test_shared_genotype_unchanged(self):
+        genotype = self.individual.genotype
+        addRandomOffset(self.individual, self.param, self.sampler)
+        np.testing.assert_array_equal(genotype.flatten(), range(5))
+
 
 class CMAMutationTest(SamplerMutationTest):
 
@@ -137,6 +151,20 @@ class mutateBitstringTest(unittest.TestCase):
         self.assertListEqual(individual.genotype, [1,1,1,1,1,1,0,1,1,1])
 
 
+class mutateBitstringPopulationTest(unittest.TestCase):
+
+    def test_same_as_individual(self):
+        np.random.seed(42)
+        genotypes = np.zeros((3, 10), dtype=int)
+        mutateBitstringPopulation(genotypes)
+
+        np.random.seed(42)
+        for row in range(3):
+            individual = Mock(genotype=[0]*10)
+            mutateBitstring(individual)
+            self.assertListEqual(genotypes[row].tolist(), individual.genotype)
+
+
 class mutateIntListTest(unittest.TestCase):
 
     def test_intList(self):
@@ -149,43 +177,184 @@ class mutateIntListTest(unittest.TestCase):
                                       [1,0,0,0,1,1,1,0,0,0,1,5])
 
 
-class mutateFloatListTest(unittest.TestCase):
-    #TODO: separate into more testable functions first
-    pass
-
-
-class mutateMixedIntegerTest(unittest.TestCase):
+class mutateIntListPopulationTest(unittest.TestCase):
 
-    def test_call_throughs(self):
-        ind = object()
-        param = object()
-        opts = object()
-        nopm = object()
-        with patch('modea.Mutation.adaptStepSize') as adaptStepSize:
-            with patch('modea.Mutation.mutateIntList') as mutateIntList:
-                with patch('modea.Mutation.mutateFloatList') as mutateFloatList:
-                    mutateMixedInteger(ind, param, opts, nopm)
-
-                    adaptStepSize.assert_called_with(ind)
-                    mutateIntList.assert_called_with(ind, param, nopm)
-                    mutateFloatList.assert_called_with(ind, param, opts)
+    def setUp(self):
+        self.num_modules = len(num_options_per_module)
+        self.param = Mock(l_bound=[0]*self.num_modules + [2], u_bound=[1]*self.num_modules + [100])
+
+    def test_valid_values(self):
+        genotypes = np.zeros((100, self.num_modules+1))
+        genotypes[:, -1] = 5
+        mutateIntListPopulation(genotypes, 0.5, self.param, num_options_per_module, self.num_modules+1,
+                                rng=np.random.default_rng(42))
+        modules = genotypes[:, :self.num_modules]
+        self.assertTrue(np.all(modules < np.array(num_options_per_module)))
+        self.assertTrue(np.all(modules >= 0))
+        self.assertTrue(np.any(modules != 0))
+        self.assertTrue(np.all((genotypes[:, -1] >= 2) & (genotypes[:, -1] <= 100)))
+        self.assertTrue(np.any(genotypes[:, -1] != 5))
+
+    def test_always_different(self):
+        genotypes = np.zeros((50, self.num_modules+1))
+        genotypes[:, -1] = 5
+        mutateIntListPopulation(genotypes, np.ones(50), self.param, num_options_per_module, self.num_modules+1,
+                                rng=np.random.default_rng(42))
+        self.assertTrue(np.all(genotypes[:, :self.num_modules] != 0))
+
+    def test_zero_step_size(self):
+        genotypes = np.zeros((50, self.num_modules+1))
+        mutateIntListPopulation(genotypes, np.zeros(50), self.param, num_options_per_module, self.num_modules+1,
+                                rng=np.random.default_rng(42))
+        np.testing.assert_array_equal(genotypes, 0)
+
+
+NUM_FLOATS = len(initializable_parameters)
+NUM_ALWAYS_USED = NUM_FLOATS - sum(opt[2] for opt in options)
+
+
+def moduleFloats():
+    """ :returns: Tuples ``(module index, slice of its floats)`` for all modules with tunable parameters """
+    start = NUM_ALWAYS_USED
+    for index, opt in enumerate(options):
+        if opt[2]:
+            yield index, slice(start, start + opt[2])
+            start += opt[2]
+
+
+class conditionalMaskTest(unittest.TestCase):
+
+    def test_layout(self):
+        self.assertEqual(NUM_ALWAYS_USED, initializable_parameters.index('init_threshold'))
+        names = {options[index][0]: initializable_parameters[floats] for index, floats in moduleFloats()}
+        self.assertDictEqual(names, {'threshold': ('init_threshold', 'decay_factor'),
+                                     'tpa': ('tpa_factor', 'beta_tpa', 'c_alpha', 'alpha'),
+                                     'ipop': ('pop_inc_factor',)})
+
+    def test_each_module(self):
+        for index, floats in moduleFloats():
+            module_values = np.zeros((1, len(options)))
+            module_values[0, index] = 1
+            expected = np.zeros(NUM_FLOATS, dtype=bool)
+            expected[:NUM_ALWAYS_USED] = True
+            expected[floats] = True
+            np.testing.assert_array_equal(_conditionalMask(module_values, options, NUM_FLOATS)[0], expected)
+
+    def test_too_few_floats(self):
+        with self.assertRaises(ValueError):
+            _conditionalMask(np.zeros((1, len(options))), options, 6)
 
 
+class mutateFloatListTest(unittest.TestCase):
 
-class MIES_MutateDiscreteTest(unittest.TestCase):
-        pass
+    def mutate(self, active_module=None):
+        num_ints = len(options) + 1
+        genotype = np.array([0.] * num_ints + [.5] * NUM_FLOATS).reshape((-1, 1))
+        if active_module is not None:
+            genotype[active_module] = 1
+        individual = Mock(baseStepSize=1, stepSizeOffset=1, num_ints=num_ints, genotype=genotype)
+        param = Mock(l_bound=np.zeros((num_ints + NUM_FLOATS, 1)), u_bound=np.ones((num_ints + NUM_FLOATS, 1)))
+        mutateFloatList(individual, param, options, rng=np.random.default_rng(42))
+        return individual.genotype[num_ints:].flatten() != .5
+
+    def test_inactive_modules(self):
+        changed = self.mutate()
+        self.assertTrue(np.all(changed[:NUM_ALWAYS_USED]))
+        self.assertFalse(np.any(changed[NUM_ALWAYS_USED:]))
+
+    def test_active_module(self):
+        for index, floats in moduleFloats():
+            changed = self.mutate(active_module=index)
+            self.assertTrue(np.all(changed[floats]))
+            changed[:NUM_ALWAYS_USED] = changed[floats] = False
+            self.assertFalse(np.any(changed))
 
 
-class MIES_MutateIntegersTest(unittest.TestCase):
+class MIES_MutateTest(unittest.TestCase):
         pass
 
 
-class MIES_MutateFloatsTest(unittest.TestCase):
-        pass
-
+class MIES_MutatePopulationTest(unittest.TestCase):
 
-class MIES_MutateTest(unittest.TestCase):
-        pass
+    def setUp(self):
+        self.num_discrete = len(num_options_per_module)
+        self.n = self.num_discrete + 2 + NUM_FLOATS
+        self.param = Mock()
+        self.param.l_bound = np.array([0] * self.num_discrete + [1, 1] + [0] * NUM_FLOATS)
+        self.param.u_bound = np.array([2] * self.num_discrete + [20, 20] + [1] * NUM_FLOATS)
+        self.population = []
+        for _ in range(50):
+            ind = MixedIntIndividual(self.n, self.num_discrete, 2)
+            ind.genotype[:self.num_discrete] = 0
+            ind.genotype[self.num_discrete:] = [[5], [10]] + [[.5]] * NUM_FLOATS
+            self.population.append(ind)
+
+    def test_valid_values(self):
+        MIES_MutatePopulation(self.population, self.param, options, num_options_per_module,
+                              rng=np.random.default_rng(42))
+        genotypes = np.hstack([ind.genotype for ind in self.population])
+        discrete = genotypes[:self.num_discrete]
+        ints = genotypes[self.num_discrete:self.num_discrete+2]
+        floats = genotypes[self.num_discrete+2:]
+
+        self.assertTrue(np.all(discrete >= 0))
+        self.assertTrue(np.all(discrete < np.array(num_options_per_module).reshape((-1, 1))))
+        self.assertTrue(np.any(discrete != 0))
+        np.testing.assert_array_equal(ints, np.trunc(ints))
+        self.assertTrue(np.all((ints >= 1) & (ints <= 20)))
+        self.assertTrue(np.all((floats >= 0) & (floats <= 1)))
+        self.assertTrue(np.any(floats != .5))
+
+    def test_reproducible(self):
+        other = [copy(ind) for ind in self.population]
+        MIES_MutatePopulation(self.population, self.param, options, num_options_per_module,
+                              rng=np.random.default_rng(42))
+        MIES_MutatePopulation(other, self.param, options, num_options_per_module, rng=np.random.default_rng(42))
+        for ind_a, ind_b in zip(self.population, other):
+            np.testing.assert_array_equal(ind_a.genotype, ind_b.genotype)
+            np.testing.assert_array_equal(ind_a.stepSizeOffsetMIES, ind_b.stepSizeOffsetMIES)
+
+    def test_array_population(self):
+        population = MixedIntPopulation.fromIndividuals(self.population)
+        MIES_MutatePopulation(self.population, self.param, options, num_options_per_module,
+                              rng=np.random.default_rng(42))
+        MIES_MutatePopulation(population, self.param, options, num_options_per_module,
+                              rng=np.random.default_rng(42))
+        for ind, member in zip(self.population, population):
+            np.testing.assert_array_equal(ind.genotype, member.genotype)
+            np.testing.assert_array_equal(ind.stepSizeOffsetMIES, member.stepSizeOffsetMIES)
+
+    def test_mutate_member(self):
+        population = MixedIntPopulation.fromIndividuals(self.population)
+        random.seed(42)
+        MIES_Mutate(population[0], self.param, options, num_options_per_module, rng=np.random.default_rng(42))
+        random.seed(42)
+        MIES_Mutate(self.population[0], self.param, options, num_options_per_module, rng=np.random.default_rng(42))
+        np.testing.assert_array_equal(population[0].genotype, self.population[0].genotype)
+        np.testing.assert_array_equal(population[0].stepSizeOffsetMIES, self.population[0].stepSizeOffsetMIES)
+
+    def mutateMatrix(self, active_module=None):
+        genotypes = np.zeros((20, self.n))
+        genotypes[:, self.num_discrete+2:] = .5
+        if active_module is not None:
+            genotypes[:, active_module] = 1
+        num_options = [1] * self.num_discrete  # Modules never change, so only the initial ones are active
+        MIES_MutateMatrix(genotypes, np.ones((20, self.n)) * .1, .1, self.num_discrete, 2, self.param,
+                          options, num_options, rng=np.random.default_rng(42))
+        return genotypes[:, self.num_discrete+2:] != .5
+
+    def test_inactive_floats(self):
+        # With all modules inactive, only the floats that are always used may change
+        changed = self.mutateMatrix()
+        self.assertTrue(np.all(changed[:, :NUM_ALWAYS_USED]))
+        self.assertFalse(np.any(changed[:, NUM_ALWAYS_USED:]))
+
+    def test_active_module_floats(self):
+        for index, floats in moduleFloats():
+            changed = self.mutateMatrix(active_module=index)
+            self.assertTrue(np.all(changed[:, floats]))
+            changed[:, :NUM_ALWAYS_USED] = changed[:, floats] = False
+            self.assertFalse(np.any(changed))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,237 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import time
+import unittest
+import numpy as np
+from timeit import default_timer
+from multiprocessing.shared_memory import SharedMemory
+from modea.Algorithms import CustomizedES
+from modea.Parallel import BIPOPPortfolio, SharedMemoryEvaluator, ParallelRunner, blasThreads, chooseBlasThreads
+
+
+HANG = 99
+CRASH = -99
+
+
+def sphere(x):
+    return float(np.sum(np.square(x)))
+
+
+def assertSameAsSerial(test, es, n, budget, seed):
+    """ Assert that a parallel run gave exactly the same results as a serial run with the same seed """
+    serial = CustomizedES(n, sphere, budget, rng=np.random.default_rng(seed))
+    serial.mutateParameters = serial.parameters.adaptCovarianceMatrix
+    serial.runOptimizer()
+    test.assertEqual(es.used_budget, serial.used_budget)
+    test.assertListEqual(es.fitness_over_time, serial.fitness_over_time)
+    test.assertEqual(es.best_individual.fitness, serial.best_individual.fitness)
+
+
+def stragglingSphere(x):
+    """ Stand-in for a pathological simulation: hangs or crashes for some marked genotypes """
+    if x[0] == HANG:
+        time.sleep(60)
+    elif x[0] == CRASH:
+        os._exit(1)
+    return sphere(x)
+
+
+class SharedMemoryEvaluatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.evaluator = SharedMemoryEvaluator(sphere, num_workers=2)
+
+    def tearDown(self):
+        self.evaluator.close()
+
+    def test_order(self):
+        genotypes = [np.array([[i], [1.]]) for i in range(7)]
+        self.assertListEqual(self.evaluator(genotypes), [i**2 + 1 for i in range(7)])
+
+    def test_reuse(self):
+        self.evaluator([np.zeros(3)] * 8)
+        name = self.evaluator.genotype_block.name
+        self.assertListEqual(self.evaluator([np.ones(3)] * 5), [3.] * 5)
+        self.assertEqual(self.evaluator.genotype_block.name, name)
+
+        self.evaluator([np.ones(3)] * 10)
+        self.assertNotEqual(self.evaluator.genotype_block.name, name)
+        self.assertTupleEqual(self.evaluator.capacity, (10, 3))
+
+    def test_close(self):
+        self.evaluator([np.zeros(3)] * 4)
+        name = self.evaluator.genotype_block.name
+        self.evaluator.close()
+        self.assertListEqual(self.evaluator.workers, [])
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    def test_optimizer(self):
+        with CustomizedES(5, self.evaluator, 200, rng=np.random.default_rng(1)) as es:
+            es.parallel = True
+            es.mutateParameters = es.parameters.adaptCovarianceMatrix
+            es.runOptimizer()
+        self.assertListEqual(self.evaluator.workers, [])
+        assertSameAsSerial(self, es, 5, 200, seed=1)
+
+    def test_restarts(self):
+        es = CustomizedES(5, self.evaluator, 1000, opts={'ipop': 'IPOP'}, rng=np.random.default_rng(1))
+        es.parallel = True
+        es.runLocalRestartOptimizer()
+        self.assertGreaterEqual(self.evaluator.capacity[0], es.parameters.lambda_)
+
+
+class TimeoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.genotypes = [np.array([i, 1.]) for i in range(6)]
+        self.genotypes[2] = np.array([HANG, 0.])
+
+    def test_timeout(self):
+        with SharedMemoryEvaluator(stragglingSphere, num_workers=2, timeout=.5, penalty=1e10) as evaluator:
+            start = default_timer()
+            fitnesses = evaluator(self.genotypes)
+            self.assertLess(default_timer() - start, 5)
+            self.assertListEqual(evaluator.timed_out, [2])
+            self.assertEqual(fitnesses[2], 1e10)
+            self.assertListEqual(fitnesses[3:], [10., 17., 26.])
+            self.assertEqual(evaluator.num_recycled, 1)
+
+            # The replacement worker is used for the next batch
+            self.assertListEqual(evaluator(self.genotypes[:2]), [1., 2.])
+            self.assertListEqual(evaluator.timed_out, [])
+            self.assertEqual(evaluator.num_timeouts, 1)
+
+    def test_stragglers(self):
+        with SharedMemoryEvaluator(stragglingSphere, num_workers=3, max_stragglers=1) as evaluator:
+            start = default_timer()
+            fitnesses = evaluator(self.genotypes)
+            self.assertLess(default_timer() - start, 5)
+            self.assertListEqual(evaluator.timed_out, [2])
+            self.assertEqual(fitnesses[2], np.inf)
+
+    def test_crash(self):
+        self.genotypes[4] = np.array([CRASH, 0.])
+        with SharedMemoryEvaluator(stragglingSphere, num_workers=2, timeout=.5) as evaluator:
+            evaluator(self.genotypes)
+            self.assertListEqual(evaluator.timed_out, [2, 4])
+            self.assertEqual(evaluator.num_recycled, 2)
+
+
+class FlakyEvaluator(object):
+    """ Stand-in for a parallel evaluator in which the first evaluation of every batch times out """
+
+    def __init__(self):
+        self.timed_out = []
+        self.batch_sizes = []
+
+    def __call__(self, genotypes):
+        self.batch_sizes.append(len(genotypes))
+        self.timed_out = [0]
+        return [np.inf] + [sphere(x) for x in genotypes[1:]]
+
+
+class ResampleTimeoutsTest(unittest.TestCase):
+
+    def test_penalty(self):
+        es = CustomizedES(5, FlakyEvaluator(), 100, lambda_=8, rng=np.random.default_rng(1))
+        es.parallel = True
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        es.runOneGeneration()
+        es.recordStatistics()
+        self.assertEqual(es.new_population[0].fitness, np.inf)
+        self.assertListEqual(es.timeouts_over_time, [1])
+
+    def test_resample(self):
+        evaluator = FlakyEvaluator()
+        es = CustomizedES(5, evaluator, 100, lambda_=8, resample_timeouts=True, rng=np.random.default_rng(1))
+        es.parallel = True
+        es.mutateParameters = es.parameters.adaptCovarianceMatrix
+        es.runOneGeneration()
+        es.recordStatistics()
+
+        self.assertListEqual(evaluator.batch_sizes, [8, 1])
+        self.assertEqual(es.used_budget, 9)
+        self.assertEqual(len(es.fitness_over_time), 9)
+        self.assertListEqual(es.timeouts_over_time, [2])  # The replacement timed out as well
+        self.assertEqual(len(es.new_population), 8)
+
+
+def reportBlasThreads(_):
+    return blasThreads()
+
+
+class ChooseBlasThreadsTest(unittest.TestCase):
+
+    def test_small_runs(self):
+        self.assertEqual(chooseBlasThreads(10, 1, num_cores=16), 1)
+        self.assertEqual(chooseBlasThreads(None, 1, num_cores=16), 1)
+
+    def test_large_runs(self):
+        self.assertEqual(chooseBlasThreads(1000, 1, num_cores=16), 16)
+        self.assertEqual(chooseBlasThreads(1000, 4, num_cores=16), 4)
+        self.assertEqual(chooseBlasThreads(1000, 32, num_cores=16), 1)
+
+
+class ParallelRunnerTest(unittest.TestCase):
+
+    def test_blas_threads(self):
+        runner = ParallelRunner(num_workers=2, blas_threads=1)
+        self.assertListEqual(runner.map(reportBlasThreads, [(i,) for i in range(2)]), [1, 1])
+
+    def test_run_customized_es(self):
+        runner = ParallelRunner(num_workers=2)
+        results = runner.runCustomizedES(3, sphere, 100, num_runs=4, seed=42)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(runner.throughput['blas_threads'], 1)
+        self.assertEqual(runner.throughput['num_runs'], 4)
+        self.assertEqual(runner.throughput['evaluations'], sum(len(result[2]) for result in results))
+        self.assertGreater(runner.throughput['evaluations_per_second'], 0)
+
+        # Independent, but reproducible runs
+        best = [result[3].fitness for result in results]
+        self.assertEqual(len(set(best)), 4)
+        again = runner.runCustomizedES(3, sphere, 100, num_runs=4, seed=42)
+        self.assertListEqual([result[3].fitness for result in again], best)
+
+
+def rastrigin(x):
+    return float(10 * len(x) + np.sum(np.square(x) - 10 * np.cos(2 * np.pi * x)))
+
+
+class BIPOPPortfolioTest(unittest.TestCase):
+
+    def test_budget(self):
+        portfolio = BIPOPPortfolio(2, rastrigin, 6000, num_workers=3, seed=1)
+        best_fitness, best_genotype = portfolio.run()
+
+        self.assertLessEqual(portfolio.used_budget, 6000)
+        self.assertEqual(portfolio.used_budget, sum(used for _, _, used, _ in portfolio.history))
+        self.assertEqual(best_fitness, min(best for _, _, _, best in portfolio.history))
+        self.assertAlmostEqual(rastrigin(best_genotype), best_fitness)
+        self.assertSetEqual({regime for regime, _, _, _ in portfolio.history}, {'large', 'small'})
+
+        large_lambdas = [lambda_ for regime, lambda_, _, _ in portfolio.history if regime == 'large']
+        self.assertListEqual(sorted(large_lambdas), [6 * 2**i for i in range(len(large_lambdas))])
+
+    def test_target(self):
+        portfolio = BIPOPPortfolio(5, sphere, 100000, num_workers=3, seed=1)
+        best_fitness, _ = portfolio.run(target=0, threshold=1e-8)
+        self.assertLess(best_fitness, 1e-8)
+        self.assertLess(portfolio.used_budget, 100000)
+
+    def test_unused_budget(self):
+        portfolio = BIPOPPortfolio(2, rastrigin, 6000, num_workers=1, seed=1)
+        portfolio.budgets = {'small': 2000, 'large': 3000}
+        portfolio.finishInstance((200, 1., None), 'small', 6, 600)
+        self.assertEqual(portfolio.progressing, 'small')
+        self.assertDictEqual(portfolio.budgets, {'small': 2400, 'large': 3000})
+        portfolio.finishInstance((300, 5., None), 'large', 6, 600)  # No improvement
+        self.assertDictEqual(portfolio.budgets, {'small': 2700, 'large': 3000})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import unittest
 import random as rand
 import mock
 import numpy as np
+from modea.Individual import MixedIntPopulation
 from modea.Recombination import onePointCrossover, random, onePlusOne, weighted, MIES_recombine
 
 
@@ -36,6 +37,12 @@ class randomTest(unittest.TestCase):
         for obj in result:
             self.assertNotIn(obj, pop)
 
+    def test_random_state(self):
+        pop = [mock.Mock(id=i) for i in range(5)]
+        param = mock.Mock(lambda_=12)
+        ids = [x.id for x in random(pop, param, rng=np.random.RandomState(1))]
+        self.assertListEqual(ids, list(np.random.RandomState(1).randint(0, 5, size=12)))
+
 
 class onePlusOneTest(unittest.TestCase):
 
@@ -66,9 +73,11 @@ class weightedTest(unittest.TestCase):
         self.assertEqual(id(param.wcm_old), id(wcm))
         np.testing.assert_array_equal(param.offspring, offspring)
         np.testing.assert_array_almost_equal(param.wcm, np.array([0.5, 2.5, 4.5]).reshape((3,1)))
+        self.assertEqual(len(new_pop), param.lambda_)
         for ind in new_pop:
             self.assertNotIn(ind, pop)
             np.testing.assert_array_equal(ind.genotype, param.wcm)
+            self.assertIs(ind.genotype, param.wcm)  # Shared, not copied
 
 
 class MIES_recombineTest(unittest.TestCase):
@@ -85,5 +94,16 @@ class MIES_recombineTest(unittest.TestCase):
         for ind in new_pop:
             self.assertNotIn(ind, pop)
 
+    def test_MIES_reco_population(self):
+        np.random.seed(42)
+        param = mock.Mock(lambda_=10, mu_int=3)
+        pop = MixedIntPopulation(param.mu_int, 3, 1, 1)
+        pop.floats[:, 0] = range(param.mu_int)
+
+        new_pop = MIES_recombine(pop, param)
+
+        self.assertIsInstance(new_pop, MixedIntPopulation)
+        self.assertListEqual(new_pop.floats[:, 0].tolist(), [0, 2, 2, 0, 2, 2, 2, 0, 1, 1])
+
 if __name__ == '__main__':
     unittest.main()
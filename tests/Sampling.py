@@ -2,14 +2,22 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import shutil
+import tempfile
+import time
 import unittest
 import numpy as np
 from modea.Sampling import GaussianSampling, \
                           QuasiGaussianHaltonSampling, \
                           QuasiGaussianSobolSampling, \
+                          QuasiRandomTable, \
                           MirroredSampling, \
                           OrthogonalSampling, \
-                          MirroredOrthogonalSampling
+                          MirroredOrthogonalSampling, \
+                          StructuredOrthogonalSampling, \
+                          FusedSampling, \
+                          PrefetchingSampler
 
 
 class BaseSampler(object):
@@ -108,6 +116,12 @@ class GaussianSamplingTest(SamplingTest):
         vector2 = self.vector2.reshape((1, -1))
         np.testing.assert_array_almost_equal(vector1, vector2)
 
+    def test_generator(self):
+        sampler = self.Sampling(self.size, rng=np.random.default_rng(42))
+        vector1 = sampler.next()
+        vector2 = np.random.default_rng(42).standard_normal((self.size, 1))
+        np.testing.assert_array_equal(vector1, vector2)
+
 
 class HaltonSamplingTest(SamplingTest):
 
@@ -171,6 +185,46 @@ class SobolSamplingTest(SamplingTest):
         np.testing.assert_array_almost_equal(vector1, vector2)
 
 
+class QuasiRandomTableTest(SamplingTest):
+
+    def setUp(self):
+        self.sampling_setUp()
+        self.size = self.small_n
+        self.directory = tempfile.mkdtemp()
+        self.table = QuasiRandomTable(self.directory, max_length=64)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sobol_table(self):
+        sampler = QuasiGaussianSobolSampling(self.size, seed=42, table=self.table)
+        reference = QuasiGaussianSobolSampling(self.size, seed=42)
+        for _ in range(30):  # Runs past the end of the table
+            np.testing.assert_array_almost_equal(sampler.next(), reference.next())
+
+    def test_sobol_block(self):
+        sampler = QuasiGaussianSobolSampling(self.size, seed=10, table=self.table)
+        reference = QuasiGaussianSobolSampling(self.size, seed=10)
+        block = sampler.nextBlock(8)
+        np.testing.assert_array_almost_equal(block, np.column_stack([reference.next() for _ in range(8)]))
+        self.assertEqual(sampler.seed, 18)
+
+    def test_reuse_table(self):
+        table = self.table.sobol(self.size)
+        self.assertIsInstance(table, np.memmap)
+        self.assertEqual(table.shape, (64, self.size))
+        self.assertIs(self.table.sobol(self.size), table)
+
+        other = QuasiRandomTable(self.directory, max_length=32)
+        np.testing.assert_array_equal(other.sobol(self.size), table)
+        self.assertEqual(os.listdir(self.directory), ['sobol_{}.npy'.format(self.size)])
+
+    def test_longer_table(self):
+        self.table.sobol(self.size)
+        other = QuasiRandomTable(self.directory, max_length=128)
+        self.assertEqual(other.sobol(self.size).shape, (128, self.size))
+
+
 class MirroredSamplingTest(SamplingTest):
 
     def setUp(self):
@@ -265,5 +319,161 @@ class MirroredOrthogonalSamplingTest(OrthogonalSamplingTest):
 
 
 
+class StructuredOrthogonalSamplingTest(SamplingTest):
+
+    def setUp(self):
+        self.sampling_setUp()
+        self.size = 16
+        self.Sampling = StructuredOrthogonalSampling
+
+    def test_column_vector(self):
+        sampler = self.Sampling(self.size, shape='col')
+        self.assertEqual(sampler.next().shape, (self.size, 1))
+
+    def test_row_vector(self):
+        sampler = self.Sampling(self.medium_n, shape='row')
+        self.assertEqual(sampler.next().shape, (1, self.medium_n))
+
+    def test_orthogonal_block(self):
+        sampler = self.Sampling(self.size)
+        samples = np.column_stack([sampler.next() for _ in range(self.size)])
+        directions = samples / np.linalg.norm(samples, axis=0)
+        np.testing.assert_array_almost_equal(np.dot(directions.T, directions), np.eye(self.size))
+
+    def test_gaussian_length(self):
+        sampler = self.Sampling(self.size)
+        lengths = [np.linalg.norm(sampler.next()) for _ in range(2000)]
+        self.assertAlmostEqual(np.mean(np.square(lengths)) / self.size, 1, places=1)
+
+    def test_mirrored_base_sampler(self):
+        sampler = MirroredSampling(self.medium_n, base_sampler=self.Sampling(self.medium_n))
+        vector1 = sampler.next()
+        vector2 = sampler.next()
+        np.testing.assert_array_almost_equal(vector1, vector2*-1)
+
+    def test_reset(self):
+        sampler = self.Sampling(self.size)
+        sampler.next()
+        sampler.reset()
+        self.assertEqual(sampler.current_sample, 0)
+        self.assertIsNone(sampler.signs)
+
+
+class FusedSamplingTest(SamplingTest):
+
+    def setUp(self):
+        self.sampling_setUp()
+        self.size = self.small_n
+        self.lambda_ = 7
+
+    def draw_wrapped(self, orthogonal, mirrored, lambda_, num_samples):
+        sampler = GaussianSampling(self.size, rng=np.random.RandomState(3))
+        if orthogonal:
+            sampler = OrthogonalSampling(self.size, lambda_=lambda_, base_sampler=sampler)
+        if mirrored:
+            sampler = MirroredSampling(self.size, base_sampler=sampler)
+        return np.column_stack([sampler.next() for _ in range(num_samples)])
+
+    def test_gaussian_stream(self):
+        sampler = FusedSampling(self.size)
+        vector1 = sampler.nextBlock(20).T.flatten()
+        np.testing.assert_array_almost_equal(vector1, self.comp_vals[:20*self.size])
+
+    def test_equivalent_to_wrappers(self):
+        for orthogonal, mirrored in [(False, False), (True, False), (False, True), (True, True)]:
+            lambda_ = self.lambda_ // 2 if mirrored else self.lambda_
+            expected = self.draw_wrapped(orthogonal, mirrored, lambda_, 4 * self.lambda_)
+            sampler = FusedSampling(self.size, lambda_, orthogonal=orthogonal, mirrored=mirrored,
+                                    block_size=self.lambda_, rng=np.random.RandomState(3))
+            samples = np.column_stack([sampler.nextBlock(self.lambda_) for _ in range(4)])
+            np.testing.assert_array_almost_equal(samples, expected)
+
+    def test_next_equals_block(self):
+        sampler = FusedSampling(self.size, self.lambda_, orthogonal=True, mirrored=True,
+                                rng=np.random.RandomState(3))
+        samples = np.column_stack([sampler.next() for _ in range(2 * self.lambda_)])
+        sampler = FusedSampling(self.size, self.lambda_, orthogonal=True, mirrored=True,
+                                rng=np.random.RandomState(3))
+        np.testing.assert_array_equal(samples, sampler.nextBlock(2 * self.lambda_))
+
+    def test_row_vector(self):
+        sampler = FusedSampling(self.size, shape='row')
+        self.assertEqual(sampler.next().shape, (1, self.size))
+
+    def test_base_sampler(self):
+        sampler = FusedSampling(self.size, mirrored=True, base_sampler=BaseSampler(self.size))
+        samples = sampler.nextBlock(4)
+        np.testing.assert_array_almost_equal(samples[:, 0], self.comp_vals[:self.size])
+        np.testing.assert_array_almost_equal(samples[:, 0], -samples[:, 1])
+
+    def test_reset(self):
+        sampler = FusedSampling(self.size, mirrored=True)
+        sampler.next()
+        sampler.reset()
+        self.assertEqual(sampler.current_sample, 0)
+        self.assertIsNone(sampler.samples)
+
+
+class SlowSampler(GaussianSampling):
+    """Gaussian sampler with a random delay per sample, to vary the timing of the prefetching thread"""
+
+    def next(self):
+        time.sleep(np.random.random_sample() * 1e-3)
+        return super(SlowSampler, self).next()
+
+
+class PrefetchingSamplerTest(SamplingTest):
+
+    def setUp(self):
+        self.sampling_setUp()
+        self.size = self.small_n
+        self.block_size = 4
+
+    def draw(self, sampler, num_samples, reset_at=()):
+        samples = []
+        for i in range(num_samples):
+            if i in reset_at:
+                sampler.reset()
+            samples.append(sampler.next())
+        return np.column_stack(samples)
+
+    def test_same_as_wrapped_sampler(self):
+        expected = self.draw(GaussianSampling(self.size, rng=np.random.RandomState(3)), 10)
+        sampler = PrefetchingSampler(GaussianSampling(self.size, rng=np.random.RandomState(3)), self.block_size)
+        np.testing.assert_array_equal(self.draw(sampler, 10), expected)
+        sampler.close()
+
+    def test_shape(self):
+        sampler = PrefetchingSampler(GaussianSampling(self.size, shape='row'), self.block_size)
+        self.assertEqual(sampler.next().shape, (1, self.size))
+        sampler.close()
+
+    def test_deterministic_with_reset(self):
+        results = []
+        for _ in range(3):
+            base_sampler = MirroredSampling(self.size, base_sampler=SlowSampler(self.size, rng=np.random.RandomState(3)))
+            sampler = PrefetchingSampler(base_sampler, self.block_size, buffer_size=3)
+            results.append(self.draw(sampler, 15, reset_at=(3, 9)))
+            sampler.close()
+        np.testing.assert_array_equal(results[0], results[1])
+        np.testing.assert_array_equal(results[0], results[2])
+
+    def test_reset_restarts_mirroring(self):
+        sampler = PrefetchingSampler(MirroredSampling(self.size), self.block_size)
+        sampler.next()
+        sampler.reset()
+        vector1 = sampler.next()
+        vector2 = sampler.next()
+        np.testing.assert_array_almost_equal(vector1, vector2*-1)
+        sampler.close()
+
+    def test_error_is_raised(self):
+        sampler = PrefetchingSampler(OrthogonalSampling(self.size, lambda_=2), self.block_size)
+        sampler.sampler.base_sampler = None
+        with self.assertRaises(AttributeError):
+            sampler.next()
+
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,7 +5,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import unittest
 import numpy as np
 from mock import Mock
-from modea.Selection import bestGA, best, pairwise, roulette, onePlusOneSelection
+from modea.Individual import MixedIntPopulation
+from modea.Selection import bestIndices, bestGA, best, pairwise, pairwiseWinners, roulette, onePlusOneSelection, \
+    _aliasTable, _aliasDraw, _drawWithoutReplacement
 from modea.Utils import chunkListByLength, getFitness
 
 
@@ -37,6 +39,27 @@ class SelectionTest(unittest.TestCase):
     _setUp = setUp
 
 
+class BestIndicesTest(unittest.TestCase):
+
+    def test_sorted(self):
+        fitnesses = [40, 30, 10, 50, 20, 60]
+        self.assertListEqual(bestIndices(fitnesses, 3).tolist(), [2, 4, 1])
+
+    def test_stable_ties(self):
+        fitnesses = [3, 1, 2, 1, 3, 1, 2]
+        self.assertListEqual(bestIndices(fitnesses, 2).tolist(), [1, 3])
+        self.assertListEqual(bestIndices(fitnesses, 5).tolist(), [1, 3, 5, 2, 6])
+
+    def test_same_as_sort(self):
+        rng = np.random.default_rng(42)
+        fitnesses = rng.integers(0, 10, size=1000).astype(np.float64)
+        for mu in [1, 10, 500, 1000, 2000]:
+            np.testing.assert_array_equal(bestIndices(fitnesses, mu), np.argsort(fitnesses, kind='stable')[:mu])
+
+    def test_nan_last(self):
+        self.assertListEqual(bestIndices([np.nan, 1., np.inf, 0.], 3).tolist(), [3, 1, 2])
+
+
 class BestGATest(SelectionTest):
 
     def test_non_elitist(self):
@@ -48,6 +71,22 @@ class BestGATest(SelectionTest):
         self.param.elitist = True
         self.assertListEqual(bestGA(self.pop, self.npop, self.param), result)
 
+    def test_population(self):
+        pop = MixedIntPopulation(2, 3, 1, 1)
+        pop.fitness[:] = [35, 15]
+        pop.floats[:, 0] = [-1, -2]
+        npop = MixedIntPopulation(4, 3, 1, 1)
+        npop.fitness[:] = [40, 15, 10, 50]
+        npop.floats[:, 0] = [1, 2, 3, 4]
+
+        result = bestGA(pop, npop, self.param)
+        self.assertIsInstance(result, MixedIntPopulation)
+        self.assertListEqual(result.floats[:, 0].tolist(), [3, 2])
+
+        self.param.elitist = True
+        result = bestGA(pop, npop, self.param)
+        self.assertListEqual(result.floats[:, 0].tolist(), [3, 2])  # Ties are won by the new population
+
 
 class BestTest(SelectionTest):
 
@@ -60,6 +99,19 @@ class BestTest(SelectionTest):
         self.param.elitist = True
         self.assertListEqual(best(self.pop, self.npop, self.param), result)
 
+    def test_input_unchanged(self):
+        npop = list(self.npop)
+        self.param.elitist = True
+        best(self.pop, self.npop, self.param)
+        self.assertListEqual(self.npop, npop)
+
+    def test_active_offset(self):
+        self.param.active = True
+        for i, ind in enumerate(self.npop):
+            ind.mutation_vector = np.array([[i]])
+        best(self.pop, self.npop, self.param)
+        self.assertListEqual(self.param.offset.tolist(), [[2, 4, 3, 5]])
+
 
 class PairwiseTest(SelectionTest):
 
@@ -75,6 +127,24 @@ class PairwiseTest(SelectionTest):
         self.assertListEqual(pairwise(self.pop, self.npop, self.param), result)
 
 
+    def test_unpaired_last(self):
+        self.npop.append(Mock(fitness=5, genotype='G'))
+        self.assertListEqual(pairwise(self.pop, self.npop, self.param), [self.npop[6], self.npop[2]])
+
+
+class PairwiseWinnersTest(unittest.TestCase):
+
+    def test_winners(self):
+        self.assertListEqual(pairwiseWinners([40, 30, 10, 50, 20, 60]).tolist(), [1, 2, 4])
+
+    def test_ties(self):
+        self.assertListEqual(pairwiseWinners([1, 1, 2, 2]).tolist(), [1, 3])
+
+    def test_odd(self):
+        self.assertListEqual(pairwiseWinners([3, 1, 2]).tolist(), [1, 2])
+        self.assertListEqual(pairwiseWinners([3]).tolist(), [0])
+
+
 class RouletteTest(SelectionTest):
 
     def setUp(self):
@@ -82,16 +152,49 @@ class RouletteTest(SelectionTest):
         np.random.seed(42)
 
     def test_non_elitist(self):
-        result = [self.npop[2], self.npop[5]]
+        result = [self.npop[2], self.npop[4]]
         roulette_outcome = roulette(self.pop, self.npop, self.param)
         self.assertListEqual(roulette_outcome, result)
 
     def test_elitist(self):
-        result = [self.pop[1], self.npop[3]]
+        result = [self.npop[2], self.pop[1]]
         self.param.elitist = True
         roulette_outcome = roulette(self.pop, self.npop, self.param)
         self.assertListEqual(roulette_outcome, result)
 
+    def test_force_unique(self):
+        self.param.mu_int = len(self.npop)
+        roulette_outcome = roulette(self.pop, self.npop, self.param, force_unique=True)
+        self.assertEqual(len(set(id(ind) for ind in roulette_outcome)), len(self.npop))
+
+    def test_sus(self):
+        # Pointers are 1/mu apart, so an individual with p >= 1/mu must be selected
+        self.param.mu_int = 4
+        self.npop[1].fitness = 1
+        roulette_outcome = roulette(self.pop, self.npop, self.param, sus=True)
+        self.assertIn(self.npop[1], roulette_outcome)
+        self.assertEqual(len(roulette_outcome), 4)
+
+    def test_zero_fitness(self):
+        self.npop[3].fitness = 0
+        roulette_outcome = roulette(self.pop, self.npop, self.param)
+        self.assertListEqual(roulette_outcome, [self.npop[3]] * 2)
+
+
+class AliasTableTest(unittest.TestCase):
+
+    def test_distribution(self):
+        probabilities = np.array([.1, .2, .3, .4, 0.])
+        draws = _aliasDraw(_aliasTable(probabilities), 100000, np.random.default_rng(42))
+        np.testing.assert_array_almost_equal(np.bincount(draws, minlength=5) / len(draws), probabilities, decimal=2)
+
+    def test_without_replacement(self):
+        probabilities = np.array([.1, .2, .3, .4, 0.])
+        rng = np.random.default_rng(42)
+        first = np.bincount([_drawWithoutReplacement(probabilities, 2, rng)[0] for _ in range(20000)], minlength=5)
+        np.testing.assert_array_almost_equal(first / 20000, probabilities, decimal=2)
+        self.assertListEqual(sorted(_drawWithoutReplacement(probabilities, 10, rng).tolist()), [0, 1, 2, 3, 4])
+
 
 class OnePlusOneSelectionTest(SelectionTest):
 
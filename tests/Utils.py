@@ -7,7 +7,7 @@ from collections import namedtuple
 from modea.Utils import options, initializable_parameters, num_options_per_module, \
     getVals, getOpts, getBitString, getFullOpts, getPrintName, \
     getFitness, reprToString, reprToInt, intToRepr, \
-    create_bounds, chunkListByLength, guaranteeFolderExists, ESFitness
+    create_bounds, chunkListByLength, guaranteeFolderExists, ESFitness, createRNG, spawnRNGs
 import numpy as np
 import os
 
@@ -198,6 +198,26 @@ class GuaranteedFolderTest(unittest.TestCase):
         self.assertIn(self.folder_name, os.listdir('.'))
 
 
+class SpawnRNGsTest(unittest.TestCase):
+
+    def test_reproducible_streams(self):
+        first = [rng.standard_normal(5) for rng in spawnRNGs(42, 3)]
+        second = [rng.standard_normal(5) for rng in spawnRNGs(np.random.SeedSequence(42), 3)]
+        np.testing.assert_array_equal(first, second)
+
+    def test_independent_streams(self):
+        a, b = [rng.standard_normal(5) for rng in spawnRNGs(42, 2)]
+        self.assertFalse(np.allclose(a, b))
+
+    def test_global_state_untouched(self):
+        np.random.seed(42)
+        expected = np.random.random()
+        np.random.seed(42)
+        createRNG(42).random(10)
+        spawnRNGs(42, 2)
+        self.assertEqual(np.random.random(), expected)
+
+
 class ESFitnessTest(unittest.TestCase):
 
     def test_create_from_human_radable_values(self):
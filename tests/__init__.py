@@ -1,3 +1,3 @@
-from . import Algorithms, Individual, Mutation, Recombination, Sampling, Selection, Utils
+from . import Algorithms, Asynchronous, Boundary, Individual, Mutation, Parallel, Recombination, Sampling, Selection, Utils, distributed
 
-modules_to_test = [Algorithms, Individual, Mutation, Recombination, Sampling, Selection, Utils]
+modules_to_test = [Algorithms, Asynchronous, Boundary, Individual, Mutation, Parallel, Recombination, Sampling, Selection, Utils, distributed]
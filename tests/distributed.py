@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import socket
+import subprocess
+import sys
+import threading
+import unittest
+import numpy as np
+from modea.Algorithms import CustomizedES
+from modea.distributed import Coordinator, parseAddress, receiveMessage, sendMessage
+from modea.worker import _sendHeartbeats, importFunction, runWorker
+
+
+def sphere(x):
+    return float(np.sum(np.square(x)))
+
+
+def failing(x):
+    raise ValueError("Simulation failed")
+
+
+def startWorker(coordinator, fitnessFunction=sphere, batch_size=2, num_evaluated=None):
+    """ Run a worker on a background thread, appending the number of candidates it evaluated to ``num_evaluated`` """
+    def work():
+        try:
+            evaluated = runWorker(coordinator.address, fitnessFunction, batch_size, heartbeat_interval=.1)
+        except ValueError:
+            return
+        if num_evaluated is not None:
+            num_evaluated.append(evaluated)
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
+
+
+class Cluster(object):
+    """ Coordinator with a number of worker threads on localhost """
+
+    def __init__(self, num_workers=3, fitnessFunction=sphere, batch_size=2, **kwargs):
+        self.coordinator = Coordinator(**kwargs)
+        self.num_evaluated = []
+        self.threads = [startWorker(self.coordinator, fitnessFunction, batch_size, self.num_evaluated)
+                        for _ in range(num_workers)]
+
+    def __enter__(self):
+        return self.coordinator
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.coordinator.close()
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+
+class StalledWorker(object):
+    """ Worker that requests tasks, but never returns results """
+
+    def __init__(self, address):
+        self.sock = socket.create_connection(parseAddress(address))
+        sendMessage(self.sock, {'type': 'pull', 'results': [], 'max_tasks': 2})
+
+    def receive(self):
+        return receiveMessage(self.sock)
+
+
+def evaluateInBackground(coordinator, genotypes, errors=None):
+    """ Evaluate on a background thread, appending any RuntimeError to ``errors`` if given """
+    results = []
+
+    def evaluate():
+        try:
+            results.extend(coordinator(genotypes))
+        except RuntimeError as e:
+            if errors is None:
+                raise
+            errors.append(e)
+    thread = threading.Thread(target=evaluate, daemon=True)
+    thread.start()
+    return thread, results
+
+
+class CoordinatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.genotypes = [np.array([[i], [1.]]) for i in range(10)]
+        self.expected = [i**2 + 1. for i in range(10)]
+
+    def test_order(self):
+        cluster = Cluster()
+        with cluster as coordinator:
+            self.assertListEqual(coordinator(self.genotypes), self.expected)
+            self.assertListEqual(coordinator(self.genotypes[:3]), self.expected[:3])
+        self.assertEqual(sum(cluster.num_evaluated), 13)
+
+    def test_disconnected_worker(self):
+        with Cluster(num_workers=0) as coordinator:
+            stalled = StalledWorker(coordinator.address)
+            thread, results = evaluateInBackground(coordinator, self.genotypes)
+            self.assertEqual(len(stalled.receive()['tasks']), 2)
+            stalled.sock.close()
+
+            startWorker(coordinator)
+            thread.join(timeout=10)
+            self.assertListEqual(results, self.expected)
+            self.assertEqual(coordinator.num_reassigned, 2)
+
+    def test_silent_worker(self):
+        with Cluster(num_workers=0, heartbeat_timeout=.5) as coordinator:
+            stalled = StalledWorker(coordinator.address)
+            thread, results = evaluateInBackground(coordinator, self.genotypes)
+            self.assertEqual(len(stalled.receive()['tasks']), 2)
+
+            startWorker(coordinator)
+            thread.join(timeout=10)
+            self.assertListEqual(results, self.expected)
+            self.assertEqual(coordinator.num_reassigned, 2)
+            stalled.sock.close()
+
+    def test_error(self):
+        with Cluster(num_workers=1, fitnessFunction=failing) as coordinator:
+            with self.assertRaises(RuntimeError):
+                coordinator(self.genotypes)
+
+    def test_no_workers(self):
+        with Cluster(num_workers=0, worker_timeout=.5) as coordinator:
+            with self.assertRaises(RuntimeError):
+                coordinator(self.genotypes)
+
+            # The coordinator can still be used once a worker connects
+            startWorker(coordinator)
+            self.assertListEqual(coordinator(self.genotypes), self.expected)
+
+    def test_all_workers_died(self):
+        with Cluster(num_workers=0, worker_timeout=.5) as coordinator:
+            stalled = StalledWorker(coordinator.address)
+            errors = []
+            thread, results = evaluateInBackground(coordinator, self.genotypes, errors)
+            self.assertEqual(len(stalled.receive()['tasks']), 2)
+            stalled.sock.close()
+            thread.join(timeout=10)
+            self.assertEqual(len(errors), 1)
+            self.assertListEqual(results, [])
+            self.assertEqual(coordinator.num_workers, 0)
+
+    def test_optimizer(self):
+        with CustomizedES(5, None, 200, distributed='localhost:0', rng=np.random.default_rng(1)) as es:
+            self.assertTrue(es.parallel)
+            threads = [startWorker(es.coordinator) for _ in range(4)]
+            es.mutateParameters = es.parameters.adaptCovarianceMatrix
+            es.runOptimizer()
+        for thread in threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())  # Stopped when the optimizer was closed
+
+        # Same results as a serial run with the same seed
+        serial = CustomizedES(5, sphere, 200, rng=np.random.default_rng(1))
+        serial.mutateParameters = serial.parameters.adaptCovarianceMatrix
+        serial.runOptimizer()
+        self.assertEqual(es.used_budget, serial.used_budget)
+        self.assertListEqual(es.fitness_over_time, serial.fitness_over_time)
+        self.assertEqual(es.best_individual.fitness, serial.best_individual.fitness)
+
+
+class WorkerTest(unittest.TestCase):
+
+    def test_import_function(self):
+        self.assertIs(importFunction('tests.distributed:sphere'), sphere)
+
+    def test_closed_connection(self):
+        sock, other = socket.socketpair()
+        sock.close()
+        other.close()
+        _sendHeartbeats(sock, threading.Lock(), .01, threading.Event())  # Returns instead of raising an OSError
+
+    def test_command_line(self):
+        with Coordinator() as coordinator:
+            processes = [subprocess.Popen([sys.executable, '-m', 'modea.worker', coordinator.address, 'math:fsum'])
+                         for _ in range(2)]
+            self.assertListEqual(coordinator([np.array([i, 1.]) for i in range(10)]), [i + 1. for i in range(10)])
+        for process in processes:
+            self.assertEqual(process.wait(timeout=10), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()